@@ -1,13 +1,17 @@
 from flask import Flask, jsonify
 
+from ml.inference.registry import get_model_registry
+
 from .api import register_blueprints
 from .config import config_by_name
 from .extensions import db
+from .json_provider import OrjsonProvider
 
 
 def create_app(config_name: str | None = None) -> Flask:
     """Application factory configuring extensions and blueprints."""
     app = Flask(__name__, instance_relative_config=True)
+    app.json = OrjsonProvider(app)
 
     selected_name = config_name or app.config.get("ENV", "development")
     base_config = config_by_name["default"]
@@ -25,6 +29,9 @@ def create_app(config_name: str | None = None) -> Flask:
     setup_cors_headers(app)
     register_error_handlers(app)
 
+    if app.config.get("MODEL_PRELOAD"):
+        get_model_registry().preload()
+
     return app
 
 
@@ -1,4 +1,4 @@
-from flask import jsonify, request
+from flask import Response, jsonify, request
 
 from . import blueprint
 from ...auth import jwt_required
@@ -10,65 +10,111 @@ from ...services.audit_copilot import (
     record_feedback,
 )
 from ...services.chat_agent import generate_chat_reply
+from ...services.claims_export import InvalidExportFormat, export_high_risk_claims
 from ...services.chat_history import append_chat_message, list_chat_messages
-from ...services.risk_scoring import get_high_risk_claims
+from ...services.refresh_jobs import RefreshJobNotFound, get_refresh_job, submit_refresh_job
+from ...services.risk_scoring import InvalidCursor, StaleCursor, get_high_risk_claims
+
+
+FILTER_KEYS = (
+    "province",
+    "dx",
+    "severity",
+    "service_type",
+    "min_risk_score",
+    "max_risk_score",
+    "min_ml_score",
+    "facility_class",
+    "start_date",
+    "end_date",
+    "discharge_start",
+    "discharge_end",
+)
 
 
 @blueprint.route("/high-risk")
 @jwt_required
 def high_risk_claims():
     """List high risk claims scored by rules + ML."""
-    filters = {
-        "province": request.args.get("province"),
-        "dx": request.args.get("dx"),
-        "page": request.args.get("page"),
-        "page_size": request.args.get("page_size"),
-        "limit": request.args.get("limit"),
-        "refresh_cache": request.args.get("refresh_cache"),
-        "severity": request.args.get("severity"),
-        "service_type": request.args.get("service_type"),
-        "min_risk_score": request.args.get("min_risk_score"),
-        "max_risk_score": request.args.get("max_risk_score"),
-        "min_ml_score": request.args.get("min_ml_score"),
-        "facility_class": request.args.get("facility_class"),
-        "start_date": request.args.get("start_date"),
-        "end_date": request.args.get("end_date"),
-        "discharge_start": request.args.get("discharge_start"),
-        "discharge_end": request.args.get("discharge_end"),
-    }
-    result = get_high_risk_claims(filters)
-
-    filter_keys = {
-        "province",
-        "dx",
-        "severity",
-        "service_type",
-        "min_risk_score",
-        "max_risk_score",
-        "min_ml_score",
-        "facility_class",
-        "start_date",
-        "end_date",
-        "discharge_start",
-        "discharge_end",
-    }
-    applied_filters = {key: value for key, value in filters.items() if key in filter_keys and value}
+    filters = {key: request.args.get(key) for key in FILTER_KEYS}
+    filters.update(
+        {
+            "page": request.args.get("page"),
+            "page_size": request.args.get("page_size"),
+            "limit": request.args.get("limit"),
+            "cursor": request.args.get("cursor"),
+            "count": request.args.get("count"),
+            "refresh_cache": request.args.get("refresh_cache"),
+        }
+    )
+    try:
+        result = get_high_risk_claims(filters)
+    except InvalidCursor as exc:
+        return jsonify({"error": str(exc)}), 400
+    except StaleCursor as exc:
+        return jsonify({"error": str(exc)}), 409
+
+    applied_filters = {key: value for key, value in filters.items() if key in FILTER_KEYS and value}
 
     return jsonify(
         {
             "data": result["items"],
             "meta": {
                 "total": result["total"],
+                "total_estimated": result["total_estimated"],
                 "page": result["page"],
                 "page_size": result["page_size"],
                 "model_version": result["model_version"],
                 "ruleset_version": result["ruleset_version"],
+                "snapshot": result["snapshot"],
+                "next_cursor": result["next_cursor"],
+                "refresh_job": result["refresh_job"],
                 "filters": applied_filters,
             },
         }
     )
 
 
+@blueprint.route("/high-risk/export")
+@jwt_required
+def high_risk_claims_export():
+    """Stream every filtered high risk claim as NDJSON, CSV or Parquet."""
+    filters = {key: request.args.get(key) for key in FILTER_KEYS}
+    try:
+        export = export_high_risk_claims(filters, request.args.get("format"))
+    except InvalidExportFormat as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="{export.filename}"',
+        "X-Model-Version": export.model_version,
+        "X-Ruleset-Version": export.ruleset_version,
+    }
+    if export.snapshot:
+        headers["X-Snapshot"] = export.snapshot
+    return Response(export.chunks, mimetype=export.mimetype, headers=headers)
+
+
+@blueprint.route("/refresh-jobs", methods=["POST"])
+@jwt_required
+def create_refresh_job():
+    """Queue a background refresh of ML scores and the ranked claims table."""
+    payload = request.get_json(silent=True) or {}
+    job = submit_refresh_job(full=bool(payload.get("full")), recalibrate=bool(payload.get("recalibrate")))
+    return jsonify({"data": job.to_dict()}), 202
+
+
+@blueprint.route("/refresh-jobs/<job_id>")
+@jwt_required
+def refresh_job_status(job_id: str):
+    """Return the status of a background score refresh."""
+    try:
+        job = get_refresh_job(job_id)
+    except RefreshJobNotFound as exc:
+        return jsonify({"error": str(exc)}), 404
+    return jsonify({"data": job.to_dict()})
+
+
 @blueprint.route("/<claim_id>/summary")
 @jwt_required
 def claim_summary(claim_id: str):
@@ -6,7 +6,7 @@ def build_spec(config: Mapping[str, str], server_url: str) -> dict:
     title = config.get("API_TITLE", "Casemind Claims API")
     version = config.get("API_VERSION", "1.0.0")
 
-    return {
+    spec = {
         "openapi": "3.0.3",
         "info": {
             "title": title,
@@ -35,6 +35,44 @@ def build_spec(config: Mapping[str, str], server_url: str) -> dict:
                     },
                 }
             },
+            "/health/model": {
+                "get": {
+                    "summary": "Loaded ML model and registry timings",
+                    "tags": ["Health"],
+                    "responses": {
+                        "200": {
+                            "description": "Model registry status",
+                            "content": {
+                                "application/json": {
+                                    "schema": {"$ref": "#/components/schemas/ModelRegistryStatus"}
+                                }
+                            },
+                        }
+                    },
+                }
+            },
+            "/health/cache": {
+                "get": {
+                    "summary": "API result cache backends, sizes and hit/miss counters",
+                    "tags": ["Health"],
+                    "responses": {
+                        "200": {
+                            "description": (
+                                "Cache statistics keyed by cache name (claim_context, high_risk_pages, "
+                                "high_risk_counts, reports, analytics)"
+                            ),
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "type": "object",
+                                        "additionalProperties": {"$ref": "#/components/schemas/CacheStats"},
+                                    }
+                                }
+                            },
+                        }
+                    },
+                }
+            },
             "/auth/register": {
                 "post": {
                     "summary": "Register new user account",
@@ -135,6 +173,26 @@ def build_spec(config: Mapping[str, str], server_url: str) -> dict:
                             "required": False,
                             "description": "Backward-compatible alias for page_size",
                         },
+                        {
+                            "name": "cursor",
+                            "in": "query",
+                            "schema": {"type": "string"},
+                            "required": False,
+                            "description": (
+                                "Opaque keyset cursor taken from meta.next_cursor. When present, page is ignored "
+                                "and the next page starts right after the previous one."
+                            ),
+                        },
+                        {
+                            "name": "count",
+                            "in": "query",
+                            "schema": {"type": "string", "enum": ["exact", "estimate"], "default": "exact"},
+                            "required": False,
+                            "description": (
+                                "exact counts matching rows together with the page; estimate reuses the cached "
+                                "total for the same filters (see meta.total_estimated) and skips the count"
+                            ),
+                        },
                         {
                             "name": "severity",
                             "in": "query",
@@ -210,7 +268,10 @@ def build_spec(config: Mapping[str, str], server_url: str) -> dict:
                             "in": "query",
                             "schema": {"type": "boolean"},
                             "required": False,
-                            "description": "Set true to recompute and refresh ML score cache",
+                            "description": (
+                                "Set true to queue a background refresh of the ML score cache; the response is "
+                                "served from the current snapshot and meta.refresh_job holds the job id"
+                            ),
                         },
                     ],
                     "security": [{"bearerAuth": []}],
@@ -223,6 +284,18 @@ def build_spec(config: Mapping[str, str], server_url: str) -> dict:
                                 }
                             },
                         },
+                        "400": {
+                            "description": "Invalid cursor",
+                            "content": {
+                                "application/json": {"schema": {"$ref": "#/components/schemas/ErrorResponse"}}
+                            },
+                        },
+                        "409": {
+                            "description": "Cursor belongs to an older scores snapshot",
+                            "content": {
+                                "application/json": {"schema": {"$ref": "#/components/schemas/ErrorResponse"}}
+                            },
+                        },
                         "401": {
                             "description": "Unauthorized",
                             "content": {
@@ -232,6 +305,77 @@ def build_spec(config: Mapping[str, str], server_url: str) -> dict:
                     },
                 }
             },
+            "/claims/refresh-jobs": {
+                "post": {
+                    "summary": "Queue a background ML score refresh",
+                    "tags": ["Claims"],
+                    "security": [{"bearerAuth": []}],
+                    "requestBody": {
+                        "required": False,
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "object",
+                                    "properties": {
+                                        "full": {"type": "boolean", "description": "Rescore every claim"},
+                                        "recalibrate": {"type": "boolean", "description": "Refit the score calibration"},
+                                    },
+                                }
+                            }
+                        },
+                    },
+                    "responses": {
+                        "202": {
+                            "description": "Job queued (or the job already running in this worker)",
+                            "content": {
+                                "application/json": {"schema": {"$ref": "#/components/schemas/RefreshJobResponse"}}
+                            },
+                        },
+                        "401": {
+                            "description": "Unauthorized",
+                            "content": {
+                                "application/json": {"schema": {"$ref": "#/components/schemas/ErrorResponse"}}
+                            },
+                        },
+                    },
+                }
+            },
+            "/claims/refresh-jobs/{job_id}": {
+                "get": {
+                    "summary": "Poll a background ML score refresh",
+                    "tags": ["Claims"],
+                    "security": [{"bearerAuth": []}],
+                    "parameters": [
+                        {
+                            "name": "job_id",
+                            "in": "path",
+                            "required": True,
+                            "schema": {"type": "string"},
+                            "description": "Identifier returned when the job was queued",
+                        }
+                    ],
+                    "responses": {
+                        "200": {
+                            "description": "Job status",
+                            "content": {
+                                "application/json": {"schema": {"$ref": "#/components/schemas/RefreshJobResponse"}}
+                            },
+                        },
+                        "401": {
+                            "description": "Unauthorized",
+                            "content": {
+                                "application/json": {"schema": {"$ref": "#/components/schemas/ErrorResponse"}}
+                            },
+                        },
+                        "404": {
+                            "description": "Job not found",
+                            "content": {
+                                "application/json": {"schema": {"$ref": "#/components/schemas/ErrorResponse"}}
+                            },
+                        },
+                    },
+                }
+            },
             "/claims/{claim_id}/summary": {
                 "get": {
                     "summary": "Audit copilot summary for a claim",
@@ -461,24 +605,66 @@ def build_spec(config: Mapping[str, str], server_url: str) -> dict:
                                 "maximum": 1000,
                             },
                             "required": False,
-                            "description": "Maximum number of pairs to return (default 200)",
-                        }
+                            "description": "Maximum number of pairs per page (default 200)",
+                        },
+                        {
+                            "name": "cursor",
+                            "in": "query",
+                            "schema": {"type": "string"},
+                            "required": False,
+                            "description": "Opaque keyset cursor taken from meta.next_cursor",
+                        },
+                        {
+                            "name": "province",
+                            "in": "query",
+                            "schema": {"type": "string"},
+                            "required": False,
+                            "description": "Province of the first claim of the pair (case-insensitive)",
+                        },
+                        {
+                            "name": "facility_id",
+                            "in": "query",
+                            "schema": {"type": "string"},
+                            "required": False,
+                            "description": "Facility of either claim of the pair",
+                        },
                     ],
                     "responses": {
                         "200": {
-                            "description": "Potential duplicate claims within 3-day window",
+                            "description": (
+                                "Potential duplicate claims within 3-day window, ordered by gap then claim ids, "
+                                "read from the ETL-built claim_duplicate_pairs table"
+                            ),
                             "content": {
                                 "application/json": {
                                     "schema": {"$ref": "#/components/schemas/DuplicateClaimsResponse"}
                                 }
                             },
                         },
+                        "400": {
+                            "description": "Invalid cursor",
+                            "content": {
+                                "application/json": {"schema": {"$ref": "#/components/schemas/ErrorResponse"}}
+                            },
+                        },
                         "401": {
                             "description": "Unauthorized",
                             "content": {
                                 "application/json": {"schema": {"$ref": "#/components/schemas/ErrorResponse"}}
                             },
-                        }
+                        },
+                        "409": {
+                            "description": "Cursor belongs to an older ETL run; restart from the first page",
+                            "content": {
+                                "application/json": {"schema": {"$ref": "#/components/schemas/ErrorResponse"}}
+                            },
+                        },
+                        "503": {
+                            "description": "claim_duplicate_pairs not built yet; rerun the claims_normalized ETL",
+                            "content": {
+                                "application/json": {"schema": {"$ref": "#/components/schemas/ErrorResponse"}}
+                            },
+                        },
                     },
                 }
             },
@@ -685,6 +871,61 @@ def build_spec(config: Mapping[str, str], server_url: str) -> dict:
                     },
                     "required": ["status"],
                 },
+                "ModelRegistryStatus": {
+                    "type": "object",
+                    "properties": {
+                        "model_version": {"type": "string", "nullable": True, "example": "iso_v2"},
+                        "calibrated": {"type": "boolean", "description": "Whether a stored score calibration is applied."},
+                        "loaded_at": {"type": "string", "format": "date-time", "nullable": True},
+                        "loads": {"type": "integer", "description": "Number of artefact loads (startup + hot swaps)."},
+                        "load_ms": {"type": "number", "nullable": True, "description": "Duration of the last artefact load."},
+                        "reload_errors": {"type": "integer"},
+                        "last_error": {"type": "string", "nullable": True},
+                        "requests": {"type": "integer", "description": "Scorer lookups served by the registry."},
+                        "acquire_ms_last": {"type": "number", "nullable": True},
+                        "acquire_ms_avg": {"type": "number", "nullable": True},
+                    },
+                },
+                "CacheStats": {
+                    "type": "object",
+                    "properties": {
+                        "backend": {
+                            "type": "string",
+                            "enum": ["memory", "file"],
+                            "description": "memory is per worker process; file is shared by all workers on the host.",
+                        },
+                        "size": {"type": "integer"},
+                        "max_entries": {"type": "integer"},
+                        "ttl_seconds": {"type": "number"},
+                        "hits": {"type": "integer"},
+                        "misses": {"type": "integer"},
+                        "hit_rate": {"type": "number", "nullable": True},
+                        "evictions": {"type": "integer", "description": "Entries dropped by the size bound."},
+                        "expirations": {"type": "integer", "description": "Entries dropped by the TTL."},
+                        "invalidations": {"type": "integer", "description": "Full clears, e.g. after a scores refresh."},
+                    },
+                },
+                "RefreshJob": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "string", "example": "5f0c6a8e9d2b4c1f8a7e6d5c4b3a2910"},
+                        "status": {"type": "string", "enum": ["queued", "running", "succeeded", "failed"]},
+                        "full": {"type": "boolean"},
+                        "recalibrate": {"type": "boolean"},
+                        "created_at": {"type": "string", "format": "date-time"},
+                        "started_at": {"type": "string", "format": "date-time", "nullable": True},
+                        "finished_at": {"type": "string", "format": "date-time", "nullable": True},
+                        "returncode": {"type": "integer", "nullable": True},
+                        "error": {"type": "string", "nullable": True},
+                        "log_tail": {"type": "array", "items": {"type": "string"}},
+                    },
+                    "required": ["id", "status"],
+                },
+                "RefreshJobResponse": {
+                    "type": "object",
+                    "properties": {"data": {"$ref": "#/components/schemas/RefreshJob"}},
+                    "required": ["data"],
+                },
                 "HighRiskClaimsResponse": {
                     "type": "object",
                     "properties": {
@@ -696,10 +937,29 @@ def build_spec(config: Mapping[str, str], server_url: str) -> dict:
                             "type": "object",
                             "properties": {
                                 "total": {"type": "integer", "example": 1176438},
-                                "page": {"type": "integer", "example": 1},
+                                "total_estimated": {
+                                    "type": "boolean",
+                                    "description": "True when total came from the cached count (count=estimate)",
+                                },
+                                "page": {"type": "integer", "nullable": True, "example": 1},
                                 "page_size": {"type": "integer", "example": 50},
                                 "model_version": {"type": "string", "example": "iso_v2"},
                                 "ruleset_version": {"type": "string", "example": "RULESET_v1"},
+                                "snapshot": {
+                                    "type": "string",
+                                    "nullable": True,
+                                    "description": "run_id of the scores refresh the page was served from",
+                                },
+                                "next_cursor": {
+                                    "type": "string",
+                                    "nullable": True,
+                                    "description": "Pass as ?cursor= to fetch the next page; null on the last page",
+                                },
+                                "refresh_job": {
+                                    "type": "string",
+                                    "nullable": True,
+                                    "description": "Background refresh job queued by refresh_cache=true",
+                                },
                                 "filters": {
                                     "type": "object",
                                     "additionalProperties": {"type": "string"},
@@ -929,9 +1189,20 @@ def build_spec(config: Mapping[str, str], server_url: str) -> dict:
                         "data": {
                             "type": "array",
                             "items": {"$ref": "#/components/schemas/DuplicateClaimRecord"},
-                        }
+                        },
+                        "meta": {
+                            "type": "object",
+                            "properties": {
+                                "limit": {"type": "integer"},
+                                "next_cursor": {
+                                    "type": "string",
+                                    "nullable": True,
+                                    "description": "Pass as ?cursor= to fetch the next page; null on the last page",
+                                },
+                            },
+                        },
                     },
-                    "required": ["data"],
+                    "required": ["data", "meta"],
                 },
                 "DuplicateClaimRecord": {
                     "type": "object",
@@ -941,6 +1212,9 @@ def build_spec(config: Mapping[str, str], server_url: str) -> dict:
                         "dx_primary": {"type": "string", "example": "O80"},
                         "procedure_code": {"type": "string", "example": "9059"},
                         "episode_gap_days": {"type": "integer", "example": 2},
+                        "province_name": {"type": "string", "example": "JAWA BARAT"},
+                        "facility_id": {"type": "string", "nullable": True, "example": "3273015"},
+                        "matched_facility_id": {"type": "string", "nullable": True, "example": "3273015"},
                     },
                     "required": ["claim_id", "matched_claim_id", "dx_primary", "procedure_code", "episode_gap_days"],
                 },
@@ -1173,3 +1447,52 @@ def build_spec(config: Mapping[str, str], server_url: str) -> dict:
             {"name": "Analytics"},
         ],
     }
+    spec["paths"]["/claims/high-risk/export"] = _high_risk_export_path(
+        spec["paths"]["/claims/high-risk"]["get"]["parameters"]
+    )
+    return spec
+
+
+def _high_risk_export_path(high_risk_parameters: list[dict]) -> dict:
+    """Export shares the /claims/high-risk filters, minus paging and cache options."""
+    paging = {"page", "page_size", "limit", "cursor", "count", "refresh_cache"}
+    parameters = [param for param in high_risk_parameters if param["name"] not in paging]
+    parameters.append(
+        {
+            "name": "format",
+            "in": "query",
+            "schema": {"type": "string", "enum": ["ndjson", "csv", "parquet"], "default": "ndjson"},
+            "required": False,
+            "description": "Output format; list columns (flags, dx_secondary_codes) are '|'-joined in CSV",
+        }
+    )
+    return {
+        "get": {
+            "summary": "Export all filtered high-risk claims",
+            "description": (
+                "Streams every claim matching the filters in ranking order, without the page size cap. "
+                "Headers X-Snapshot, X-Model-Version and X-Ruleset-Version identify the scores used."
+            ),
+            "tags": ["Claims"],
+            "parameters": parameters,
+            "security": [{"bearerAuth": []}],
+            "responses": {
+                "200": {
+                    "description": "Streamed export file",
+                    "content": {
+                        "application/x-ndjson": {"schema": {"type": "string"}},
+                        "text/csv": {"schema": {"type": "string"}},
+                        "application/vnd.apache.parquet": {"schema": {"type": "string", "format": "binary"}},
+                    },
+                },
+                "400": {
+                    "description": "Unsupported format",
+                    "content": {"application/json": {"schema": {"$ref": "#/components/schemas/ErrorResponse"}}},
+                },
+                "401": {
+                    "description": "Unauthorized",
+                    "content": {"application/json": {"schema": {"$ref": "#/components/schemas/ErrorResponse"}}},
+                },
+            },
+        }
+    }
@@ -1,5 +1,9 @@
 from flask import jsonify
 
+from ml.inference.registry import get_model_registry
+
+from ...services.cache import cache_stats
+
 from . import blueprint
 
 
@@ -7,3 +11,15 @@ from . import blueprint
 def ping():
     """Basic liveness probe."""
     return jsonify({"status": "ok"})
+
+
+@blueprint.route("/model")
+def model_status():
+    """Loaded model version plus load and per-request acquisition timings."""
+    return jsonify(get_model_registry().stats())
+
+
+@blueprint.route("/cache")
+def cache_status():
+    """Backend, size and hit/miss counters of every API result cache."""
+    return jsonify(cache_stats())
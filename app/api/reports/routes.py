@@ -2,7 +2,9 @@ from flask import jsonify, request
 
 from . import blueprint
 from ...auth import jwt_required
+from ...services.risk_scoring import InvalidCursor, StaleCursor
 from ...services.reports import (
+    DuplicatePairsUnavailable,
     get_duplicate_claims,
     get_severity_mismatch,
     get_tariff_insight,
@@ -32,10 +34,22 @@ def severity_mismatch():
 @blueprint.route("/duplicates")
 @jwt_required
 def duplicate_claims():
-    """Return duplicate claim candidates within a three-day window."""
-    limit = _parse_limit()
-    data = get_duplicate_claims(limit=limit or 200)
-    return jsonify({"data": data})
+    """Return duplicate claim candidates within a three-day window, keyset paged."""
+    limit = _parse_limit() or 200
+    try:
+        result = get_duplicate_claims(
+            limit=limit,
+            cursor=request.args.get("cursor"),
+            province=request.args.get("province"),
+            facility_id=request.args.get("facility_id"),
+        )
+    except InvalidCursor as exc:
+        return jsonify({"error": str(exc)}), 400
+    except StaleCursor as exc:
+        return jsonify({"error": str(exc)}), 409
+    except DuplicatePairsUnavailable as exc:
+        return jsonify({"error": str(exc)}), 503
+    return jsonify({"data": result["data"], "meta": {"limit": limit, "next_cursor": result["next_cursor"]}})
 
 
 @blueprint.route("/tariff-insight")
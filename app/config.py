@@ -30,6 +30,7 @@ class BaseConfig:
     COPILOT_LLM_TEMPERATURE = float(os.getenv("COPILOT_LLM_TEMPERATURE", "0.2"))
     COPILOT_LLM_MAX_TOKENS = int(os.getenv("COPILOT_LLM_MAX_TOKENS", "400"))
     COPILOT_CACHE_DIR = os.getenv("COPILOT_CACHE_DIR", os.path.join("instance", "cache", "copilot"))
+    MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "false").lower() in {"1", "true", "yes"}
 
 
 class DevelopmentConfig(BaseConfig):
@@ -38,6 +39,7 @@ class DevelopmentConfig(BaseConfig):
 
 class ProductionConfig(BaseConfig):
     DEBUG = False
+    MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "true").lower() in {"1", "true", "yes"}
 
 
 config_by_name = {
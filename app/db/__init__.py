@@ -4,6 +4,8 @@ from typing import Iterator
 
 import duckdb
 
+from ml.common.data_access import read_connection, write_connection
+
 
 def get_duckdb_path() -> str:
     """Resolve DuckDB file path from environment, defaulting to instance dir."""
@@ -12,11 +14,8 @@ def get_duckdb_path() -> str:
 
 @contextmanager
 def duckdb_session(read_only: bool = True) -> Iterator[duckdb.DuckDBPyConnection]:
-    """Yield a DuckDB connection. Write mode allowed when read_only is False."""
+    """Yield a DuckDB connection. Read-only sessions reuse the pooled process connection."""
     path = get_duckdb_path()
-    database = f"{path}{'' if not read_only else '?access_mode=read_only'}"
-    conn = duckdb.connect(database=database, read_only=read_only)
-    try:
+    session = read_connection(path) if read_only else write_connection(path)
+    with session as conn:
         yield conn
-    finally:
-        conn.close()
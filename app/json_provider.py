@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+BASE_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider encoding responses with orjson.
+
+    Output matches the default provider (sorted keys, pretty-printed in debug, datetimes
+    as HTTP dates via the inherited ``default``) except that NaN/Infinity become ``null``
+    and non-ASCII text is emitted as UTF-8. numpy scalars and arrays are encoded natively.
+    """
+
+    def _options(self, indent: bool = False) -> int:
+        option = BASE_OPTIONS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj: Any, indent: bool = False) -> bytes:
+        return orjson.dumps(obj, default=self.default, option=self._options(indent))
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if set(kwargs) - {"indent", "separators"}:
+            # Callers asking for json.dumps-specific options get the stdlib encoder.
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj, indent=bool(kwargs.get("indent"))).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self.dumps_bytes(obj, indent=indent) + b"\n", mimetype=self.mimetype)
@@ -1,14 +1,25 @@
 from __future__ import annotations
 
+import os
 from typing import Any
 
-from ml.common.data_access import DataLoader
+from ml.common.data_access import DataLoader, get_data_loader
+
+from .cache import cache_key, create_cache
+
+ANALYTICS_CACHE_SIZE = int(os.getenv("ANALYTICS_CACHE_SIZE", "64"))
+ANALYTICS_CACHE_TTL_SECONDS = float(os.getenv("ANALYTICS_CACHE_TTL", "600"))
+_ANALYTICS_CACHE = create_cache("analytics", ANALYTICS_CACHE_SIZE, ANALYTICS_CACHE_TTL_SECONDS)
 
 
 def get_casemix_by_province(limit: int | None = None) -> list[dict[str, Any]]:
     """Aggregate casemix metrics per province using DuckDB analytics output."""
-    loader = DataLoader()
+    loader = get_data_loader()
+    key = cache_key("casemix_by_province", {"limit": limit}, loader.data_version())
+    return _ANALYTICS_CACHE.get_or_set(key, lambda: _query_casemix_by_province(loader, limit))
+
 
+def _query_casemix_by_province(loader: DataLoader, limit: int | None) -> list[dict[str, Any]]:
     sql = """
         SELECT
             COALESCE(province_name, 'UNKNOWN') AS province,
@@ -2,21 +2,24 @@ from __future__ import annotations
 
 import json
 import math
+import os
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
 import pandas as pd
-from flask import current_app
+from flask import current_app, g, has_app_context
 import numpy as np
 
-from ml.common.data_access import DataLoader
-from ml.inference.scorer import MLScorer
+from ml.common.data_access import DataLoader, get_data_loader
+from ml.inference.registry import get_scorer
+from ml.inference.scorer import load_model_version
 
 from ..extensions import db
 from ..models import AuditOutcome, User
 from . import risk_scoring
+from .cache import create_cache
 
 FLAG_DESCRIPTIONS = {
     "short_stay_high_cost": "LOS ≤ 1 hari namun biaya melebihi P90 peer group.",
@@ -53,6 +56,16 @@ DEFAULT_QUESTIONS = [
 ALLOWED_DECISIONS = {"approved", "partial", "rejected"}
 PROMPT_VERSION = "v1"
 
+CLAIM_CONTEXT_CACHE_SIZE = int(os.getenv("CLAIM_CONTEXT_CACHE_SIZE", "2048"))
+CLAIM_CONTEXT_CACHE_TTL_SECONDS = float(os.getenv("CLAIM_CONTEXT_CACHE_TTL", "900"))
+_CONTEXT_CACHE = create_cache(
+    "claim_context",
+    CLAIM_CONTEXT_CACHE_SIZE,
+    CLAIM_CONTEXT_CACHE_TTL_SECONDS,
+    encode=lambda context: {"claim_id": context.claim_id, "data": context.data.to_dict()},
+    decode=lambda data: ClaimContext(claim_id=data["claim_id"], data=pd.Series(data["data"], dtype=object)),
+)
+
 
 def _slugify(value: str) -> str:
     return "".join(ch if ch.isalnum() or ch in ("-", "_") else "_" for ch in value)
@@ -314,9 +327,62 @@ def _format_ratio(value: Any) -> str:
     return f"{float(value) * 100:.1f}%"
 
 
+def get_claim_row(claim_id: str) -> pd.DataFrame:
+    """
+    claims_normalized row for a claim (empty frame when unknown), fetched once per request.
+
+    The summary, chat tools and feedback all look up the same claim; rows are memoised on
+    `flask.g`, so they live only as long as the request. Callers must not mutate the frame.
+    """
+    memo = g.setdefault("claim_rows", {}) if has_app_context() else {}
+    row = memo.get(claim_id)
+    if row is None:
+        row = memo[claim_id] = get_data_loader().get_claim(claim_id)
+    return row
+
+
+def _request_ranked_snapshot(loader: DataLoader, model_version: str, ruleset_version: str) -> risk_scoring.RankedSnapshot:
+    """
+    Ranked scores snapshot, looked up once per request.
+
+    A chat reply loads the claim context for the reply and for each tool it calls; the
+    snapshot is memoised on `flask.g` like `get_claim_row`, so only the first lookup
+    queries the refresh metadata.
+    """
+    memo = g.setdefault("ranked_snapshots", {}) if has_app_context() else {}
+    key = (loader.duckdb_path, model_version, ruleset_version)
+    snapshot = memo.get(key)
+    if snapshot is None:
+        snapshot = memo[key] = risk_scoring._ranked_snapshot(loader, model_version, ruleset_version)
+    return snapshot
+
+
 def _load_claim_context(claim_id: str) -> ClaimContext:
-    loader = DataLoader()
-    df = loader.load_claims_normalized(filters={"claim_id": claim_id})
+    """
+    Enriched claim (scores, flags, risk_score) shared by the summary, chat and chat tools.
+
+    Contexts are cached per (claim_id, model_version, ruleset_version, scores snapshot,
+    DuckDB data version) on the configured cache backend, so a new scores refresh or ETL
+    run moves to new keys. Cached contexts must not be mutated.
+    """
+    loader = get_data_loader()
+    model_version = load_model_version()
+    ruleset_version = risk_scoring._get_ruleset_version()
+    snapshot = _request_ranked_snapshot(loader, model_version, ruleset_version)
+    key = (claim_id, model_version, ruleset_version, snapshot.run_id, snapshot.is_current, loader.data_version())
+    return _CONTEXT_CACHE.get_or_set(key, lambda: _build_claim_context(loader, claim_id, snapshot))
+
+
+def claim_context_cache_stats() -> dict[str, Any]:
+    return _CONTEXT_CACHE.stats()
+
+
+def _build_claim_context(loader: DataLoader, claim_id: str, snapshot: risk_scoring.RankedSnapshot) -> ClaimContext:
+    ranked = risk_scoring.load_ranked_claim(loader, claim_id, snapshot)
+    if ranked is not None:
+        return ClaimContext(claim_id=claim_id, data=ranked.iloc[0])
+
+    df = get_claim_row(claim_id)
     if df.empty:
         raise ClaimNotFound(f"Claim {claim_id} tidak ditemukan.")
 
@@ -333,7 +399,7 @@ def _load_claim_context(claim_id: str) -> ClaimContext:
 
     if score_df.empty:
         try:
-            scorer = MLScorer()
+            scorer = get_scorer()
             score_df = scorer.score_dataframe(row)
         except FileNotFoundError:
             score_df = pd.DataFrame(
@@ -515,9 +581,7 @@ def generate_summary(claim_id: str) -> dict[str, Any]:
 
 
 def _ensure_claim_exists(claim_id: str) -> None:
-    loader = DataLoader()
-    df = loader.load_claims_normalized(filters={"claim_id": claim_id})
-    if df.empty:
+    if get_claim_row(claim_id).empty:
         raise ClaimNotFound(f"Claim {claim_id} tidak ditemukan.")
 
 
@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import abc
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, Hashable
+
+import numpy as np
+import orjson
+import pandas as pd
+
+CACHE_BACKEND = os.getenv("API_CACHE_BACKEND", "memory").strip().lower()
+CACHE_DIRNAME = os.getenv("API_CACHE_DIR", os.path.join("instance", "cache", "api"))
+CACHE_BACKENDS = ("memory", "file")
+# The file backend enforces max_entries once every FILE_CACHE_PRUNE_EVERY writes per process.
+FILE_CACHE_PRUNE_EVERY = 64
+
+FILE_CACHE_JSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+_MISSING = object()
+
+
+class CacheBackend(abc.ABC):
+    """
+    Interface shared by the API result caches.
+
+    Backends implement `get`, `set`, `clear` and `__len__`; `get_or_set`, `set_generation`
+    and `stats` are built on top of them. Cached values must be treated as read-only.
+    """
+
+    backend = "base"
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        self.max_entries = max(int(max_entries), 0)
+        self.ttl = float(ttl)
+        self._lock = threading.Lock()
+        self._generation: Any = _MISSING
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @abc.abstractmethod
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Cached value of ``key`` (in the current generation), or ``default``."""
+
+    @abc.abstractmethod
+    def set(self, key: Hashable, value: Any) -> None:
+        """Cache ``value`` under ``key`` (in the current generation)."""
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """Drop every entry."""
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        """Number of stored entries, including those of older generations."""
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the cached value, or build it with ``factory`` (outside the lock) and cache it."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def set_generation(self, generation: Any) -> None:
+        """
+        Scope later lookups and writes to ``generation`` (e.g. the scores refresh run_id).
+
+        Entries of other generations are no longer returned and age out through LRU, TTL
+        and pruning; nothing is deleted, so a worker switching generations does not wipe
+        the entries other workers share through the file backend.
+        """
+        with self._lock:
+            if self._generation is not _MISSING and generation != self._generation:
+                self._stats["invalidations"] += 1
+            self._generation = generation
+
+    def _scoped(self, key: Hashable) -> Hashable:
+        generation = self._generation
+        return key if generation is _MISSING else (generation, key)
+
+    def _count(self, stat: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[stat] += amount
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            payload = dict(self._stats)
+        payload["size"] = len(self)
+        lookups = payload["hits"] + payload["misses"]
+        payload.update(
+            backend=self.backend,
+            max_entries=self.max_entries,
+            ttl_seconds=self.ttl,
+            hit_rate=round(payload["hits"] / lookups, 4) if lookups else None,
+        )
+        return payload
+
+
+class TTLCache(CacheBackend):
+    """
+    Thread-safe in-process LRU cache whose entries also expire after ``ttl`` seconds.
+
+    At most ``max_entries`` values are kept; the least recently used one is evicted first,
+    so entries of an older generation (see `set_generation`) are the first to go.
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int, ttl: float) -> None:
+        super().__init__(max_entries, ttl)
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        key = self._scoped(key)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return default
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.max_entries == 0:
+            return
+        key = self._scoped(key)
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stats["invalidations"] += 1
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class FileCache(CacheBackend):
+    """
+    Cache stored as JSON files in a directory shared by every worker process on the host.
+
+    Values are written with orjson (numpy values natively, dates as ISO strings, NaN/NaT as
+    null), so only JSON-shaped results belong here; ``encode``/``decode`` convert other
+    values (e.g. dataclasses) to and from JSON-compatible data. Nothing is unpickled, so a
+    file planted in the shared directory cannot execute code. Entries are written to a
+    temporary file and moved into place with `os.replace`, so a reader in another process
+    sees either the previous value or the new one, never a partial file. Each entry carries
+    its wall-clock expiry; hits refresh the file mtime and `prune` drops the least recently
+    used files beyond ``max_entries``. Hit/miss counters are per process, ``size`` is that
+    of the shared directory.
+    """
+
+    backend = "file"
+
+    def __init__(
+        self,
+        directory: Path | str,
+        max_entries: int,
+        ttl: float,
+        encode: Callable[[Any], Any] | None = None,
+        decode: Callable[[Any], Any] | None = None,
+    ) -> None:
+        super().__init__(max_entries, ttl)
+        self.directory = Path(directory)
+        self.encode = encode
+        self.decode = decode
+        self._writes = 0
+
+    def _path(self, key: Hashable) -> Path:
+        digest = hashlib.sha256(repr(key).encode()).hexdigest()
+        return self.directory / f"{digest}.json"
+
+    def _files(self) -> list[Path]:
+        try:
+            return [path for path in self.directory.iterdir() if path.suffix == ".json"]
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def _unlink(path: Path) -> None:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _read(self, path: Path) -> dict[str, Any] | None:
+        try:
+            entry = orjson.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, orjson.JSONDecodeError):
+            # Unreadable or partially written by a crashed process: treat as a miss.
+            self._unlink(path)
+            return None
+        if not isinstance(entry, dict) or not {"key", "expires_at", "value"} <= entry.keys():
+            self._unlink(path)
+            return None
+        return entry
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        key = self._scoped(key)
+        path = self._path(key)
+        entry = self._read(path)
+        if entry is not None and entry["expires_at"] <= time.time():
+            self._unlink(path)
+            self._count("expirations")
+            entry = None
+        if entry is None or entry["key"] != repr(key):
+            self._count("misses")
+            return default
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        self._count("hits")
+        value = entry["value"]
+        return self.decode(value) if self.decode is not None else value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.max_entries == 0:
+            return
+        key = self._scoped(key)
+        entry = {
+            "key": repr(key),
+            "expires_at": time.time() + self.ttl,
+            "value": self.encode(value) if self.encode is not None else value,
+        }
+        payload = orjson.dumps(entry, default=_json_default, option=FILE_CACHE_JSON_OPTIONS)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_name(f".{path.stem}.{uuid.uuid4().hex}.tmp")
+        try:
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, path)
+        finally:
+            self._unlink(tmp_path)
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % FILE_CACHE_PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def prune(self) -> None:
+        """Delete expired entries, then the least recently used ones beyond ``max_entries``."""
+        now = time.time()
+        entries = []
+        for path in self._files():
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        entries.sort()
+        excess = len(entries) - self.max_entries
+        evicted = 0
+        for mtime, path in entries:
+            if evicted < excess or mtime + self.ttl <= now:
+                self._unlink(path)
+                evicted += 1
+        if evicted:
+            self._count("evictions", evicted)
+
+    def clear(self) -> None:
+        for path in self._files():
+            self._unlink(path)
+        self._count("invalidations")
+
+    def __len__(self) -> int:
+        return len(self._files())
+
+
+def _json_default(value: Any) -> Any:
+    """orjson fallback for values found in cached rows (object arrays, Timestamp, NaT, NA, Decimal)."""
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} tidak dapat disimpan di cache file")
+
+
+_CACHES: dict[str, CacheBackend] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def create_cache(
+    name: str,
+    max_entries: int,
+    ttl: float,
+    backend: str | None = None,
+    encode: Callable[[Any], Any] | None = None,
+    decode: Callable[[Any], Any] | None = None,
+) -> CacheBackend:
+    """
+    Build the cache ``name`` on the configured backend and register it for `cache_stats`.
+
+    ``API_CACHE_BACKEND=memory`` (default) keeps one copy per worker process;
+    ``API_CACHE_BACKEND=file`` stores entries as JSON under ``API_CACHE_DIR/<name>`` so every
+    gunicorn worker on the host reuses what another one computed. ``encode``/``decode``
+    turn values that are not plain JSON (dataclasses, Series) into JSON data and back; the
+    memory backend keeps values as they are.
+    """
+    backend = (backend or CACHE_BACKEND).strip().lower()
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(f"API_CACHE_BACKEND harus salah satu dari: {', '.join(CACHE_BACKENDS)}")
+    if backend == "file":
+        cache: CacheBackend = FileCache(Path(CACHE_DIRNAME) / name, max_entries, ttl, encode=encode, decode=decode)
+    else:
+        cache = TTLCache(max_entries, ttl)
+    with _CACHES_LOCK:
+        _CACHES[name] = cache
+    return cache
+
+
+def cache_stats() -> dict[str, dict[str, Any]]:
+    """Stats of every cache built with `create_cache`, keyed by name."""
+    with _CACHES_LOCK:
+        caches = dict(_CACHES)
+    return {name: cache.stats() for name, cache in sorted(caches.items())}
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable digest of ``parts`` (e.g. a normalized filter dict), identical in every process."""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
@@ -9,7 +9,7 @@ from . import audit_copilot
 from .audit_copilot import FLAG_DESCRIPTIONS
 from .chat_history import list_chat_messages
 from . import risk_scoring
-from ml.common.data_access import DataLoader
+from ml.common.data_access import get_data_loader
 from . import reports
 
 try:
@@ -42,12 +42,12 @@ def _build_context_text(row: pd.Series) -> str:
     los = row.get("los")
     los_text = f"LOS {int(los)} hari" if pd.notna(los) else "LOS tidak tercatat"
 
-    amount_claimed = audit_copilot._format_currency(row.get("amount_claimed"))  # type: ignore[attr-defined]
-    amount_paid = audit_copilot._format_currency(row.get("amount_paid"))  # type: ignore[attr-defined]
-    amount_gap = audit_copilot._format_currency(row.get("amount_gap"))  # type: ignore[attr-defined]
+    amount_claimed = audit_copilot._format_currency(row.get("amount_claimed"))
+    amount_paid = audit_copilot._format_currency(row.get("amount_paid"))
+    amount_gap = audit_copilot._format_currency(row.get("amount_gap"))
 
     peer_key = row.get("peer_key") or "-"
-    peer_p90 = audit_copilot._format_currency(row.get("peer_p90"))  # type: ignore[attr-defined]
+    peer_p90 = audit_copilot._format_currency(row.get("peer_p90"))
     cost_zscore = row.get("cost_zscore")
     peer_text = (
         f"P90 {peer_p90} dengan z-score {cost_zscore:.2f}" if peer_p90 and pd.notna(cost_zscore) else "statistik peer tidak lengkap"
@@ -58,7 +58,7 @@ def _build_context_text(row: pd.Series) -> str:
     risk_score_or_zero = risk_score if risk_score is not None else 0
     rule_score = row.get("rule_score")
     ml_score = row.get("ml_score_normalized")
-    flags = audit_copilot._hydrate_flags(row)  # type: ignore[attr-defined]
+    flags = audit_copilot._hydrate_flags(row)
     flag_desc = "; ".join(FLAG_DESCRIPTIONS.get(flag, flag) for flag in flags) or "Tidak ada flag rules aktif."
 
     return (
@@ -69,17 +69,23 @@ def _build_context_text(row: pd.Series) -> str:
     )
 
 
+def _claim_data(claim_id: str) -> pd.Series | None:
+    """Enriched claim row from the shared claim context cache, or None when unknown."""
+    try:
+        return audit_copilot._load_claim_context(claim_id).data
+    except audit_copilot.ClaimNotFound:
+        return None
+
+
 @tool
 def peer_detail_tool(claim_id: str) -> str:
     """Ambil statistik peer (mean/p90/z-score) untuk klaim tertentu."""
     try:
-        loader = DataLoader()
-        df = loader.load_claims_normalized(filters={"claim_id": claim_id})
+        row = _claim_data(claim_id)
     except Exception as exc:  # pragma: no cover - data failure
         return f"Gagal mengambil data peer: {exc}"
-    if df.empty:
+    if row is None:
         return "Tidak menemukan data peer untuk claim tersebut."
-    row = df.iloc[0]
     peer_key = row.get("peer_key") or "-"
     def _to_float(val):
         try:
@@ -103,20 +109,22 @@ def peer_detail_tool(claim_id: str) -> str:
 @tool
 def flag_explainer_tool(claim_id: str) -> str:
     """Jelaskan flag rules aktif + statistik pendek untuk claim tertentu."""
-    loader = DataLoader()
-    df = loader.load_claims_normalized(filters={"claim_id": claim_id})
-    if df.empty:
+    loader = get_data_loader()
+    row = _claim_data(claim_id)
+    if row is None:
         return "Tidak menemukan klaim untuk menjelaskan flag."
-    row = df.iloc[0]
-    flags = risk_scoring._compute_flag_columns(row.to_frame().T)["flags"].iloc[0]  # type: ignore[attr-defined]
-    flags = flags or []
+    flags = audit_copilot._hydrate_flags(row)
     if not flags:
         return "Klaim ini tidak memiliki flag rules aktif."
     explanations = []
+    if not loader.table_exists(risk_scoring.RISK_RANKED_TABLE):
+        # Flag frequencies come from the ranked table, built by the first scores refresh.
+        explanations = [f"{flag}: {FLAG_DESCRIPTIONS.get(flag, flag.replace('_', ' '))}" for flag in flags]
+        return "; ".join(explanations) + " (statistik frekuensi flag belum tersedia)"
     for flag in flags:
         desc = FLAG_DESCRIPTIONS.get(flag, flag.replace("_", " "))
         count_df = loader.query(
-            f"SELECT COUNT(*) AS cnt FROM {risk_scoring.SCORES_CACHE_TABLE} WHERE ARRAY_CONTAINS(flags, ?)",
+            f"SELECT COUNT(*) AS cnt FROM {risk_scoring.RISK_RANKED_TABLE} WHERE ARRAY_CONTAINS(flags, ?)",
             params=[flag],
         )
         cnt = int(count_df["cnt"].iloc[0]) if not count_df.empty else 0
@@ -127,11 +135,9 @@ def flag_explainer_tool(claim_id: str) -> str:
 @tool
 def tariff_insight_tool(claim_id: str) -> str:
     """Berikan ringkasan gap tarif fasilitas/dx terkait klaim."""
-    loader = DataLoader()
-    df = loader.load_claims_normalized(filters={"claim_id": claim_id})
-    if df.empty:
+    row = _claim_data(claim_id)
+    if row is None:
         return "Klaim tidak ditemukan untuk analisis tarif."
-    row = df.iloc[0]
     facility_id = row.get("facility_id")
     province = row.get("province_name")
     dx_group = row.get("dx_primary_group")
@@ -168,7 +174,7 @@ def tariff_insight_tool(claim_id: str) -> str:
 def _build_llm():
     if ChatOpenAI is None:
         return None
-    cfg = audit_copilot._get_llm_config()  # type: ignore[attr-defined]
+    cfg = audit_copilot._get_llm_config()
     if not cfg:
         return None
     llm = ChatOpenAI(
@@ -186,7 +192,7 @@ def generate_chat_reply(
     history: list[dict[str, Any]] | None = None,
 ) -> tuple[str, dict[str, Any]]:
     """Generate LLM-based reply with claim context + history."""
-    context = audit_copilot._load_claim_context(claim_id)  # type: ignore[attr-defined]
+    context = audit_copilot._load_claim_context(claim_id)
     row = context.data
     context_text = _build_context_text(row)
     history = history or list_chat_messages(claim_id)
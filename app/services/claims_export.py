@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from ml.common.data_access import DataLoader, get_data_loader, read_connection
+from ml.inference.scorer import load_model_version
+
+from . import risk_scoring
+
+EXPORT_BATCH_ROWS = int(os.getenv("CLAIMS_EXPORT_BATCH_ROWS", "50000"))
+# Where results are spooled before streaming (default: the system temp directory).
+EXPORT_SPOOL_DIR = os.getenv("CLAIMS_EXPORT_SPOOL_DIR") or None
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+EXPORT_COLUMNS = [
+    "claim_id",
+    "province_name",
+    "dx_primary_code",
+    "dx_primary_label",
+    "dx_primary_group",
+    "dx_secondary_codes",
+    "facility_id",
+    "facility_name",
+    "facility_class",
+    "severity_group",
+    "service_type",
+    "admit_dt",
+    "discharge_dt",
+    "los",
+    "amount_claimed",
+    "amount_paid",
+    "bpjs_payment_ratio",
+    "cost_zscore",
+    "peer_mean",
+    "peer_p90",
+    "flags",
+    "duplicate_pattern",
+    "rule_score",
+    "ml_score",
+    "ml_score_normalized",
+    "risk_score",
+    "model_version",
+]
+# CSV has no list type; these columns are joined with LIST_SEPARATOR instead.
+LIST_COLUMNS = {"dx_secondary_codes", "flags"}
+LIST_SEPARATOR = "|"
+# DOUBLE columns; NaN/Infinity are exported as null so NDJSON stays valid JSON.
+FLOAT_COLUMNS = {
+    "amount_claimed",
+    "amount_paid",
+    "bpjs_payment_ratio",
+    "cost_zscore",
+    "peer_mean",
+    "peer_p90",
+    "rule_score",
+    "ml_score",
+    "ml_score_normalized",
+    "risk_score",
+}
+
+
+# Types used when an optional claims_normalized column is absent (exported as NULL).
+COLUMN_TYPES = {
+    **{column: "VARCHAR[]" for column in LIST_COLUMNS},
+    **{column: "DOUBLE" for column in FLOAT_COLUMNS},
+    "admit_dt": "DATE",
+    "discharge_dt": "DATE",
+    "los": "BIGINT",
+    "duplicate_pattern": "BOOLEAN",
+}
+# Produced by the ranking itself, whatever columns the claims table has.
+RANKED_COLUMNS = {"flags", "rule_score", "ml_score", "ml_score_normalized", "risk_score", "model_version"}
+
+
+class InvalidExportFormat(ValueError):
+    """Raised when the requested export format is not supported."""
+
+
+@dataclass
+class ClaimsExport:
+    chunks: Iterator[bytes]
+    mimetype: str
+    filename: str
+    snapshot: str | None
+    model_version: str
+    ruleset_version: str
+
+
+def export_high_risk_claims(filters: Mapping[str, Any], export_format: str | None = None) -> ClaimsExport:
+    """
+    Stream every claim matching the /claims/high-risk filters, in ranking order.
+
+    The result is first spooled to a temporary Parquet file, so the pooled read-only cursor
+    is returned before the download starts and a slow client never holds off a writer. The
+    file is then read back as Arrow record batches of EXPORT_BATCH_ROWS and encoded batch
+    by batch, so memory stays flat regardless of the result size and no MAX_FETCH_ROWS cap
+    applies.
+    """
+    export_format = (export_format or "ndjson").strip().lower()
+    if export_format not in EXPORT_FORMATS:
+        raise InvalidExportFormat(f"format harus salah satu dari: {', '.join(EXPORT_FORMATS)}")
+
+    loader = get_data_loader()
+    model_version = load_model_version()
+    ruleset_version = risk_scoring._get_ruleset_version()
+    snapshot = risk_scoring._ranked_snapshot(loader, model_version, ruleset_version)
+    if snapshot.is_current:
+        scores_relation = risk_scoring.SCORES_CACHE_TABLE
+    else:
+        scores_relation = risk_scoring._resolve_scores_relation(loader)
+
+    sql, params = risk_scoring._filtered_ranked_sql(
+        loader,
+        scores_relation,
+        filters,
+        use_ranked_table=snapshot.is_current,
+        select_sql=_select_columns(export_format, _available_columns(loader)),
+    )
+    batches = _record_batches(_spool_to_parquet(loader, sql, params))
+    encoders = {"ndjson": _ndjson_chunks, "csv": _csv_chunks, "parquet": _parquet_chunks}
+
+    stamp = snapshot.run_id or datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    return ClaimsExport(
+        chunks=encoders[export_format](batches),
+        mimetype=EXPORT_FORMATS[export_format],
+        filename=f"claims_high_risk_{stamp}.{export_format}",
+        snapshot=snapshot.run_id,
+        model_version=model_version,
+        ruleset_version=ruleset_version,
+    )
+
+
+def _available_columns(loader: DataLoader) -> set[str]:
+    columns = loader.query(
+        "SELECT column_name FROM information_schema.columns WHERE table_schema = 'main' AND table_name = ?",
+        [loader.table_name],
+    )
+    return set(columns["column_name"]) | RANKED_COLUMNS
+
+
+def _select_columns(export_format: str, available: set[str]) -> str:
+    expressions = {}
+    for column in EXPORT_COLUMNS:
+        if export_format == "csv" and column in LIST_COLUMNS:
+            expression = (
+                f"ARRAY_TO_STRING({column}, '{LIST_SEPARATOR}')" if column in available else "CAST(NULL AS VARCHAR)"
+            )
+        elif column not in available:
+            expression = f"CAST(NULL AS {COLUMN_TYPES.get(column, 'VARCHAR')})"
+        elif export_format == "ndjson" and column in FLOAT_COLUMNS:
+            expression = f"CASE WHEN isfinite({column}) THEN {column} END"
+        else:
+            expression = column
+        expressions[column] = expression
+
+    if export_format == "ndjson":
+        # DuckDB renders each row as a JSON object, far cheaper than building Python dicts.
+        fields = ", ".join(f"{column} := {expression}" for column, expression in expressions.items())
+        return f"CAST(to_json(struct_pack({fields})) AS VARCHAR) AS row_json"
+    return ", ".join(f"{expression} AS {column}" for column, expression in expressions.items())
+
+
+def _spool_to_parquet(loader: DataLoader, sql: str, params: list[Any]) -> pq.ParquetFile:
+    """Run the export query into a temporary Parquet file and return it opened for reading."""
+    fd, path = tempfile.mkstemp(prefix="claims_export_", suffix=".parquet", dir=EXPORT_SPOOL_DIR)
+    os.close(fd)
+    try:
+        escaped = path.replace("'", "''")
+        with read_connection(loader.duckdb_path) as con:
+            con.execute(f"COPY ({sql}) TO '{escaped}' (FORMAT PARQUET)", params)
+        return pq.ParquetFile(open(path, "rb"))
+    finally:
+        # The open handle keeps the data readable; the file is gone once the stream closes it.
+        os.unlink(path)
+
+
+def _record_batches(spooled: pq.ParquetFile) -> Iterator[pa.RecordBatch]:
+    try:
+        empty = True
+        for batch in spooled.iter_batches(batch_size=EXPORT_BATCH_ROWS):
+            empty = False
+            yield batch
+        if empty:
+            # Still emit the schema so CSV gets its header and Parquet a valid footer.
+            yield pa.RecordBatch.from_pylist([], schema=spooled.schema_arrow)
+    finally:
+        spooled.close()
+
+
+def _ndjson_chunks(batches: Iterator[pa.RecordBatch]) -> Iterator[bytes]:
+    for batch in batches:
+        rows = batch.column(0).to_pylist()
+        yield "".join(f"{row}\n" for row in rows).encode()
+
+
+def _csv_chunks(batches: Iterator[pa.RecordBatch]) -> Iterator[bytes]:
+    header = True
+    for batch in batches:
+        sink = pa.BufferOutputStream()
+        pa_csv.write_csv(batch, sink, write_options=pa_csv.WriteOptions(include_header=header))
+        header = False
+        yield sink.getvalue().to_pybytes()
+
+
+class _ChunkSink:
+    """Write-only file object collecting what ParquetWriter emits between batches."""
+
+    def __init__(self) -> None:
+        self.parts: list[bytes] = []
+        self.closed = False
+        self._position = 0
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self.parts.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts.clear()
+        return data
+
+
+def _parquet_chunks(batches: Iterator[pa.RecordBatch]) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    writer: pq.ParquetWriter | None = None
+    for batch in batches:
+        if writer is None:
+            writer = pq.ParquetWriter(sink, batch.schema)
+        # One row group per batch; the bytes written so far can be sent right away.
+        writer.write_batch(batch)
+        yield sink.drain()
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from ml.common.data_access import DataLoader, get_data_loader
+
+logger = logging.getLogger(__name__)
+
+REFRESH_JOB_DIRNAME = os.getenv("REFRESH_JOB_DIR", os.path.join("instance", "jobs", "refresh"))
+REFRESH_JOB_TIMEOUT_SECONDS = int(os.getenv("REFRESH_JOB_TIMEOUT", "3600"))
+# How long the refresh process waits for the DuckDB write lock (e.g. while an ETL run holds it).
+REFRESH_JOB_LOCK_WAIT_SECONDS = os.getenv("REFRESH_JOB_LOCK_WAIT", "600")
+REFRESH_MODULE = "ml.pipelines.refresh_ml_scores"
+ACTIVE_STATUSES = {"queued", "running"}
+LOG_TAIL_LINES = 20
+_JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class RefreshJobNotFound(Exception):
+    """Raised when a refresh job id is unknown."""
+
+
+@dataclass
+class RefreshJob:
+    id: str
+    status: str
+    full: bool = False
+    recalibrate: bool = False
+    created_at: str = field(default_factory=lambda: _utcnow())
+    started_at: str | None = None
+    finished_at: str | None = None
+    returncode: int | None = None
+    error: str | None = None
+    log_tail: list[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _utcnow() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class RefreshJobQueue:
+    """
+    Run ML score refreshes outside the request path.
+
+    Jobs execute one at a time on a background thread, each as a separate
+    `python -m ml.pipelines.refresh_ml_scores` process: the web process only ever holds
+    read-only DuckDB connections, and the refresh takes the write lock in its own process
+    after its write-intent marker has made the workers' pools let go of the file. Job state is written to one JSON file per job so any
+    web worker can answer status polls, not just the one that accepted the job.
+    """
+
+    def __init__(self, job_dir: Path | str = REFRESH_JOB_DIRNAME, timeout: int = REFRESH_JOB_TIMEOUT_SECONDS) -> None:
+        self.job_dir = Path(job_dir)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="refresh-job")
+        self._lock = threading.Lock()
+        self._active: RefreshJob | None = None
+
+    def submit(self, loader: DataLoader | None = None, full: bool = False, recalibrate: bool = False) -> RefreshJob:
+        """Queue a refresh, or return the job already queued/running in this process."""
+        loader = loader or get_data_loader()
+        with self._lock:
+            if self._active is not None and self._active.status in ACTIVE_STATUSES:
+                return self._active
+            job = RefreshJob(id=uuid.uuid4().hex, status="queued", full=full, recalibrate=recalibrate)
+            self._save(job)
+            self._active = job
+        self._executor.submit(self._run, job, self._command(loader, job), self._environment(loader))
+        return job
+
+    def get(self, job_id: str) -> RefreshJob:
+        if not _JOB_ID_PATTERN.match(job_id or ""):
+            raise RefreshJobNotFound(f"Job refresh {job_id} tidak ditemukan")
+        path = self._path(job_id)
+        try:
+            payload = json.loads(path.read_text())
+        except FileNotFoundError:
+            raise RefreshJobNotFound(f"Job refresh {job_id} tidak ditemukan") from None
+        return RefreshJob(**payload)
+
+    def _command(self, loader: DataLoader, job: RefreshJob) -> list[str]:
+        command = [sys.executable, "-m", REFRESH_MODULE, "--config", str(loader.config_path)]
+        if job.full:
+            command.append("--full")
+        if job.recalibrate:
+            command.append("--recalibrate")
+        return command
+
+    @staticmethod
+    def _environment(loader: DataLoader) -> dict[str, str]:
+        env = dict(os.environ)
+        if loader.duckdb_path:
+            env["DUCKDB_PATH"] = str(loader.duckdb_path)
+        env.setdefault("DUCKDB_WRITE_LOCK_TIMEOUT", REFRESH_JOB_LOCK_WAIT_SECONDS)
+        return env
+
+    def _run(self, job: RefreshJob, command: list[str], env: dict[str, str]) -> None:
+        job.status = "running"
+        job.started_at = _utcnow()
+        self._save(job)
+        try:
+            completed = subprocess.run(
+                command,
+                env=env,
+                capture_output=True,
+                text=True,
+                timeout=self.timeout,
+                check=False,
+            )
+        except subprocess.TimeoutExpired:
+            job.status = "failed"
+            job.error = f"Refresh melebihi batas waktu {self.timeout} detik"
+        except OSError as exc:
+            job.status = "failed"
+            job.error = str(exc)
+        else:
+            job.returncode = completed.returncode
+            output = (completed.stdout or "") + (completed.stderr or "")
+            job.log_tail = output.strip().splitlines()[-LOG_TAIL_LINES:]
+            if completed.returncode == 0:
+                job.status = "succeeded"
+            else:
+                job.status = "failed"
+                job.error = job.log_tail[-1] if job.log_tail else f"exit code {completed.returncode}"
+        job.finished_at = _utcnow()
+        if job.status == "failed":
+            logger.warning("Refresh job %s failed: %s", job.id, job.error)
+        self._save(job)
+
+    def _path(self, job_id: str) -> Path:
+        return self.job_dir / f"{job_id}.json"
+
+    def _save(self, job: RefreshJob) -> None:
+        self.job_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(job.id)
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(job.to_dict(), indent=2))
+        tmp_path.replace(path)
+
+
+_QUEUE: RefreshJobQueue | None = None
+_QUEUE_LOCK = threading.Lock()
+
+
+def get_refresh_job_queue() -> RefreshJobQueue:
+    global _QUEUE
+    with _QUEUE_LOCK:
+        if _QUEUE is None:
+            _QUEUE = RefreshJobQueue()
+        return _QUEUE
+
+
+def submit_refresh_job(full: bool = False, recalibrate: bool = False) -> RefreshJob:
+    return get_refresh_job_queue().submit(full=full, recalibrate=recalibrate)
+
+
+def get_refresh_job(job_id: str) -> RefreshJob:
+    return get_refresh_job_queue().get(job_id)
@@ -1,14 +1,50 @@
 from __future__ import annotations
 
+import base64
+import binascii
+import json
 import math
+import os
 from typing import Any
 
-from ml.common.data_access import DataLoader
+from ml.common.data_access import DataLoader, get_data_loader
+from ml.common.schema import canonical_service_type
+
+from .cache import cache_key, create_cache
+from .risk_scoring import InvalidCursor, StaleCursor
+
+REPORT_CACHE_SIZE = int(os.getenv("REPORT_CACHE_SIZE", "256"))
+REPORT_CACHE_TTL_SECONDS = float(os.getenv("REPORT_CACHE_TTL", "600"))
+_REPORT_CACHE = create_cache("reports", REPORT_CACHE_SIZE, REPORT_CACHE_TTL_SECONDS)
+
+DUPLICATE_PAIRS_TABLE = "claim_duplicate_pairs"
+# Keyset predicate selecting pairs strictly after (gap_days, claim_id_a, claim_id_b).
+DUPLICATE_PAIRS_SEEK_SQL = """(
+    gap_days > ?
+    OR (gap_days = ? AND claim_id_a > ?)
+    OR (gap_days = ? AND claim_id_a = ? AND claim_id_b > ?)
+)"""
+
+
+class DuplicatePairsUnavailable(Exception):
+    """Raised when the ETL has not built claim_duplicate_pairs yet."""
+
+
+def _cached_report(loader: DataLoader, name: str, params: dict[str, Any], build) -> list[dict[str, Any]]:
+    """Report rows keyed by report name, normalized parameters and the DuckDB data version."""
+    key = cache_key(name, params, loader.data_version())
+    return _REPORT_CACHE.get_or_set(key, build)
 
 
 def get_severity_mismatch(limit: int = 200) -> list[dict[str, Any]]:
     """Return severity mismatch claims (severity ringan with costs above peer P90)."""
-    loader = DataLoader()
+    loader = get_data_loader()
+    return _cached_report(
+        loader, "severity_mismatch", {"limit": limit}, lambda: _query_severity_mismatch(loader, limit)
+    )
+
+
+def _query_severity_mismatch(loader: DataLoader, limit: int) -> list[dict[str, Any]]:
     sql = """
         SELECT
             claim_id,
@@ -37,40 +73,121 @@ def get_severity_mismatch(limit: int = 200) -> list[dict[str, Any]]:
     return df.to_dict(orient="records")
 
 
-def get_duplicate_claims(limit: int = 200) -> list[dict[str, Any]]:
-    """Return potential duplicate claims (<=3 day gap, same patient + dx/procedure)."""
-    loader = DataLoader()
-    sql = """
-        WITH candidate_pairs AS (
-            SELECT
-                LEAST(a.claim_id, b.claim_id) AS claim_id_a,
-                GREATEST(a.claim_id, b.claim_id) AS claim_id_b,
-                a.dx_primary_code,
-                a.procedure_code,
-                ABS(DATE_DIFF('day', a.admit_dt, b.admit_dt)) AS episode_gap_days
-            FROM claims_normalized a
-            JOIN claims_normalized b
-              ON a.patient_key = b.patient_key
-             AND a.claim_id < b.claim_id
-             AND COALESCE(a.dx_primary_code, '') = COALESCE(b.dx_primary_code, '')
-             AND COALESCE(a.procedure_code, '') = COALESCE(b.procedure_code, '')
-             AND a.patient_key IS NOT NULL
-             AND ABS(DATE_DIFF('day', a.admit_dt, b.admit_dt)) <= 3
+def get_duplicate_claims(
+    limit: int = 200,
+    *,
+    cursor: str | None = None,
+    province: str | None = None,
+    facility_id: str | None = None,
+) -> dict[str, Any]:
+    """
+    Page through potential duplicate claims (<=3 day gap, same patient + dx/procedure).
+
+    Pairs are precomputed by the ETL in claim_duplicate_pairs, stored in report order
+    (gap_days, claim_id_a, claim_id_b); ``cursor`` continues after the last pair of the
+    previous page with a keyset seek. Cursors carry the run_id of the ETL run that built
+    the pairs and raise `StaleCursor` once a newer run replaced them. ``facility_id``
+    matches either claim of the pair.
+    """
+    loader = get_data_loader()
+    snapshot = _latest_etl_run_id(loader)
+    after_key = _decode_pairs_cursor(cursor, snapshot) if cursor else None
+    filters = {
+        "province": province.strip().upper() if province else None,
+        "facility_id": facility_id or None,
+    }
+    rows = _cached_report(
+        loader,
+        "duplicate_claims",
+        {"limit": limit, "after": after_key, **filters},
+        lambda: _query_duplicate_pairs(loader, limit, after_key, **filters),
+    )
+    next_cursor = _encode_pairs_cursor(rows[-1], snapshot) if len(rows) == limit else None
+    return {"data": rows, "next_cursor": next_cursor}
+
+
+def _province_filter(loader: DataLoader, province: str) -> tuple[str, list[Any]]:
+    """WHERE clause for a province filter; `UNKNOWN` selects claims without a province, as reports label them."""
+    if province == "UNKNOWN":
+        return "province_name IS NULL", []
+    return loader.equals_sql("province_name"), [province]
+
+
+def _query_duplicate_pairs(
+    loader: DataLoader,
+    limit: int,
+    after_key: tuple[int, str, str] | None,
+    *,
+    province: str | None,
+    facility_id: str | None,
+) -> list[dict[str, Any]]:
+    if not loader.table_exists(DUPLICATE_PAIRS_TABLE):
+        raise DuplicatePairsUnavailable(
+            f"Tabel {DUPLICATE_PAIRS_TABLE} belum tersedia; jalankan ulang ETL claims_normalized."
         )
+    where_clauses: list[str] = []
+    params: list[Any] = []
+    if after_key is not None:
+        gap_days, claim_id_a, claim_id_b = after_key
+        where_clauses.append(DUPLICATE_PAIRS_SEEK_SQL)
+        params.extend([gap_days, gap_days, claim_id_a, gap_days, claim_id_a, claim_id_b])
+    if province:
+        clause, province_params = _province_filter(loader, province)
+        where_clauses.append(clause)
+        params.extend(province_params)
+    if facility_id:
+        where_clauses.append("(facility_id_a = ? OR facility_id_b = ?)")
+        params.extend([facility_id, facility_id])
+    where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+
+    sql = f"""
         SELECT
             claim_id_a AS claim_id,
             claim_id_b AS matched_claim_id,
             dx_primary_code AS dx_primary,
             procedure_code,
-            episode_gap_days
-        FROM candidate_pairs
-        ORDER BY episode_gap_days ASC, claim_id_a
+            gap_days AS episode_gap_days,
+            province_name,
+            facility_id_a AS facility_id,
+            facility_id_b AS matched_facility_id
+        FROM {DUPLICATE_PAIRS_TABLE}
+        {where_sql}
+        ORDER BY gap_days, claim_id_a, claim_id_b
         LIMIT ?
     """
-    df = loader.query(sql, params=[limit])
+    params.append(limit)
+    df = loader.query(sql, params=params)
     return df.to_dict(orient="records")
 
 
+def _latest_etl_run_id(loader: DataLoader) -> str | None:
+    """run_id of the latest ETL run, i.e. the one that built claim_duplicate_pairs."""
+    if not loader.table_exists("etl_runs"):
+        return None
+    df = loader.query("SELECT run_id FROM etl_runs ORDER BY executed_at DESC LIMIT 1")
+    return None if df.empty else str(df["run_id"].iloc[0])
+
+
+def _encode_pairs_cursor(row: dict[str, Any], snapshot: str | None) -> str:
+    payload = {"k": [int(row["episode_gap_days"]), str(row["claim_id"]), str(row["matched_claim_id"])], "s": snapshot}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_pairs_cursor(cursor: str, snapshot: str | None) -> tuple[int, str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        gap_days, claim_id_a, claim_id_b = payload["k"]
+        key = (int(gap_days), str(claim_id_a), str(claim_id_b))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError) as exc:
+        raise InvalidCursor("cursor tidak valid") from exc
+
+    if payload.get("s") != snapshot:
+        raise StaleCursor("Data ETL sudah diperbarui; mulai ulang dari halaman pertama.")
+    return key
+
+
 def get_tariff_insight(
     *,
     limit: int = 100,
@@ -85,26 +202,53 @@ def get_tariff_insight(
 
     Returns rows sorted by total gap (claimed - paid) descending.
     """
-    loader = DataLoader()
+    loader = get_data_loader()
+    # Values are canonicalised here so the stored (ENUM) columns are compared directly
+    # and equivalent requests share one cache entry.
+    filters = {
+        "province": province.strip().upper() if province else None,
+        "facility_id": facility_id or None,
+        "severity": severity.strip().lower() if severity else None,
+        "service_type": canonical_service_type(service_type) if service_type else None,
+        "dx_group": dx_group or None,
+    }
+    return _cached_report(
+        loader,
+        "tariff_insight",
+        {"limit": limit, **filters},
+        lambda: _query_tariff_insight(loader, limit, **filters),
+    )
+
 
+def _query_tariff_insight(
+    loader: DataLoader,
+    limit: int,
+    *,
+    province: str | None,
+    facility_id: str | None,
+    severity: str | None,
+    service_type: str | None,
+    dx_group: str | None,
+) -> list[dict[str, Any]]:
     where_clauses: list[str] = []
     params: list[Any] = []
 
     if province:
-        where_clauses.append("COALESCE(province_name, 'UNKNOWN') = ?")
-        params.append(province.upper())
+        clause, province_params = _province_filter(loader, province)
+        where_clauses.append(clause)
+        params.extend(province_params)
 
     if facility_id:
         where_clauses.append("facility_id = ?")
         params.append(facility_id)
 
     if severity:
-        where_clauses.append("LOWER(severity_group) = ?")
-        params.append(severity.lower())
+        where_clauses.append(loader.equals_sql("severity_group"))
+        params.append(severity)
 
     if service_type:
-        where_clauses.append("UPPER(service_type) = ?")
-        params.append(service_type.upper())
+        where_clauses.append(loader.equals_sql("service_type"))
+        params.append(service_type)
 
     if dx_group:
         where_clauses.append("dx_primary_group = ?")
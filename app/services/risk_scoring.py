@@ -1,119 +1,367 @@
 from __future__ import annotations
 
+import base64
+import binascii
 from collections.abc import Mapping
+from dataclasses import asdict, dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 import os
 
 import json
+import duckdb
 import numpy as np
 import pandas as pd
 from flask import current_app
 
-from ml.common.data_access import DataLoader
-from ml.inference.scorer import MLScorer
+from ml.common.data_access import DataLoader, get_data_loader
+from ml.common.schema import canonical_service_type
+from ml.inference.registry import get_scorer
 from ..models import AuditOutcome
+from .cache import cache_key, create_cache
+from .refresh_jobs import submit_refresh_job
 
 DEFAULT_PAGE_SIZE = 50
 SCORES_CACHE_FILENAME = "claims_ml_scores.parquet"
 SCORES_CACHE_TABLE = "claims_ml_scores"
+RISK_RANKED_TABLE = "claims_risk_ranked"
+EMPTY_SCORES_RELATION = (
+    "(SELECT NULL::VARCHAR AS claim_id, NULL::DOUBLE AS ml_score, "
+    "NULL::DOUBLE AS ml_score_normalized, NULL::VARCHAR AS model_version WHERE FALSE)"
+)
+RISK_RANKED_FILENAME = "claims_risk_ranked.parquet"
 QC_LOG_DIRNAME = "instance/logs"
 QC_TOP_K = 50
+QC_TOP_RECORD_COLUMNS = [
+    "claim_id",
+    "province_name",
+    "severity_group",
+    "risk_score",
+    "rule_score",
+    "ml_score_normalized",
+    "amount_claimed",
+    "los",
+    "duplicate_pattern",
+    "flags",
+]
 MAX_FETCH_ROWS = int(os.getenv("CLAIMS_MAX_QUERY_ROWS", "200000"))
+COUNT_MODES = {"exact", "estimate"}
+COUNT_CACHE_TTL_SECONDS = int(os.getenv("CLAIMS_COUNT_CACHE_TTL", "300"))
+COUNT_CACHE_MAX_ENTRIES = 1024
+HIGH_RISK_PAGE_CACHE_SIZE = int(os.getenv("HIGH_RISK_PAGE_CACHE_SIZE", "512"))
+HIGH_RISK_PAGE_CACHE_TTL_SECONDS = float(os.getenv("HIGH_RISK_PAGE_CACHE_TTL", "300"))
+
+# Totals per (snapshot, source, filter) used by count=estimate.
+_COUNT_CACHE = create_cache("high_risk_counts", COUNT_CACHE_MAX_ENTRIES, COUNT_CACHE_TTL_SECONDS)
+# Serialized /claims/high-risk pages (without latest_feedback, which lives in the app DB).
+_PAGE_CACHE = create_cache(
+    "high_risk_pages",
+    HIGH_RISK_PAGE_CACHE_SIZE,
+    HIGH_RISK_PAGE_CACHE_TTL_SECONDS,
+    encode=asdict,
+    decode=lambda data: HighRiskPage(**data),
+)
+
+RULE_FLAG_WEIGHTS = {
+    "short_stay_high_cost": 0.8,
+    "severity_mismatch": 0.7,
+    "high_cost_full_paid": 0.5,
+    "duplicate_pattern": 0.6,
+}
+# SQL equivalents of the rule flags computed in `_compute_rule_enrichment`
+# (duplicate_pattern is precomputed by the ETL).
+RULE_FLAG_SQL = {
+    "short_stay_high_cost": "(COALESCE(los, 0) <= 1 AND COALESCE(amount_claimed > peer_p90, FALSE))",
+    "severity_mismatch": "(COALESCE(severity_group = 'ringan', FALSE) AND COALESCE(amount_claimed > peer_p90, FALSE))",
+    "high_cost_full_paid": "(COALESCE(bpjs_payment_ratio, 0) >= 0.95 AND COALESCE(cost_zscore, 0) > 2)",
+}
+RANKING_ORDER_SQL = "has_flags DESC, flag_count DESC, risk_score DESC, claim_id"
+# Keyset predicate selecting rows strictly after (has_flags, flag_count, risk_score, claim_id)
+# in RANKING_ORDER_SQL order.
+CURSOR_SEEK_SQL = """(
+    has_flags < ?
+    OR (has_flags = ? AND flag_count < ?)
+    OR (has_flags = ? AND flag_count = ? AND risk_score < ?)
+    OR (has_flags = ? AND flag_count = ? AND risk_score = ? AND claim_id > ?)
+)"""
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+class StaleCursor(Exception):
+    """Raised when a cursor was issued for an older scores snapshot."""
+
+
+@dataclass(frozen=True)
+class HighRiskPage:
+    """One ranked result page as cached between requests."""
+
+    items: list[dict[str, Any]]
+    total: int
+    total_estimated: bool
+    next_cursor: str | None
+
+
+@dataclass(frozen=True)
+class RankedSnapshot:
+    """Latest scores refresh that materialised claims_risk_ranked."""
+
+    run_id: str | None
+    is_current: bool
 
 
 def get_high_risk_claims(filters: Mapping[str, Any]) -> dict[str, Any]:
-    loader = DataLoader()
-    scorer = MLScorer()
-
-    df, total_count = _fetch_filtered_claims(loader, filters)
-    if df.empty:
-        return _build_response([], total=0, page=1, page_size=_determine_page_size(filters), ruleset_version=_get_ruleset_version(), model_version=scorer.model_version)
-
-    scores_cache = _load_or_compute_scores(loader, scorer, force_refresh=_should_refresh_cache(filters))
-    scores_subset = scores_cache[scores_cache["claim_id"].isin(df["claim_id"])]
-    if scores_subset.empty:
-        # fallback: score subset if cache missing entries
-        scores_subset = scorer.score_dataframe(df)
-    df = df.merge(scores_subset, on="claim_id", how="left")
-    df = _compute_rule_enrichment(df)
-
-    df["risk_score"] = df[["rule_score", "ml_score_normalized"]].max(axis=1).fillna(0)
-    df = _apply_advanced_filters(df, filters)
-    df["flag_count"] = df["flags"].apply(lambda value: len(value) if isinstance(value, list) else 0)
-    df["has_flags"] = df["flag_count"] > 0
-    df = df.sort_values(
-        by=["has_flags", "flag_count", "risk_score"],
-        ascending=[False, False, False],
-    )
+    loader = get_data_loader()
+    scorer = get_scorer()
 
     page_size = _determine_page_size(filters)
     page = _determine_page(filters)
-    start = (page - 1) * page_size
-    end = start + page_size
-    paged_df = df.iloc[start:end].copy()
-    paged_df = paged_df.drop(columns=["flag_count", "has_flags"], errors="ignore")
-
     ruleset_version = _get_ruleset_version()
-
-    results: list[dict[str, Any]] = []
-    latest_feedback_map = _fetch_latest_feedback_map(paged_df["claim_id"].tolist())
-
-    for row in paged_df.itertuples(index=False):
-        results.append(
-            {
-                "claim_id": row.claim_id,
-                "province_name": row.province_name,
-                "dx_primary_code": row.dx_primary_code,
-                "dx_primary_label": getattr(row, "dx_primary_label", None),
-                "dx_primary_group": getattr(row, "dx_primary_group", None),
-                "dx_secondary_codes": _to_optional_list(getattr(row, "dx_secondary_codes", None)),
-                "dx_secondary_labels": _to_optional_list(getattr(row, "dx_secondary_labels", None)),
-                "facility_id": _to_optional_str(getattr(row, "facility_id", None)),
-                "facility_name": _to_optional_title(getattr(row, "facility_name", None)),
-                "facility_match_quality": _to_optional_str(getattr(row, "facility_match_quality", None)),
-                "facility_names_region": getattr(row, "region_facility_names", None),
-                "facility_ownership_names_region": getattr(row, "region_ownership_names", None),
-                "facility_type_names_region": getattr(row, "region_facility_type_names", None),
-                "facility_class_names_region": getattr(row, "region_facility_class_names", None),
-                "severity_group": row.severity_group,
-                "service_type": getattr(row, "service_type", None),
-                "facility_class": getattr(row, "facility_class", None),
-                "amount_claimed": _to_optional_float(row.amount_claimed),
-                "amount_paid": _to_optional_float(row.amount_paid),
-                "cost_zscore": _to_optional_float(row.cost_zscore),
-                "los": _to_optional_int(row.los),
-                "bpjs_payment_ratio": _to_optional_float(row.bpjs_payment_ratio),
-                "admit_dt": _to_optional_date(getattr(row, "admit_dt", None)),
-                "discharge_dt": _to_optional_date(getattr(row, "discharge_dt", None)),
-                "peer": {
-                    "mean": _to_optional_float(row.peer_mean),
-                    "p90": _to_optional_float(row.peer_p90),
-                },
-                "flags": row.flags,
-                "duplicate_pattern": bool(getattr(row, "duplicate_pattern", False)),
-                "rule_score": _to_optional_float(row.rule_score),
-                "ml_score": _to_optional_float(row.ml_score),
-                "ml_score_normalized": _to_optional_float(row.ml_score_normalized),
-                "risk_score": _to_optional_float(row.risk_score),
-                "model_version": row.model_version,
-                "ruleset_version": ruleset_version,
-                "latest_feedback": latest_feedback_map.get(row.claim_id),
-            }
+    # A requested refresh runs as a background job; this request serves the current snapshot.
+    refresh_job = submit_refresh_job() if _should_refresh_cache(filters) else None
+
+    snapshot = _ranked_snapshot(loader, scorer.model_version, ruleset_version)
+    use_ranked_table = snapshot.is_current
+    if use_ranked_table:
+        scores_relation = SCORES_CACHE_TABLE
+    else:
+        scores_relation = _resolve_scores_relation(loader)
+
+    cursor = filters.get("cursor")
+    after_key = None
+    if cursor:
+        after_key = _decode_cursor(cursor, snapshot.run_id)
+        page = None
+
+    count_mode = _determine_count_mode(filters)
+    count_key = _count_cache_key(loader, filters, snapshot.run_id, use_ranked_table)
+    page_key = cache_key(
+        "high_risk_page",
+        count_key,
+        loader.data_version(),
+        scorer.model_version,
+        ruleset_version,
+        page,
+        page_size,
+        cursor or None,
+        count_mode,
+    )
+    result_page = _PAGE_CACHE.get(page_key)
+    if result_page is None:
+        result_page = _load_high_risk_page(
+            loader,
+            scores_relation,
+            filters,
+            page=page,
+            page_size=page_size,
+            ruleset_version=ruleset_version,
+            snapshot=snapshot,
+            after_key=after_key,
+            count_key=count_key,
+            count_mode=count_mode,
         )
+        _PAGE_CACHE.set(page_key, result_page)
+
+    # Feedback is written through the app DB, so it is attached fresh to every response.
+    latest_feedback_map = _fetch_latest_feedback_map([item["claim_id"] for item in result_page.items])
+    results = [
+        {**item, "latest_feedback": latest_feedback_map.get(item["claim_id"])} for item in result_page.items
+    ]
 
     return _build_response(
         results,
-        total=total_count,
+        total=result_page.total,
         page=page,
         page_size=page_size,
         ruleset_version=ruleset_version,
         model_version=scorer.model_version,
+        snapshot=snapshot.run_id,
+        next_cursor=result_page.next_cursor,
+        total_estimated=result_page.total_estimated,
+        refresh_job=refresh_job.id if refresh_job else None,
     )
 
 
-def _fetch_filtered_claims(loader: DataLoader, filters: Mapping[str, Any]) -> tuple[pd.DataFrame, int]:
+def _load_high_risk_page(
+    loader: DataLoader,
+    scores_relation: str,
+    filters: Mapping[str, Any],
+    *,
+    page: int | None,
+    page_size: int,
+    ruleset_version: str,
+    snapshot: RankedSnapshot,
+    after_key: tuple[bool, int, float, str] | None,
+    count_key: str,
+    count_mode: str,
+) -> HighRiskPage:
+    known_total = _COUNT_CACHE.get(count_key) if count_mode == "estimate" else None
+    paged_df, total_count = _fetch_filtered_claims(
+        loader,
+        scores_relation,
+        filters,
+        page=page or 1,
+        page_size=page_size,
+        use_ranked_table=snapshot.is_current,
+        after_key=after_key,
+        known_total=known_total,
+    )
+    total_estimated = known_total is not None
+    if not total_estimated:
+        _COUNT_CACHE.set(count_key, total_count)
+    if paged_df.empty:
+        return HighRiskPage(items=[], total=total_count, total_estimated=total_estimated, next_cursor=None)
+    # Rows without cached scores keep the rule-based risk_score they were ordered by, so
+    # the page order and the cursor agree; scores appear after the next refresh.
+    next_cursor = _encode_cursor(paged_df.iloc[-1], snapshot.run_id) if len(paged_df) == page_size else None
+    items = _serialize_claims_page(paged_df, ruleset_version, {})
+    return HighRiskPage(items=items, total=total_count, total_estimated=total_estimated, next_cursor=next_cursor)
+
+
+def _serialize_claims_page(
+    paged_df: pd.DataFrame, ruleset_version: str, feedback_map: Mapping[str, Any]
+) -> list[dict[str, Any]]:
+    """
+    Turn a result page into API items, converting whole columns at once.
+
+    Nulls (None/NaN/NaT) become None, blank strings become None and dates are ISO formatted.
+    """
+    claim_ids = _json_column(paged_df, "claim_id")
+    columns: dict[str, list[Any]] = {
+        "claim_id": claim_ids,
+        "province_name": _json_column(paged_df, "province_name"),
+        "dx_primary_code": _json_column(paged_df, "dx_primary_code"),
+        "dx_primary_label": _json_column(paged_df, "dx_primary_label"),
+        "dx_primary_group": _json_column(paged_df, "dx_primary_group"),
+        "dx_secondary_codes": _list_column(paged_df, "dx_secondary_codes"),
+        "dx_secondary_labels": _list_column(paged_df, "dx_secondary_labels"),
+        "facility_id": _str_column(paged_df, "facility_id"),
+        "facility_name": _str_column(paged_df, "facility_name", title=True),
+        "facility_match_quality": _str_column(paged_df, "facility_match_quality"),
+        "facility_names_region": _json_column(paged_df, "region_facility_names"),
+        "facility_ownership_names_region": _json_column(paged_df, "region_ownership_names"),
+        "facility_type_names_region": _json_column(paged_df, "region_facility_type_names"),
+        "facility_class_names_region": _json_column(paged_df, "region_facility_class_names"),
+        "severity_group": _json_column(paged_df, "severity_group"),
+        "service_type": _json_column(paged_df, "service_type"),
+        "facility_class": _json_column(paged_df, "facility_class"),
+        "amount_claimed": _float_column(paged_df, "amount_claimed"),
+        "amount_paid": _float_column(paged_df, "amount_paid"),
+        "cost_zscore": _float_column(paged_df, "cost_zscore"),
+        "los": _int_column(paged_df, "los"),
+        "bpjs_payment_ratio": _float_column(paged_df, "bpjs_payment_ratio"),
+        "admit_dt": _date_column(paged_df, "admit_dt"),
+        "discharge_dt": _date_column(paged_df, "discharge_dt"),
+        "peer": [
+            {"mean": mean, "p90": p90}
+            for mean, p90 in zip(_float_column(paged_df, "peer_mean"), _float_column(paged_df, "peer_p90"))
+        ],
+        "flags": [value or [] for value in _list_column(paged_df, "flags")],
+        "duplicate_pattern": _bool_column(paged_df, "duplicate_pattern"),
+        "rule_score": _float_column(paged_df, "rule_score"),
+        "ml_score": _float_column(paged_df, "ml_score"),
+        "ml_score_normalized": _float_column(paged_df, "ml_score_normalized"),
+        "risk_score": _float_column(paged_df, "risk_score"),
+        "model_version": _str_column(paged_df, "model_version"),
+        "ruleset_version": [ruleset_version] * len(paged_df),
+        "latest_feedback": [feedback_map.get(claim_id) for claim_id in claim_ids],
+    }
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+
+def _masked_list(values: np.ndarray, mask: np.ndarray) -> list[Any]:
+    values = values.astype(object)
+    values[mask] = None
+    return values.tolist()
+
+
+def _json_column(df: pd.DataFrame, column: str) -> list[Any]:
+    if column not in df.columns:
+        return [None] * len(df)
+    series = df[column]
+    return _masked_list(series.to_numpy(dtype=object), series.isna().to_numpy())
+
+
+def _float_column(df: pd.DataFrame, column: str) -> list[float | None]:
+    if column not in df.columns:
+        return [None] * len(df)
+    values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return _masked_list(values, np.isnan(values))
+
+
+def _int_column(df: pd.DataFrame, column: str) -> list[int | None]:
+    if column not in df.columns:
+        return [None] * len(df)
+    numeric = pd.to_numeric(df[column], errors="coerce")
+    mask = numeric.isna().to_numpy()
+    return _masked_list(numeric.fillna(0).to_numpy(dtype=np.int64), mask)
+
+
+def _str_column(df: pd.DataFrame, column: str, title: bool = False) -> list[str | None]:
+    if column not in df.columns:
+        return [None] * len(df)
+    series = df[column]
+    text = series.astype(str).str.strip()
+    if title:
+        text = text.str.title()
+    mask = (series.isna() | (text == "")).to_numpy()
+    return _masked_list(text.to_numpy(dtype=object), mask)
+
+
+def _date_column(df: pd.DataFrame, column: str) -> list[str | None]:
+    if column not in df.columns:
+        return [None] * len(df)
+    values = df[column]
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values, errors="coerce")
+    if isinstance(values.dtype, pd.DatetimeTZDtype):
+        return [None if pd.isna(ts) else ts.isoformat() for ts in values]
+    # Same text as Timestamp.isoformat() for whole-second values (DATE columns are midnight).
+    stamps = values.to_numpy(dtype="datetime64[us]")
+    text = np.datetime_as_string(stamps, unit="s")
+    mask = np.isnat(stamps)
+    fractional = ~mask & (stamps.astype("datetime64[s]") != stamps)
+    if fractional.any():
+        text = text.astype(object)
+        text[fractional] = [pd.Timestamp(ts).isoformat() for ts in stamps[fractional]]
+    return _masked_list(text, mask)
+
+
+def _bool_column(df: pd.DataFrame, column: str) -> list[bool]:
+    if column not in df.columns:
+        return [False] * len(df)
+    return df[column].fillna(False).astype(bool).tolist()
+
+
+def _list_column(df: pd.DataFrame, column: str) -> list[list[Any] | None]:
+    if column not in df.columns:
+        return [None] * len(df)
+    return [_clean_list(value) for value in df[column].tolist()]
+
+
+def _clean_list(value: Any) -> list[Any] | None:
+    """Fast path of `_to_optional_list` for the list values DuckDB returns."""
+    if value is None:
+        return None
+    if isinstance(value, np.ndarray):
+        value = value.tolist()
+    if isinstance(value, (list, tuple)):
+        # `item == item` drops NaN without a per-element pd.isna call.
+        return [item for item in value if item is not None and item == item]
+    return _to_optional_list(value)
+
+
+def _build_filter_clauses(loader: DataLoader, filters: Mapping[str, Any]) -> tuple[list[str], list[Any]]:
+    """
+    Translate claim-level filters into WHERE clauses against claims_normalized.
+
+    Values are canonicalised here (the ETL stores one spelling per category), so the
+    stored columns are compared as-is and DuckDB can prune row groups on them.
+    """
     clauses: list[str] = []
     params: list[Any] = []
 
@@ -121,56 +369,358 @@ def _fetch_filtered_claims(loader: DataLoader, filters: Mapping[str, Any]) -> tu
         if value is None or value == "":
             return
         val = transform(value) if transform else value
-        clauses.append(f"{column} = ?")
+        clauses.append(loader.equals_sql(column))
         params.append(val)
 
-    add_equals("province_name", filters.get("province"), lambda v: str(v).upper())
-    add_equals("dx_primary_code", filters.get("dx"), lambda v: str(v).upper())
-    add_equals("facility_class", filters.get("facility_class"))
-    add_equals("LOWER(severity_group)", filters.get("severity"), lambda v: str(v).lower())
-    add_equals("UPPER(service_type)", filters.get("service_type"), lambda v: str(v).upper())
-
-    start_date = filters.get("start_date")
-    end_date = filters.get("end_date")
-    discharge_start = filters.get("discharge_start")
-    discharge_end = filters.get("discharge_end")
-
-    if start_date:
-        clauses.append("admit_dt >= ?")
-        params.append(start_date)
-    if end_date:
-        clauses.append("admit_dt <= ?")
-        params.append(end_date)
-    if discharge_start:
-        clauses.append("discharge_dt >= ?")
-        params.append(discharge_start)
-    if discharge_end:
-        clauses.append("discharge_dt <= ?")
-        params.append(discharge_end)
+    add_equals("province_name", filters.get("province"), lambda v: str(v).strip().upper())
+    add_equals("dx_primary_code", filters.get("dx"), lambda v: str(v).strip().upper())
+    add_equals("facility_class", filters.get("facility_class"), lambda v: str(v).strip())
+    add_equals("severity_group", filters.get("severity"), lambda v: str(v).strip().lower())
+    add_equals("service_type", filters.get("service_type"), canonical_service_type)
+
+    date_bounds = (
+        ("admit_dt >= ?", filters.get("start_date")),
+        ("admit_dt <= ?", filters.get("end_date")),
+        ("discharge_dt >= ?", filters.get("discharge_start")),
+        ("discharge_dt <= ?", filters.get("discharge_end")),
+    )
+    for clause, raw_value in date_bounds:
+        parsed = _parse_date(raw_value)
+        if parsed is not None:
+            clauses.append(clause)
+            params.append(parsed.date())
 
-    where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return clauses, params
 
-    count_sql = f"SELECT COUNT(*) AS total FROM {loader.table_name} {where_sql}"
-    total_df = loader.query(count_sql, params)
-    total = int(total_df["total"].iloc[0]) if not total_df.empty else 0
-    if total == 0:
-        return pd.DataFrame(), 0
-
-    limit_rows = min(total, MAX_FETCH_ROWS)
-    select_sql = f"SELECT * FROM {loader.table_name} {where_sql} LIMIT ?"
-    select_params = params + [limit_rows]
-    df = loader.query(select_sql, select_params)
-
-    if total > MAX_FETCH_ROWS:
-        current_app.logger.warning(
-            "Filtered claim dataset truncated to %s rows (total=%s). Adjust CLAIMS_MAX_QUERY_ROWS if needed.",
-            MAX_FETCH_ROWS,
-            total,
-        )
 
+def _build_score_clauses(filters: Mapping[str, Any]) -> tuple[list[str], list[Any]]:
+    """Translate score-level filters into WHERE clauses against the ranked relation."""
+    clauses: list[str] = []
+    params: list[Any] = []
+
+    score_bounds = (
+        ("risk_score >= ?", filters.get("min_risk_score")),
+        ("risk_score <= ?", filters.get("max_risk_score")),
+        ("ml_score_normalized >= ?", filters.get("min_ml_score")),
+    )
+    for clause, raw_value in score_bounds:
+        parsed = _parse_float(raw_value)
+        if parsed is not None:
+            clauses.append(clause)
+            params.append(parsed)
+
+    return clauses, params
+
+
+def _ranked_claims_sql(source_table: str, scores_relation: str, where_sql: str) -> str:
+    """
+    Build the SQL twin of ``_compute_rule_enrichment`` + risk_score over claims joined with scores.
+
+    The resulting relation exposes every claims_normalized column plus ml scores, rule flags,
+    ``flags``/``flag_count``/``has_flags``, ``rule_score`` and ``risk_score``.
+    """
+    computed_flags = ",\n            ".join(
+        f"{expr} AS {name}" for name, expr in RULE_FLAG_SQL.items()
+    )
+    flag_list = ", ".join(
+        f"CASE WHEN {name} THEN '{name}' END" for name in RULE_FLAG_WEIGHTS
+    )
+    flag_count = " + ".join(f"CAST({name} AS INTEGER)" for name in RULE_FLAG_WEIGHTS)
+    rule_score = ", ".join(
+        f"CASE WHEN {name} THEN CAST({weight} AS DOUBLE) ELSE 0.0 END"
+        for name, weight in RULE_FLAG_WEIGHTS.items()
+    )
+    return f"""
+        WITH filtered AS (
+            SELECT *
+            FROM {source_table}
+            {where_sql}
+        ),
+        joined AS (
+            SELECT
+                c.* REPLACE (COALESCE(c.duplicate_pattern, FALSE) AS duplicate_pattern),
+                s.ml_score,
+                s.ml_score_normalized,
+                s.model_version
+            FROM filtered c
+            LEFT JOIN {scores_relation} s USING (claim_id)
+        ),
+        flagged AS (
+            SELECT
+                *,
+                {computed_flags}
+            FROM joined
+        ),
+        scored AS (
+            SELECT
+                *,
+                LIST_FILTER([{flag_list}], flag -> flag IS NOT NULL) AS flags,
+                {flag_count} AS flag_count,
+                GREATEST({rule_score}) AS rule_score
+            FROM flagged
+        )
+        SELECT
+            *,
+            flag_count > 0 AS has_flags,
+            GREATEST(rule_score, COALESCE(ml_score_normalized, rule_score)) AS risk_score
+        FROM scored
+    """
+
+
+def _fetch_filtered_claims(
+    loader: DataLoader,
+    scores_relation: str,
+    filters: Mapping[str, Any],
+    page: int,
+    page_size: int,
+    use_ranked_table: bool = False,
+    after_key: tuple[bool, int, float, str] | None = None,
+    known_total: int | None = None,
+) -> tuple[pd.DataFrame, int]:
+    """
+    Rank filtered claims inside DuckDB and return only the requested page plus the total.
+
+    With ``use_ranked_table`` the page is read from the materialised ``claims_risk_ranked``
+    table (ordered by ``rank_position``); otherwise ranking is computed live against
+    ``scores_relation``. ``after_key`` switches from OFFSET paging to a keyset seek that
+    starts right after the given (has_flags, flag_count, risk_score, claim_id) tuple.
+    When ``known_total`` is given the count is skipped and only the page is ranked.
+    """
+    clauses, params = _build_filter_clauses(loader, filters)
+    score_clauses, score_params = _build_score_clauses(filters)
+    where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    score_where_sql = f"WHERE {' AND '.join(score_clauses)}" if score_clauses else ""
+
+    seek_clauses = list(score_clauses)
+    seek_params = list(score_params)
+    if after_key is not None:
+        has_flags, flag_count, risk_score, claim_id = after_key
+        seek_clauses.append(CURSOR_SEEK_SQL)
+        seek_params.extend(
+            [
+                has_flags,
+                has_flags, flag_count,
+                has_flags, flag_count, risk_score,
+                has_flags, flag_count, risk_score, claim_id,
+            ]
+        )
+    seek_where_sql = f"WHERE {' AND '.join(seek_clauses)}" if seek_clauses else ""
+
+    if use_ranked_table:
+        ranked_sql = f"SELECT * FROM {RISK_RANKED_TABLE} {where_sql}"
+        order_sql = "rank_position"
+    else:
+        ranked_sql = _ranked_claims_sql(loader.table_name, scores_relation, where_sql)
+        order_sql = RANKING_ORDER_SQL
+
+    offset = 0 if after_key is not None else (page - 1) * page_size
+    page_sql = f"""
+        SELECT *
+        FROM ({ranked_sql}) ranked
+        {seek_where_sql}
+        ORDER BY {order_sql}
+        LIMIT ? OFFSET ?
+    """
+    page_params = params + seek_params + [page_size, offset]
+
+    if known_total is not None:
+        if known_total == 0:
+            return pd.DataFrame(), 0
+        return loader.query(page_sql, page_params), known_total
+
+    if score_clauses or use_ranked_table:
+        count_sql = f"SELECT COUNT(*) AS total_count FROM ({ranked_sql}) ranked {score_where_sql}"
+        count_params = params + score_params
+    else:
+        count_sql = f"SELECT COUNT(*) AS total_count FROM {loader.table_name} {where_sql}"
+        count_params = list(params)
+
+    # Single statement: the count subquery only reads the filter columns while the page
+    # subquery runs as a streaming top-N, so neither materialises the filtered rows.
+    # LEFT JOIN keeps the total when the requested page is past the end.
+    combined_sql = f"""
+        SELECT page_rows.*, totals.total_count
+        FROM ({count_sql}) totals
+        LEFT JOIN ({page_sql}) page_rows ON TRUE
+        ORDER BY {order_sql}
+    """
+    df = loader.query(combined_sql, count_params + page_params)
+    total = int(df["total_count"].iloc[0]) if not df.empty else 0
+    df = df[df["claim_id"].notna()].drop(columns=["total_count"]).reset_index(drop=True)
     return df, total
 
 
+def _filtered_ranked_sql(
+    loader: DataLoader,
+    scores_relation: str,
+    filters: Mapping[str, Any],
+    use_ranked_table: bool,
+    select_sql: str = "*",
+) -> tuple[str, list[Any]]:
+    """Every ranked claim matching ``filters`` in ranking order, without paging (for exports)."""
+    clauses, params = _build_filter_clauses(loader, filters)
+    score_clauses, score_params = _build_score_clauses(filters)
+    where_sql = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    score_where_sql = f"WHERE {' AND '.join(score_clauses)}" if score_clauses else ""
+
+    if use_ranked_table:
+        ranked_sql = f"SELECT * FROM {RISK_RANKED_TABLE} {where_sql}"
+        order_sql = "rank_position"
+    else:
+        ranked_sql = _ranked_claims_sql(loader.table_name, scores_relation, where_sql)
+        order_sql = RANKING_ORDER_SQL
+
+    sql = f"""
+        SELECT {select_sql}
+        FROM ({ranked_sql}) ranked
+        {score_where_sql}
+        ORDER BY {order_sql}
+    """
+    return sql, params + score_params
+
+
+def _determine_count_mode(filters: Mapping[str, Any]) -> str:
+    mode = str(filters.get("count") or "exact").strip().lower()
+    return mode if mode in COUNT_MODES else "exact"
+
+
+def _count_cache_key(
+    loader: DataLoader, filters: Mapping[str, Any], snapshot: str | None, use_ranked_table: bool
+) -> str:
+    clauses, params = _build_filter_clauses(loader, filters)
+    score_clauses, score_params = _build_score_clauses(filters)
+    return cache_key(snapshot, use_ranked_table, clauses + score_clauses, [str(value) for value in params + score_params])
+
+
+def build_risk_ranked_table(loader: DataLoader, scores_relation: str = SCORES_CACHE_TABLE) -> int:
+    """
+    Materialise ``claims_risk_ranked``: claims joined with ML scores, all rule flags and risk_score.
+
+    Rows are physically sorted on the ranking keys and numbered by ``rank_position`` so page reads
+    benefit from DuckDB zone maps; a unique claim_id index serves single-claim reads. The table
+    is built as a shadow and swapped in atomically, then exported to Parquet next to the scores
+    cache.
+    Returns the number of ranked rows.
+    """
+    ranked_sql = _ranked_claims_sql(loader.table_name, scores_relation, "")
+    loader.replace_table(
+        RISK_RANKED_TABLE,
+        f"""
+        SELECT
+            ROW_NUMBER() OVER (ORDER BY {RANKING_ORDER_SQL}) AS rank_position,
+            *
+        FROM ({ranked_sql}) ranked
+        ORDER BY rank_position
+        """,
+        indexes=[f"CREATE UNIQUE INDEX IF NOT EXISTS {RISK_RANKED_TABLE}_claim_id_idx ON {RISK_RANKED_TABLE} (claim_id)"],
+    )
+    loader.export_parquet(RISK_RANKED_TABLE, loader.parquet_dir / RISK_RANKED_FILENAME)
+
+    count_df = loader.query(f"SELECT COUNT(*) AS total FROM {RISK_RANKED_TABLE}")
+    return int(count_df["total"].iloc[0]) if not count_df.empty else 0
+
+
+def _ranked_snapshot(loader: DataLoader, model_version: str, ruleset_version: str) -> RankedSnapshot:
+    """
+    Describe the latest ranked scores refresh and whether ``claims_risk_ranked`` is usable.
+
+    The table is stale when the latest ranked refresh used another (model_version,
+    ruleset_version), when the ETL rebuilt claims_normalized after that refresh, or when the
+    table is missing. The refresh run_id doubles as the snapshot token for cursor pagination.
+    """
+    sql = f"""
+        SELECT
+            latest.run_id,
+            latest.version,
+            latest.ruleset_version,
+            latest.refreshed_at >= COALESCE(etl.last_executed_at, latest.refreshed_at) AS after_etl,
+            EXISTS (
+                SELECT 1
+                FROM information_schema.tables
+                WHERE table_schema = 'main' AND table_name = '{RISK_RANKED_TABLE}'
+            ) AS table_exists
+        FROM (
+            SELECT run_id, version, ruleset_version, refreshed_at
+            FROM ml_model_versions
+            WHERE ranked_rows IS NOT NULL
+            ORDER BY refreshed_at DESC
+            LIMIT 1
+        ) latest,
+        (SELECT MAX(executed_at) AS last_executed_at FROM etl_runs) etl
+    """
+    try:
+        state = loader.query(sql)
+    except (duckdb.Error, FileNotFoundError):
+        return RankedSnapshot(run_id=None, is_current=False)
+    if state.empty:
+        return RankedSnapshot(run_id=None, is_current=False)
+
+    latest = state.iloc[0]
+    is_current = (
+        bool(latest["table_exists"])
+        and bool(latest["after_etl"])
+        and latest["version"] == model_version
+        and latest["ruleset_version"] == ruleset_version
+    )
+    return RankedSnapshot(run_id=latest["run_id"], is_current=is_current)
+
+
+def _encode_cursor(row: pd.Series, snapshot: str | None) -> str:
+    payload = {
+        "k": [
+            bool(row["has_flags"]),
+            int(row["flag_count"]),
+            float(row["risk_score"]),
+            str(row["claim_id"]),
+        ],
+        "s": snapshot,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, snapshot: str | None) -> tuple[bool, int, float, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        has_flags, flag_count, risk_score, claim_id = payload["k"]
+        key = (bool(has_flags), int(flag_count), float(risk_score), str(claim_id))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError) as exc:
+        raise InvalidCursor("cursor tidak valid") from exc
+
+    if payload.get("s") != snapshot:
+        raise StaleCursor("Snapshot skor sudah berubah; mulai ulang dari halaman pertama.")
+    return key
+
+
+def load_ranked_claim(loader: DataLoader, claim_id: str, snapshot: RankedSnapshot) -> pd.DataFrame | None:
+    """Return the precomputed ranked row for a claim, or None when the ranked table is stale."""
+    if not snapshot.is_current:
+        return None
+    df = loader.get_claim(claim_id, table_name=RISK_RANKED_TABLE)
+    if df.empty:
+        return None
+    df["flags"] = df["flags"].apply(lambda value: _to_optional_list(value) or [])
+    return df.drop(columns=["rank_position", "flag_count", "has_flags"], errors="ignore")
+
+
+def _resolve_scores_relation(loader: DataLoader) -> str:
+    """
+    Return a SQL relation holding cached ML scores.
+
+    Never computes the cache: without a scores table or Parquet the relation is empty, so
+    claims are ranked and served on their rule scores alone, with null ML fields, until a
+    refresh (run through `refresh_jobs`) has cached the scores.
+    """
+    if loader.table_exists(SCORES_CACHE_TABLE):
+        return SCORES_CACHE_TABLE
+    scores_path = loader.parquet_dir / SCORES_CACHE_FILENAME
+    if scores_path.exists():
+        escaped = str(scores_path).replace("'", "''")
+        return f"read_parquet('{escaped}')"
+    return EMPTY_SCORES_RELATION
+
+
 def _compute_rule_enrichment(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     los = df["los"].fillna(0)
@@ -200,14 +750,8 @@ def _compute_rule_enrichment(df: pd.DataFrame) -> pd.DataFrame:
         for row in flag_matrix
     ]
 
-    weights = {
-        "short_stay_high_cost": 0.8,
-        "severity_mismatch": 0.7,
-        "high_cost_full_paid": 0.5,
-        "duplicate_pattern": 0.6,
-    }
     rule_score = np.zeros(len(df))
-    for flag, weight in weights.items():
+    for flag, weight in RULE_FLAG_WEIGHTS.items():
         rule_score = np.maximum(rule_score, df[flag].astype(float) * weight)
     df["rule_score"] = rule_score
     return df
@@ -217,7 +761,7 @@ def _get_ruleset_version() -> str:
     try:
         return current_app.config.get("RULESET_VERSION", "RULESET_v1")
     except RuntimeError:
-        return "RULESET_v1"
+        return os.getenv("RULESET_VERSION", "RULESET_v1")
 
 
 def _is_na(value: Any) -> bool:
@@ -245,66 +789,9 @@ def _to_optional_float(value: Any) -> float | None:
         return None
 
 
-def _to_optional_int(value: Any) -> int | None:
-    value = _sanitize_json_value(value)
-    if value is None:
-        return None
-    try:
-        return int(value)
-    except (TypeError, ValueError):
-        return None
-
-
-def _to_optional_str(value: Any) -> str | None:
-    value = _sanitize_json_value(value)
-    if value is None:
-        return None
-    text = str(value).strip()
-    return text if text else None
-
-
-def _to_optional_title(value: Any) -> str | None:
-    text = _to_optional_str(value)
-    return text.title() if text else text
-
-
-def _to_optional_date(value: Any) -> str | None:
-    value = _sanitize_json_value(value)
-    if value is None:
-        return None
-    if isinstance(value, datetime):
-        return value.isoformat()
-    try:
-        ts = pd.to_datetime(value, errors="coerce")
-        if pd.isna(ts):
-            return None
-        return ts.isoformat()
-    except Exception:
-        text = _to_optional_str(value)
-        return text
-
-
-def _load_or_compute_scores(loader: DataLoader, scorer: MLScorer, force_refresh: bool = False) -> pd.DataFrame:
-    scores_path = loader.parquet_dir / SCORES_CACHE_FILENAME
-    if not force_refresh:
-        scores_from_db = loader.read_table_from_duckdb(SCORES_CACHE_TABLE)
-        if scores_from_db is not None and not scores_from_db.empty:
-            return scores_from_db
-        if scores_path.exists():
-            return pd.read_parquet(scores_path)
-
-    df_all = loader.load_claims_normalized()
-    scores = scorer.score_dataframe(df_all)
-    loader.write_dataframe_to_duckdb(scores, SCORES_CACHE_TABLE, mode="replace")
-    scores_path.parent.mkdir(parents=True, exist_ok=True)
-    scores.to_parquet(scores_path, index=False)
-    _log_qc_snapshot(df_all, scores)
-    return scores
-
-
 def _determine_page_size(filters: Mapping[str, Any]) -> int:
     value = filters.get("page_size") or filters.get("limit")
-    return _parse_positive_int(value, DEFAULT_PAGE_SIZE)
+    return min(_parse_positive_int(value, DEFAULT_PAGE_SIZE), MAX_FETCH_ROWS)
 
 
 def _determine_page(filters: Mapping[str, Any]) -> int:
@@ -328,58 +815,6 @@ def _should_refresh_cache(filters: Mapping[str, Any]) -> bool:
     return False
 
 
-def _apply_advanced_filters(df: pd.DataFrame, filters: Mapping[str, Any]) -> pd.DataFrame:
-    result = df
-
-    severity = filters.get("severity")
-    if severity and "severity_group" in result.columns:
-        result = result[result["severity_group"].fillna("").astype(str).str.upper() == severity.upper().strip()]
-
-    service_type = filters.get("service_type")
-    if service_type and "service_type" in result.columns:
-        result = result[result["service_type"].fillna("").astype(str).str.upper() == service_type.upper().strip()]
-
-    min_risk = _parse_float(filters.get("min_risk_score"))
-    if min_risk is not None and "risk_score" in result.columns:
-        result = result[result["risk_score"] >= min_risk]
-
-    max_risk = _parse_float(filters.get("max_risk_score"))
-    if max_risk is not None and "risk_score" in result.columns:
-        result = result[result["risk_score"] <= max_risk]
-
-    min_ml = _parse_float(filters.get("min_ml_score"))
-    if min_ml is not None and "ml_score_normalized" in result.columns:
-        result = result[result["ml_score_normalized"] >= min_ml]
-
-    facility_class = filters.get("facility_class")
-    if facility_class and "facility_class" in result.columns:
-        result = result[result["facility_class"].fillna("").astype(str).str.upper() == facility_class.upper().strip()]
-
-    start_date = _parse_date(filters.get("start_date"))
-    end_date = _parse_date(filters.get("end_date"))
-    if (start_date or end_date) and "admit_dt" in result.columns:
-        admit_series = pd.to_datetime(result["admit_dt"], errors="coerce")
-        mask = pd.Series(True, index=result.index)
-        if start_date:
-            mask &= admit_series >= start_date
-        if end_date:
-            mask &= admit_series <= end_date
-        result = result[mask]
-
-    discharge_start = _parse_date(filters.get("discharge_start"))
-    discharge_end = _parse_date(filters.get("discharge_end"))
-    if (discharge_start or discharge_end) and "discharge_dt" in result.columns:
-        discharge_series = pd.to_datetime(result["discharge_dt"], errors="coerce")
-        mask = pd.Series(True, index=result.index)
-        if discharge_start:
-            mask &= discharge_series >= discharge_start
-        if discharge_end:
-            mask &= discharge_series <= discharge_end
-        result = result[mask]
-
-    return result
-
-
 def _fetch_latest_feedback_map(claim_ids: list[str]) -> dict[str, dict[str, Any]]:
     if not claim_ids:
         return {}
@@ -443,21 +878,51 @@ def _log_qc_snapshot(raw_df: pd.DataFrame, scores: pd.DataFrame, top_k: int | No
         "ml_score_top_k_mean": _to_optional_float(top_df["ml_score_normalized"].mean() if len(top_df) else None),
     }
 
-    top_records = top_df[
-        [
-            "claim_id",
-            "province_name",
-            "severity_group",
-            "risk_score",
-            "rule_score",
-            "ml_score_normalized",
-            "amount_claimed",
-            "los",
-            "duplicate_pattern",
-            "flags",
-        ]
-    ].to_dict(orient="records")
+    top_records = top_df[QC_TOP_RECORD_COLUMNS].to_dict(orient="records")
+    return _write_qc_log(summary, top_records, timestamp)
+
+
+def log_qc_snapshot_from_ranked(loader: DataLoader, top_k: int | None = None) -> dict[str, Any] | None:
+    """Same QC snapshot as `_log_qc_snapshot`, aggregated inside DuckDB from claims_risk_ranked."""
+    cap = top_k or QC_TOP_K
+    top_df = loader.query(
+        f"SELECT {', '.join(QC_TOP_RECORD_COLUMNS)}, cost_zscore FROM {RISK_RANKED_TABLE} "
+        "ORDER BY risk_score DESC, claim_id LIMIT ?",
+        [cap],
+    )
+    totals = loader.query(
+        f"""
+        SELECT
+            COUNT(*) AS total_rows,
+            AVG(amount_claimed) AS amount_claimed_mean,
+            AVG(cost_zscore) AS cost_zscore_mean,
+            AVG(CASE WHEN los <= 1 THEN 1.0 ELSE 0.0 END) AS los_le_1_ratio
+        FROM {RISK_RANKED_TABLE}
+        """
+    ).iloc[0]
+    if not totals["total_rows"]:
+        return None
+
+    timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    summary = {
+        "timestamp": timestamp,
+        "total_rows": int(totals["total_rows"]),
+        "top_k": int(len(top_df)),
+        "amount_claimed_mean": _to_optional_float(totals["amount_claimed_mean"]),
+        "amount_claimed_top_k_mean": _to_optional_float(top_df["amount_claimed"].mean()),
+        "cost_zscore_mean": _to_optional_float(totals["cost_zscore_mean"]),
+        "cost_zscore_top_k_mean": _to_optional_float(top_df["cost_zscore"].mean()),
+        "los_le_1_ratio": _to_optional_float(totals["los_le_1_ratio"]),
+        "los_le_1_ratio_top_k": _to_optional_float((top_df["los"] <= 1).mean() if len(top_df) else None),
+        "risk_score_top_k_mean": _to_optional_float(top_df["risk_score"].mean() if len(top_df) else None),
+        "ml_score_top_k_mean": _to_optional_float(top_df["ml_score_normalized"].mean() if len(top_df) else None),
+    }
+    top_df["flags"] = top_df["flags"].apply(lambda value: _to_optional_list(value) or [])
+    top_records = top_df[QC_TOP_RECORD_COLUMNS].to_dict(orient="records")
+    return _write_qc_log(summary, top_records, timestamp)
+
 
+def _write_qc_log(summary: dict[str, Any], top_records: list[dict[str, Any]], timestamp: str) -> dict[str, Any]:
     log_payload = {
         "summary": summary,
         "top_records": top_records,
@@ -466,25 +931,33 @@ def _log_qc_snapshot(raw_df: pd.DataFrame, scores: pd.DataFrame, top_k: int | No
     log_dir = Path(QC_LOG_DIRNAME)
     log_dir.mkdir(parents=True, exist_ok=True)
     log_path = log_dir / f"ml_scores_qc_{timestamp}.json"
-    log_path.write_text(json.dumps(log_payload, indent=2))
+    log_path.write_text(json.dumps(log_payload, indent=2, default=str))
     return log_payload
 
 
 def _build_response(
     items: list[dict[str, Any]],
     total: int,
-    page: int,
+    page: int | None,
     page_size: int,
     ruleset_version: str,
     model_version: str,
+    snapshot: str | None = None,
+    next_cursor: str | None = None,
+    total_estimated: bool = False,
+    refresh_job: str | None = None,
 ) -> dict[str, Any]:
     return {
         "items": items,
         "total": total,
+        "total_estimated": total_estimated,
         "page": page,
         "page_size": page_size,
         "model_version": model_version,
         "ruleset_version": ruleset_version,
+        "snapshot": snapshot,
+        "next_cursor": next_cursor,
+        "refresh_job": refresh_job,
     }
 
 
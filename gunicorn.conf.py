@@ -1,5 +1,6 @@
 from os import getenv
 
 bind = "0.0.0.0:8080"
-workers = 1
+# With more than one worker set API_CACHE_BACKEND=file so workers share cached results.
+workers = int(getenv("GUNICORN_WORKERS", "1"))
 timeout = int(getenv("GUNICORN_TIMEOUT", "120"))
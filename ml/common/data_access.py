@@ -2,24 +2,390 @@
 Utility helpers for accessing analytics datasets (claims_normalized, etc).
 
 Usage:
-    from ml.common.data_access import DataLoader
-    loader = DataLoader()
+    from ml.common.data_access import get_data_loader
+    loader = get_data_loader()
     df = loader.load_claims_normalized(limit=5)
+
+Read queries go through a process-wide pool of read-only DuckDB cursors (see
+`DuckDBConnectionPool`); set DUCKDB_POOL_ENABLED=false to open one connection per query.
 """
 
 from __future__ import annotations
 
 import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Sequence
+from typing import Iterator, Mapping, Optional, Sequence
 
 import duckdb
 import pandas as pd
 import yaml
 
-from .schema import validate_claims_normalized
+from .schema import CLAIMS_NORMALIZED_ENUM_TYPES, validate_claims_normalized
 PIPELINE_CONFIG_PATH = Path("pipelines/claims_normalized/config.yaml")
 
+POOL_ENABLED = os.getenv("DUCKDB_POOL_ENABLED", "true").lower() in {"1", "true", "yes"}
+POOL_SIZE = int(os.getenv("DUCKDB_POOL_SIZE", "4"))
+POOL_TIMEOUT_SECONDS = float(os.getenv("DUCKDB_POOL_TIMEOUT", "30"))
+POOL_IDLE_SECONDS = float(os.getenv("DUCKDB_POOL_IDLE_SECONDS", "60"))
+POOL_HEALTH_CHECK_SECONDS = 30.0
+WRITE_LOCK_TIMEOUT_SECONDS = float(os.getenv("DUCKDB_WRITE_LOCK_TIMEOUT", "60"))
+WRITE_LOCK_RETRY_SECONDS = 0.5
+WRITE_INTENT_MARKER = ".write-intent."
+WRITER_CHECK_SECONDS = 0.2
+SHADOW_SUFFIX = "__shadow"
+STAGING_SUFFIX = ".staging"
+
+
+def file_signature(path: str) -> tuple:
+    """(inode, size, mtime) of a DuckDB file and its WAL; changes with every committed write."""
+    signature = []
+    for candidate in (path, f"{path}.wal"):
+        try:
+            st = os.stat(candidate)
+        except FileNotFoundError:
+            signature.append(None)
+            continue
+        signature.append((st.st_ino, st.st_size, st.st_mtime_ns))
+    return tuple(signature)
+
+
+def write_intent_path(duckdb_path: str) -> Path:
+    """New marker announcing that this process wants (or holds) the DuckDB write lock."""
+    return Path(f"{duckdb_path}{WRITE_INTENT_MARKER}{os.getpid()}.{uuid.uuid4().hex[:12]}")
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def writer_waiting(duckdb_path: str) -> bool:
+    """True while a live process has a write-intent marker next to the DuckDB file."""
+    path = Path(duckdb_path)
+    prefix = f"{path.name}{WRITE_INTENT_MARKER}"
+    try:
+        names = os.listdir(path.parent)
+    except FileNotFoundError:
+        return False
+    for name in names:
+        if not name.startswith(prefix):
+            continue
+        pid = name[len(prefix):].split(".", 1)[0]
+        # Markers left behind by a crashed writer are ignored.
+        if pid.isdigit() and _process_alive(int(pid)):
+            return True
+    return False
+
+
+class DuckDBConnectionPool:
+    """
+    Read-only DuckDB connection shared by the process, handing out per-thread cursors.
+
+    One base connection is opened per database file; callers check out a cursor for the
+    duration of a query (at most ``size`` at once). The pool reopens when the database
+    file (or its WAL) changes on disk so readers see the data swapped in by the ETL, and
+    closes everything after ``idle_seconds`` without use.
+
+    Writers in any process announce themselves through a write-intent marker (see
+    `write_connection`); while one exists the pool stops handing out cursors, closes as
+    soon as the outstanding ones are returned and waits for the writer before reopening,
+    so the DuckDB file lock is released even under steady read traffic.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int = POOL_SIZE,
+        timeout: float = POOL_TIMEOUT_SECONDS,
+        idle_seconds: float = POOL_IDLE_SECONDS,
+    ) -> None:
+        self.path = path
+        self.size = max(size, 1)
+        self.timeout = timeout
+        self.idle_seconds = idle_seconds
+        self._cond = threading.Condition()
+        self._base: duckdb.DuckDBPyConnection | None = None
+        self._signature: tuple | None = None
+        self._idle: list[tuple[duckdb.DuckDBPyConnection, float]] = []
+        self._in_use = 0
+        self._generation = 0
+        self._last_used = time.monotonic()
+        self._reaper: threading.Thread | None = None
+        self.stats = {"opens": 0, "checkouts": 0, "reopens": 0, "health_failures": 0}
+
+    def _close_locked(self) -> None:
+        for cursor, _ in self._idle:
+            cursor.close()
+        self._idle.clear()
+        if self._base is not None:
+            self._base.close()
+            self._base = None
+        self._signature = None
+        self._generation += 1
+
+    def _drain_locked(self) -> None:
+        # DuckDB shares one database instance per file and config inside a process, so
+        # every cursor must be returned before the file can be reopened or written.
+        deadline = time.monotonic() + self.timeout
+        while self._in_use:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Timed out waiting for DuckDB cursors on {self.path}")
+            self._cond.wait(remaining)
+        self._close_locked()
+
+    def _ensure_open_locked(self) -> None:
+        signature = file_signature(self.path)
+        if self._base is not None and signature != self._signature:
+            self.stats["reopens"] += 1
+            self._drain_locked()
+        if self._base is None:
+            self._base = duckdb.connect(self.path, read_only=True)
+            self._signature = signature
+            self.stats["opens"] += 1
+            self._start_reaper_locked()
+
+    def _start_reaper_locked(self) -> None:
+        if self.idle_seconds <= 0 or (self._reaper is not None and self._reaper.is_alive()):
+            return
+        self._reaper = threading.Thread(target=self._reap_idle, name="duckdb-pool-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap_idle(self) -> None:
+        # Also polls for writers so an idle pool never sits on the file lock.
+        while True:
+            time.sleep(min(max(self.idle_seconds / 2, 0.5), 1.0))
+            with self._cond:
+                if self._base is None:
+                    return
+                if self._in_use:
+                    continue
+                if time.monotonic() - self._last_used >= self.idle_seconds or writer_waiting(self.path):
+                    self._close_locked()
+                    return
+
+    def _checkout(self) -> tuple[duckdb.DuckDBPyConnection, int]:
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if writer_waiting(self.path):
+                    if not self._in_use and self._base is not None:
+                        self._close_locked()
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"Timed out waiting for a DuckDB writer to release {self.path}")
+                    self._cond.wait(min(remaining, WRITER_CHECK_SECONDS))
+                    continue
+                if not self._in_use:
+                    self._ensure_open_locked()
+                if self._base is not None and self._idle:
+                    cursor, idle_since = self._idle.pop()
+                    if time.monotonic() - idle_since > POOL_HEALTH_CHECK_SECONDS and not self._is_healthy(cursor):
+                        continue
+                    break
+                if self._base is not None and self._in_use + len(self._idle) < self.size:
+                    cursor = self._base.cursor()
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Timed out waiting for a DuckDB cursor on {self.path}")
+                self._cond.wait(remaining)
+            self._in_use += 1
+            self._last_used = time.monotonic()
+            self.stats["checkouts"] += 1
+            return cursor, self._generation
+
+    def _is_healthy(self, cursor: duckdb.DuckDBPyConnection) -> bool:
+        try:
+            cursor.execute("SELECT 1").fetchone()
+            return True
+        except duckdb.Error:
+            self.stats["health_failures"] += 1
+            cursor.close()
+            return False
+
+    def _checkin(self, cursor: duckdb.DuckDBPyConnection, generation: int, healthy: bool) -> None:
+        with self._cond:
+            self._in_use -= 1
+            self._last_used = time.monotonic()
+            if healthy and generation == self._generation:
+                self._idle.append((cursor, time.monotonic()))
+            else:
+                cursor.close()
+            if not self._in_use and self._base is not None and writer_waiting(self.path):
+                self._close_locked()
+            self._cond.notify_all()
+
+    @contextmanager
+    def connection(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """Check out a read-only cursor for the duration of the block."""
+        cursor, generation = self._checkout()
+        healthy = True
+        try:
+            yield cursor
+        except (duckdb.ConnectionException, duckdb.FatalException, duckdb.InternalException):
+            healthy = False
+            raise
+        finally:
+            self._checkin(cursor, generation, healthy)
+
+    def close(self) -> None:
+        """Wait for outstanding cursors, then close every connection (reopened lazily)."""
+        with self._cond:
+            self._drain_locked()
+
+
+_POOLS: dict[str, DuckDBConnectionPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_connection_pool(duckdb_path: str) -> DuckDBConnectionPool:
+    """Return the process-wide pool for a DuckDB file."""
+    key = os.path.abspath(duckdb_path)
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = DuckDBConnectionPool(key)
+            _POOLS[key] = pool
+        return pool
+
+
+def close_connection_pool(duckdb_path: str | None) -> None:
+    """Release pooled read-only connections so this process can open the file for writing."""
+    if not duckdb_path:
+        return
+    with _POOLS_LOCK:
+        pool = _POOLS.get(os.path.abspath(duckdb_path))
+    if pool is not None:
+        pool.close()
+
+
+@contextmanager
+def read_connection(duckdb_path: str) -> Iterator[duckdb.DuckDBPyConnection]:
+    """Yield a read-only DuckDB connection, pooled unless DUCKDB_POOL_ENABLED is false."""
+    if POOL_ENABLED:
+        with get_connection_pool(duckdb_path).connection() as con:
+            yield con
+    else:
+        with duckdb.connect(duckdb_path, read_only=True) as con:
+            yield con
+
+
+@contextmanager
+def write_connection(duckdb_path: str) -> Iterator[duckdb.DuckDBPyConnection]:
+    """
+    Yield a read-write DuckDB connection once every pooled reader has let go of the file.
+
+    A write-intent marker next to the database file asks the pools of all processes
+    (e.g. web workers) to close and hold off until the write is done; opening is retried
+    for up to DUCKDB_WRITE_LOCK_TIMEOUT seconds before the lock error is raised.
+    """
+    intent = write_intent_path(duckdb_path)
+    intent.touch()
+    try:
+        close_connection_pool(duckdb_path)
+        deadline = time.monotonic() + WRITE_LOCK_TIMEOUT_SECONDS
+        while True:
+            try:
+                con = duckdb.connect(duckdb_path)
+                break
+            except duckdb.IOException as exc:
+                if "lock" not in str(exc).lower() or time.monotonic() >= deadline:
+                    raise
+                time.sleep(WRITE_LOCK_RETRY_SECONDS)
+        with con:
+            yield con
+    finally:
+        intent.unlink(missing_ok=True)
+
+
+def shadow_table_name(table_name: str) -> str:
+    return f"{table_name}{SHADOW_SUFFIX}"
+
+
+def staging_path(duckdb_path: str, name: str) -> Path:
+    """
+    File or directory under ``<duckdb_path>.staging`` for data a writer computes before it
+    takes the write lock (the lock is then only held to load it and swap it in).
+    """
+    return Path(f"{duckdb_path}{STAGING_SUFFIX}") / name
+
+
+def enum_select_sql(con: duckdb.DuckDBPyConnection, relation: str) -> str:
+    """
+    `SELECT *` over ``relation`` with the CLAIMS_NORMALIZED_ENUM_TYPES columns cast to the
+    ENUM types of the connection's database.
+
+    Parquet files and tables of another attached database carry the values but not these
+    named types, which `DataLoader.equals_sql` filters rely on. Types the database does not
+    have are left alone.
+    """
+    columns = {row[0] for row in con.execute(f"DESCRIBE SELECT * FROM {relation}").fetchall()}
+    types = {
+        row[0]
+        for row in con.execute(
+            "SELECT type_name FROM duckdb_types() WHERE database_name = current_database()"
+        ).fetchall()
+    }
+    casts = [
+        f"CAST({column} AS {enum_type}) AS {column}"
+        for column, enum_type in CLAIMS_NORMALIZED_ENUM_TYPES.items()
+        if column in columns and enum_type in types
+    ]
+    replace = f" REPLACE ({', '.join(casts)})" if casts else ""
+    return f"SELECT *{replace} FROM {relation}"
+
+
+def swap_in_shadow_tables(
+    con: duckdb.DuckDBPyConnection, tables: Mapping[str, str], indexes: Sequence[str] = ()
+) -> None:
+    """
+    Replace each live table with its fully built shadow (live name -> shadow name).
+
+    Drop + rename of every pair happens in one transaction, so readers see either all old
+    tables or all new ones, never a missing or half-filled table. DuckDB cannot rename a
+    table that has indexes, so ``indexes`` (CREATE INDEX statements on the live names) run
+    after the renames, inside the same transaction.
+    """
+    con.execute("BEGIN TRANSACTION")
+    try:
+        for live, shadow in tables.items():
+            con.execute(f"DROP TABLE IF EXISTS {live}")
+            con.execute(f"ALTER TABLE {shadow} RENAME TO {live}")
+        for index_sql in indexes:
+            con.execute(index_sql)
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+
+def decode_enums(df: pd.DataFrame) -> pd.DataFrame:
+    """Turn categorical columns (DuckDB ENUMs) back into plain object columns, in place."""
+    for column in df.columns[df.dtypes == "category"]:
+        values = df[column].astype(object)
+        df[column] = values.where(values.notna(), None) if values.hasnans else values
+    return df
+
+
+def export_parquet(con: duckdb.DuckDBPyConnection, relation: str, path: Path) -> None:
+    """COPY a table/subquery to Parquet via a temp file renamed into place (atomic for readers)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    escaped = str(tmp_path).replace("'", "''")
+    con.execute(f"COPY {relation} TO '{escaped}' (FORMAT PARQUET)")
+    os.replace(tmp_path, path)
+
 
 class DataLoader:
     """Simple accessor for analytics DuckDB/parquet outputs."""
@@ -29,12 +395,15 @@ class DataLoader:
         duckdb_path: Optional[str] = None,
         config_path: Path = PIPELINE_CONFIG_PATH,
     ) -> None:
-        self._config = self._load_config(config_path)
+        self.config_path = Path(config_path)
+        self._config = self._load_config(self.config_path)
         env_duckdb = os.getenv("DUCKDB_PATH")
         self.duckdb_path = duckdb_path or env_duckdb or self._config.get("duckdb_path")
         output_cfg = self._config.get("output", {})
         self.parquet_dir = Path(output_cfg.get("parquet_dir", "instance/data"))
         self.table_name = output_cfg.get("table_name", "claims_normalized")
+        self._enum_types: set[str] = set()
+        self._enum_types_version: str | None = None
 
     @staticmethod
     def _load_config(path: Path) -> dict:
@@ -75,7 +444,7 @@ class DataLoader:
                     continue
                 if not self._is_safe_column_name(column):
                     raise ValueError(f"Invalid column name in filters: {column}")
-                conditions.append(f"{column} = ?")
+                conditions.append(self.equals_sql(column))
                 params.append(value)
             if conditions:
                 where_clause = "WHERE " + " AND ".join(conditions)
@@ -84,19 +453,48 @@ class DataLoader:
 
         query = f"SELECT {cols} FROM {self.table_name} {where_clause} {limit_clause};"
         query = " ".join(query.split())
-        with duckdb.connect(self.duckdb_path, read_only=True) as con:
-            df = con.execute(query, params).fetchdf()
+        with read_connection(self.duckdb_path) as con:
+            df = decode_enums(con.execute(query, params).fetchdf())
 
         if validate:
             validate_claims_normalized(df, required_columns)
         return df
 
+    def get_claim(
+        self,
+        claim_id: str,
+        columns: Optional[Sequence[str]] = None,
+        table_name: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Point lookup of one claim by ``claim_id``, served by the table's unique claim_id index.
+
+        Args:
+            claim_id: claim to fetch
+            columns: optional subset of columns
+            table_name: table to read (default claims_normalized), e.g. claims_risk_ranked
+
+        Returns:
+            pandas.DataFrame with one row, or no rows when the claim does not exist.
+        """
+        if not self.duckdb_path or not Path(self.duckdb_path).exists():
+            raise FileNotFoundError(f"DuckDB file not found: {self.duckdb_path}")
+
+        table = table_name or self.table_name
+        for name in [table, *(columns or [])]:
+            if not self._is_safe_column_name(name):
+                raise ValueError(f"Invalid identifier in claim lookup: {name}")
+        cols = ", ".join(columns) if columns else "*"
+        with read_connection(self.duckdb_path) as con:
+            df = con.execute(f"SELECT {cols} FROM {table} WHERE claim_id = ?", [claim_id]).fetchdf()
+        return decode_enums(df)
+
     def load_claims_parquet(self) -> pd.DataFrame:
         """Load claims_normalized parquet output (full dataset) into pandas."""
         parquet_path = self.parquet_dir / f"{self.table_name}.parquet"
         if not parquet_path.exists():
             raise FileNotFoundError(f"Parquet not found at {parquet_path}")
-        return pd.read_parquet(parquet_path)
+        return decode_enums(pd.read_parquet(parquet_path))
 
     @staticmethod
     def _is_safe_column_name(column: str) -> bool:
@@ -119,14 +517,70 @@ class DataLoader:
             raise FileNotFoundError("DuckDB path not configured.")
 
         table = table_name
-        with duckdb.connect(self.duckdb_path) as con:
-            if mode == "replace":
-                con.execute(f"DROP TABLE IF EXISTS {table}")
+        with write_connection(self.duckdb_path) as con:
             con.register("df_view", df)
-            con.execute(f"CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM df_view LIMIT 0")
-            con.execute(f"INSERT INTO {table} SELECT * FROM df_view")
+            if mode == "replace":
+                shadow = shadow_table_name(table)
+                con.execute(f"CREATE OR REPLACE TABLE {shadow} AS SELECT * FROM df_view")
+                swap_in_shadow_tables(con, {table: shadow})
+            else:
+                con.execute(f"CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM df_view LIMIT 0")
+                con.execute(f"INSERT INTO {table} SELECT * FROM df_view")
             con.unregister("df_view")
 
+    def replace_table(
+        self,
+        table_name: str,
+        select_sql: str,
+        params: Optional[Sequence[object]] = None,
+        indexes: Sequence[str] = (),
+    ) -> None:
+        """
+        Rebuild a table from a SELECT into a shadow table, then swap it in atomically.
+
+        The SELECT runs on a read-only connection into a staged Parquet file (see
+        `staging_path`), so pooled readers are only held off while that file is loaded into
+        the shadow table and swapped in. ``indexes`` are CREATE INDEX statements against
+        ``table_name``, created as part of the swap.
+        """
+        if not self.duckdb_path:
+            raise FileNotFoundError("DuckDB path not configured.")
+
+        shadow = shadow_table_name(table_name)
+        staged = staging_path(self.duckdb_path, f"{table_name}.parquet")
+        staged.parent.mkdir(parents=True, exist_ok=True)
+        escaped = str(staged).replace("'", "''")
+        try:
+            with read_connection(self.duckdb_path) as con:
+                con.execute(f"COPY ({select_sql}) TO '{escaped}' (FORMAT PARQUET)", params or [])
+            with write_connection(self.duckdb_path) as con:
+                select_staged = enum_select_sql(con, f"read_parquet('{escaped}')")
+                con.execute(f"CREATE OR REPLACE TABLE {shadow} AS {select_staged}")
+                swap_in_shadow_tables(con, {table_name: shadow}, indexes=indexes)
+        finally:
+            staged.unlink(missing_ok=True)
+
+    def export_parquet(self, table_name: str, path: Path) -> None:
+        """Export a DuckDB table to Parquet, replacing the previous file atomically."""
+        if not self.duckdb_path:
+            raise FileNotFoundError("DuckDB path not configured.")
+
+        with read_connection(self.duckdb_path) as con:
+            export_parquet(con, table_name, path)
+
+    def table_exists(self, table_name: str) -> bool:
+        """Return True when the table exists in the DuckDB main schema."""
+        if not self.duckdb_path or not Path(self.duckdb_path).exists():
+            return False
+
+        query = """
+            SELECT 1
+            FROM information_schema.tables
+            WHERE table_schema = 'main' AND table_name = ?
+        """
+        with read_connection(self.duckdb_path) as con:
+            return con.execute(query, [table_name]).fetchone() is not None
+
     def read_table_from_duckdb(self, table_name: str) -> pd.DataFrame | None:
         """Return table as DataFrame if exists, otherwise None."""
         if not self.duckdb_path:
@@ -137,16 +591,98 @@ class DataLoader:
             FROM information_schema.tables
             WHERE table_schema = 'main' AND table_name = ?
         """
-        with duckdb.connect(self.duckdb_path, read_only=True) as con:
+        with read_connection(self.duckdb_path) as con:
             exists = con.execute(query, [table_name]).fetchone()
             if not exists:
                 return None
-            return con.execute(f"SELECT * FROM {table_name}").fetchdf()
+            return decode_enums(con.execute(f"SELECT * FROM {table_name}").fetchdf())
+
+    def execute(self, sql: str, params: Optional[Sequence[object]] = None) -> None:
+        """Execute a write statement (DDL/DML) against DuckDB."""
+        if not self.duckdb_path:
+            raise FileNotFoundError("DuckDB path not configured.")
+
+        with write_connection(self.duckdb_path) as con:
+            con.execute(sql, params or [])
 
     def query(self, sql: str, params: Optional[Sequence[object]] = None) -> pd.DataFrame:
         """Execute an arbitrary SQL query against DuckDB and return the results."""
         if not self.duckdb_path or not Path(self.duckdb_path).exists():
             raise FileNotFoundError(f"DuckDB file not found: {self.duckdb_path}")
 
-        with duckdb.connect(self.duckdb_path, read_only=True) as con:
-            return con.execute(sql, params or []).fetchdf()
+        with read_connection(self.duckdb_path) as con:
+            return decode_enums(con.execute(sql, params or []).fetchdf())
+
+    def data_version(self) -> str:
+        """
+        Token identifying the current content of the DuckDB file.
+
+        Derived from the path and the file (and WAL) metadata, so every process sharing
+        the database computes the same value, and any ETL or refresh write yields a new one.
+        """
+        if not self.duckdb_path:
+            return "none"
+        signature = file_signature(str(self.duckdb_path))
+        parts = ["-" if part is None else ":".join(str(value) for value in part) for part in signature]
+        return "|".join([str(self.duckdb_path), *parts])
+
+    def enum_types(self) -> set[str]:
+        """Names of the CLAIMS_NORMALIZED_ENUM_TYPES the ETL has created in the database."""
+        expected = set(CLAIMS_NORMALIZED_ENUM_TYPES.values())
+        # Types are never dropped once created, so only an incomplete answer is re-checked,
+        # and only once the database has been written to since it was fetched.
+        if self._enum_types >= expected or not self.duckdb_path or not Path(self.duckdb_path).exists():
+            return self._enum_types
+        version = self.data_version()
+        if version == self._enum_types_version:
+            return self._enum_types
+        placeholders = ", ".join("?" for _ in expected)
+        with read_connection(self.duckdb_path) as con:
+            rows = con.execute(
+                f"SELECT type_name FROM duckdb_types() WHERE type_name IN ({placeholders})",
+                sorted(expected),
+            ).fetchall()
+        self._enum_types = {row[0] for row in rows}
+        self._enum_types_version = version
+        return self._enum_types
+
+    def equals_sql(self, column: str) -> str:
+        """
+        `column = ?` filter clause for claims_normalized.
+
+        ENUM columns are compared with the parameter cast to their type: comparing an ENUM
+        with a VARCHAR casts the column instead and loses row-group pruning. Values outside
+        the ENUM cast to NULL and match nothing.
+        """
+        enum_type = CLAIMS_NORMALIZED_ENUM_TYPES.get(column)
+        if enum_type is not None and enum_type in self.enum_types():
+            return f"{column} = TRY_CAST(? AS {enum_type})"
+        return f"{column} = ?"
+
+
+_LOADERS: dict[tuple, DataLoader] = {}
+_LOADERS_LOCK = threading.Lock()
+
+
+def get_data_loader(duckdb_path: Optional[str] = None, config_path: Path = PIPELINE_CONFIG_PATH) -> DataLoader:
+    """
+    Return a shared DataLoader, so the pipeline config is parsed once per process.
+
+    Loaders are keyed on the resolved config path, its mtime and the DUCKDB_PATH override;
+    editing the config or changing the environment yields a freshly built loader.
+    """
+    config_path = Path(config_path)
+    try:
+        mtime = config_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Config not found at {config_path}") from None
+    resolved = str(config_path.resolve())
+    key = (resolved, mtime, duckdb_path, os.getenv("DUCKDB_PATH"))
+    with _LOADERS_LOCK:
+        loader = _LOADERS.get(key)
+        if loader is None:
+            for stale in [k for k in _LOADERS if k[0] == resolved and k[1] != mtime]:
+                del _LOADERS[stale]
+            loader = DataLoader(duckdb_path=duckdb_path, config_path=config_path)
+            _LOADERS[key] = loader
+        return loader
@@ -8,7 +8,7 @@ from datetime import datetime, timezone
 from typing import Any, Mapping, Sequence
 from collections import Counter
 
-import duckdb
+from .data_access import write_connection
 
 
 @dataclass(frozen=True)
@@ -24,7 +24,7 @@ def _connect(duckdb_path: str):
     if not path:
         raise FileNotFoundError("DuckDB path is not configured for metadata logging.")
     os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
-    return duckdb.connect(path)
+    return write_connection(path)
 
 
 def ensure_metadata_tables(duckdb_path: str | None) -> None:
@@ -53,6 +53,19 @@ def ensure_metadata_tables(duckdb_path: str | None) -> None:
             );
             """
         )
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS etl_source_files (
+                path TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                size_bytes BIGINT,
+                mtime_ns BIGINT,
+                sha256 TEXT,
+                run_id TEXT,
+                ingested_at TIMESTAMP
+            );
+            """
+        )
         con.execute(
             """
             CREATE TABLE IF NOT EXISTS ml_model_versions (
@@ -74,11 +87,31 @@ def ensure_metadata_tables(duckdb_path: str | None) -> None:
         )
 
         # Handle schema evolution: add missing columns if table already existed.
+        con.execute(
+            """
+            ALTER TABLE etl_runs ADD COLUMN IF NOT EXISTS mode TEXT;
+            """
+        )
         con.execute(
             """
             ALTER TABLE ml_model_versions ADD COLUMN IF NOT EXISTS top_k_snapshot TEXT;
             """
         )
+        con.execute(
+            """
+            ALTER TABLE ml_model_versions ADD COLUMN IF NOT EXISTS ruleset_version TEXT;
+            """
+        )
+        con.execute(
+            """
+            ALTER TABLE ml_model_versions ADD COLUMN IF NOT EXISTS ranked_rows BIGINT;
+            """
+        )
+        con.execute(
+            """
+            ALTER TABLE ml_model_versions ADD COLUMN IF NOT EXISTS refresh_mode TEXT;
+            """
+        )
 
 
 def record_ruleset_version(
@@ -104,13 +137,43 @@ def record_ruleset_version(
         )
 
 
+@dataclass(frozen=True)
+class SourceFile:
+    """One ETL input file as tracked in etl_source_files."""
+
+    source: str
+    path: str
+    size_bytes: int
+    mtime_ns: int
+    sha256: str
+
+
+def load_source_manifest(duckdb_path: str | None) -> dict[str, SourceFile]:
+    """Source files ingested so far, keyed by path (empty when nothing was tracked yet)."""
+    if not duckdb_path or not os.path.exists(duckdb_path):
+        return {}
+
+    ensure_metadata_tables(duckdb_path)
+    with _connect(duckdb_path) as con:
+        rows = con.execute(
+            "SELECT source, path, size_bytes, mtime_ns, sha256 FROM etl_source_files"
+        ).fetchall()
+    return {row[1]: SourceFile(*row) for row in rows}
+
+
 def record_etl_run(
     duckdb_path: str | None,
     ruleset_version: str | None,
     rows_processed: int,
     notes: str | None = None,
+    mode: str = "full",
+    source_files: Sequence[SourceFile] = (),
 ) -> RunMetadata | None:
-    """Persist ETL run metadata."""
+    """
+    Persist ETL run metadata and the source files it ingested.
+
+    A full run replaces the source manifest; an incremental run adds its new files to it.
+    """
     if not duckdb_path:
         return None
 
@@ -119,13 +182,29 @@ def record_etl_run(
     executed_at = datetime.now(tz=timezone.utc)
 
     with _connect(duckdb_path) as con:
+        con.execute("BEGIN TRANSACTION")
         con.execute(
             """
-            INSERT INTO etl_runs (run_id, executed_at, ruleset_version, rows_processed, notes)
-            VALUES (?, ?, ?, ?, ?);
+            INSERT INTO etl_runs (run_id, executed_at, ruleset_version, rows_processed, notes, mode)
+            VALUES (?, ?, ?, ?, ?, ?);
             """,
-            [run_id, executed_at, ruleset_version, rows_processed, notes],
+            [run_id, executed_at, ruleset_version, rows_processed, notes, mode],
         )
+        if mode == "full":
+            con.execute("DELETE FROM etl_source_files")
+        if source_files:
+            con.executemany(
+                """
+                INSERT OR REPLACE INTO etl_source_files
+                    (path, source, size_bytes, mtime_ns, sha256, run_id, ingested_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?);
+                """,
+                [
+                    [item.path, item.source, item.size_bytes, item.mtime_ns, item.sha256, run_id, executed_at]
+                    for item in source_files
+                ],
+            )
+        con.execute("COMMIT")
 
     return RunMetadata(run_id=run_id, executed_at=executed_at)
 
@@ -205,8 +284,11 @@ def record_ml_refresh(
     rows_scored: int,
     summary: Mapping[str, Any] | None,
     top_records: Sequence[Mapping[str, Any]] | None = None,
+    ruleset_version: str | None = None,
+    ranked_rows: int | None = None,
+    refresh_mode: str | None = None,
 ) -> RunMetadata | None:
-    """Persist ML refresh metadata along with Top-K snapshot."""
+    """Persist ML refresh metadata along with Top-K snapshot, risk-ranked table size and refresh mode."""
     if not duckdb_path:
         return None
 
@@ -238,9 +320,12 @@ def record_ml_refresh(
                 top_k_los_le_1_ratio,
                 top_k_risk_score_mean,
                 top_k_ml_score_mean,
-                top_k_snapshot
+                top_k_snapshot,
+                ruleset_version,
+                ranked_rows,
+                refresh_mode
             )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
             """,
             [
                 run_id,
@@ -256,6 +341,9 @@ def record_ml_refresh(
                 _to_python(summary.get("risk_score_top_k_mean") if summary else None),
                 _to_python(summary.get("ml_score_top_k_mean") if summary else None),
                 _dict_to_json(snapshot_payload),
+                ruleset_version,
+                ranked_rows,
+                refresh_mode,
             ],
         )
 
@@ -37,6 +37,20 @@ CLAIMS_NORMALIZED_REQUIRED_COLUMNS: tuple[str, ...] = (
     "cost_zscore",
 )
 
+# Filter columns the ETL stores as DuckDB ENUMs (column -> type name, see transform.sql).
+CLAIMS_NORMALIZED_ENUM_TYPES: dict[str, str] = {
+    "province_name": "province_enum",
+    "severity_group": "severity_enum",
+    "service_type": "service_type_enum",
+    "facility_class": "facility_class_enum",
+}
+
+
+def canonical_service_type(value: object) -> str:
+    """Spelling of a service_type filter value as stored by the ETL (`RJTL`, `RITL`, `Unknown`)."""
+    text = str(value).strip().upper()
+    return "Unknown" if text == "UNKNOWN" else text
+
 
 def find_missing_columns(df: pd.DataFrame, required: Sequence[str]) -> list[str]:
     """Return list of columns missing from dataframe."""
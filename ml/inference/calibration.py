@@ -0,0 +1,76 @@
+"""Score calibration fitted once per model and stored next to the model artefacts."""
+
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+CALIBRATION_DIR = Path("ml/artifacts")
+CALIBRATION_METHOD = "minmax"
+EPSILON = 1e-8
+
+
+def calibration_path(model_version: str, directory: Path | None = None) -> Path:
+    return (directory or CALIBRATION_DIR) / f"score_calibration_{model_version}.json"
+
+
+@dataclass(frozen=True)
+class ScoreCalibration:
+    """
+    Min-max calibration of raw Isolation Forest scores.
+
+    Uses the same formula as the historical per-batch normalisation, but with bounds
+    fitted on a full refresh, so a single claim, a page and a chunk all land on the same
+    scale. Scores outside the fitted range are clipped to [0, 1].
+    """
+
+    model_version: str
+    score_min: float
+    score_max: float
+    rows: int
+    fitted_at: str
+    method: str = CALIBRATION_METHOD
+
+    @classmethod
+    def fit(cls, model_version: str, score_min: float, score_max: float, rows: int) -> "ScoreCalibration":
+        return cls(
+            model_version=model_version,
+            score_min=float(score_min),
+            score_max=float(score_max),
+            rows=int(rows),
+            fitted_at=datetime.now(timezone.utc).isoformat(),
+        )
+
+    def normalize(self, raw_scores: np.ndarray) -> np.ndarray:
+        scaled = (np.asarray(raw_scores, dtype=np.float64) - self.score_min) / (
+            self.score_max - self.score_min + EPSILON
+        )
+        return np.clip(scaled, 0.0, 1.0)
+
+    def sql_expression(self, column: str = "ml_score") -> tuple[str, list[float]]:
+        """DuckDB expression (plus parameters) equivalent to `normalize`."""
+        sql = f"LEAST(GREATEST(({column} - ?::DOUBLE) / (?::DOUBLE - ?::DOUBLE + ?::DOUBLE), 0.0), 1.0)"
+        return sql, [self.score_min, self.score_max, self.score_min, EPSILON]
+
+    def save(self, directory: Path | None = None) -> Path:
+        path = calibration_path(self.model_version, directory)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(asdict(self), indent=2))
+        tmp_path.replace(path)
+        return path
+
+
+def load_calibration(model_version: str, directory: Path | None = None) -> ScoreCalibration | None:
+    """Return the stored calibration for the model, or None when it has not been fitted yet."""
+    path = calibration_path(model_version, directory)
+    if not path.exists():
+        return None
+    payload = json.loads(path.read_text())
+    if payload.get("model_version") != model_version or payload.get("method") != CALIBRATION_METHOD:
+        return None
+    return ScoreCalibration(**payload)
@@ -0,0 +1,91 @@
+"""Precompiled feature encoder turning claims into the model's float32 design matrix."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+MISSING_CATEGORY = "UNK"
+
+
+@dataclass(frozen=True)
+class FeatureEncoder:
+    """
+    Encode claims without `pd.get_dummies`, matching the training layout column for column.
+
+    Numeric features are standardised with the fitted scaler parameters (same float64
+    arithmetic as `StandardScaler.transform`) and categorical values are looked up in a
+    category -> column index map built from `feature_columns.json`. Categories unseen at
+    training time stay all-zero, exactly like the dummies path dropping unexpected columns.
+    """
+
+    feature_columns: tuple[str, ...]
+    numeric_features: tuple[str, ...]
+    numeric_positions: np.ndarray
+    mean: np.ndarray | None
+    scale: np.ndarray | None
+    category_maps: tuple[tuple[str, dict[str, int]], ...]
+
+    @classmethod
+    def from_artifacts(
+        cls,
+        feature_columns: list[str],
+        numeric_features: list[str],
+        categorical_features: list[str],
+        scaler,
+    ) -> "FeatureEncoder":
+        position = {name: idx for idx, name in enumerate(feature_columns)}
+        # Numeric features missing from the training layout are scaled then dropped.
+        numeric_positions = np.array([position.get(name, -1) for name in numeric_features], dtype=np.int64)
+
+        category_maps = []
+        for feature in categorical_features:
+            prefix = f"{feature}_"
+            mapping = {name[len(prefix):]: idx for name, idx in position.items() if name.startswith(prefix)}
+            category_maps.append((feature, mapping))
+
+        return cls(
+            feature_columns=tuple(feature_columns),
+            numeric_features=tuple(numeric_features),
+            numeric_positions=numeric_positions,
+            mean=getattr(scaler, "mean_", None) if getattr(scaler, "with_mean", True) else None,
+            scale=getattr(scaler, "scale_", None) if getattr(scaler, "with_std", True) else None,
+            category_maps=tuple(category_maps),
+        )
+
+    def transform(self, df: pd.DataFrame) -> np.ndarray:
+        """Return a float32 matrix of shape (len(df), len(feature_columns))."""
+        missing_numeric = [col for col in self.numeric_features if col not in df.columns]
+        if missing_numeric:
+            raise KeyError(f"Kolom numerik hilang pada dataframe inference: {missing_numeric}")
+
+        n_rows = len(df)
+        # Column-major: filled column by column, and it is the layout sklearn's tree
+        # traversal reads fastest (the same layout it derives from a DataFrame).
+        X = np.zeros((n_rows, len(self.feature_columns)), dtype=np.float32, order="F")
+
+        numeric = df[list(self.numeric_features)].fillna(0).to_numpy(dtype=np.float64, copy=True)
+        if self.mean is not None:
+            numeric -= self.mean
+        if self.scale is not None:
+            numeric /= self.scale
+        keep = self.numeric_positions >= 0
+        X[:, self.numeric_positions[keep]] = numeric[:, keep]
+
+        rows = np.arange(n_rows)
+        for feature, mapping in self.category_maps:
+            if feature not in df.columns:
+                raise KeyError(f"Kolom kategorikal hilang pada dataframe inference: {feature}")
+            codes, uniques = pd.factorize(df[feature], use_na_sentinel=True)
+            # codes == -1 marks nulls, which the dummies path filled with "UNK".
+            lookup = np.array(
+                [mapping.get(str(value), -1) for value in uniques] + [mapping.get(MISSING_CATEGORY, -1)],
+                dtype=np.int64,
+            )
+            columns = lookup[codes]
+            hit = columns >= 0
+            X[rows[hit], columns[hit]] = 1.0
+
+        return X
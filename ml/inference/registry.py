@@ -0,0 +1,154 @@
+"""Process-wide registry holding one loaded MLScorer, hot-swapped when the model changes."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from .calibration import calibration_path
+from .scorer import MODEL_META_FILE, MLScorer, load_model_version
+
+logger = logging.getLogger(__name__)
+
+CHECK_INTERVAL_SECONDS = float(os.getenv("MODEL_REGISTRY_CHECK_SECONDS", "2"))
+
+
+class ModelRegistry:
+    """
+    Load the scorer artefacts once and share the instance between requests.
+
+    `get_scorer` re-checks `model_meta.json` at most every ``check_interval`` seconds; when
+    its `model_version` changes, the first request to notice loads the new artefacts and
+    swaps them in with a single reference assignment while other requests keep using the
+    current model. A failed reload keeps the old model. A re-fitted score calibration for
+    the same model version is picked up without reloading the model.
+    """
+
+    def __init__(self, meta_path: Path = MODEL_META_FILE, check_interval: float = CHECK_INTERVAL_SECONDS) -> None:
+        self.meta_path = Path(meta_path)
+        self.check_interval = check_interval
+        self._scorer: MLScorer | None = None
+        self._signature: tuple | None = None
+        self._next_check = 0.0
+        self._load_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats: dict[str, Any] = {
+            "model_version": None,
+            "calibrated": False,
+            "loaded_at": None,
+            "loads": 0,
+            "load_ms": None,
+            "reload_errors": 0,
+            "last_error": None,
+            "requests": 0,
+            "acquire_ms_total": 0.0,
+            "acquire_ms_last": None,
+        }
+
+    def _file_signature(self, model_version: str | None) -> tuple:
+        signature = []
+        paths = [self.meta_path] + ([calibration_path(model_version)] if model_version else [])
+        for path in paths:
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                signature.append(None)
+                continue
+            signature.append((st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+
+    def _load(self) -> MLScorer:
+        started = time.perf_counter()
+        scorer = MLScorer()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._scorer = scorer
+        self._signature = self._file_signature(scorer.model_version)
+        with self._stats_lock:
+            self._stats.update(
+                model_version=scorer.model_version,
+                calibrated=scorer.calibration is not None,
+                loaded_at=datetime.now(timezone.utc).isoformat(),
+                load_ms=round(elapsed_ms, 2),
+                loads=self._stats["loads"] + 1,
+            )
+        logger.info("Loaded model %s in %.1f ms", scorer.model_version, elapsed_ms)
+        return scorer
+
+    def _maybe_reload(self, scorer: MLScorer) -> MLScorer:
+        now = time.monotonic()
+        if now < self._next_check:
+            return scorer
+        self._next_check = now + self.check_interval
+        signature = self._file_signature(scorer.model_version)
+        if signature == self._signature:
+            return scorer
+        if not self._load_lock.acquire(blocking=False):
+            # Another request is already loading the new model; keep serving the current one.
+            return scorer
+        try:
+            if self._scorer is not scorer:
+                return self._scorer
+            if load_model_version(self.meta_path) == scorer.model_version:
+                scorer.reload_calibration()
+                self._signature = signature
+                with self._stats_lock:
+                    self._stats["calibrated"] = scorer.calibration is not None
+                return scorer
+            return self._load()
+        except Exception as exc:  # noqa: BLE001 - keep serving the previous model
+            logger.warning("Model reload failed, keeping %s: %s", scorer.model_version, exc)
+            with self._stats_lock:
+                self._stats["reload_errors"] += 1
+                self._stats["last_error"] = str(exc)
+            return scorer
+        finally:
+            self._load_lock.release()
+
+    def get_scorer(self) -> MLScorer:
+        """Return the shared scorer, loading it on first use (raises FileNotFoundError)."""
+        started = time.perf_counter()
+        scorer = self._scorer
+        if scorer is None:
+            with self._load_lock:
+                scorer = self._scorer or self._load()
+        else:
+            scorer = self._maybe_reload(scorer)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self._stats["requests"] += 1
+            self._stats["acquire_ms_total"] += elapsed_ms
+            self._stats["acquire_ms_last"] = round(elapsed_ms, 3)
+        return scorer
+
+    def preload(self) -> bool:
+        """Load the model eagerly (e.g. at worker start); returns False if artefacts are missing."""
+        try:
+            self.get_scorer()
+        except FileNotFoundError as exc:
+            logger.warning("Model preload skipped: %s", exc)
+            return False
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        with self._stats_lock:
+            payload = dict(self._stats)
+        total_ms = payload.pop("acquire_ms_total")
+        payload["acquire_ms_avg"] = round(total_ms / payload["requests"], 3) if payload["requests"] else None
+        return payload
+
+
+_REGISTRY = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    return _REGISTRY
+
+
+def get_scorer() -> MLScorer:
+    """Shortcut for the process-wide scorer."""
+    return _REGISTRY.get_scorer()
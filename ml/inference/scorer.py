@@ -2,13 +2,19 @@
 
 from __future__ import annotations
 
+import json
+import warnings
 from pathlib import Path
 from typing import Optional
 
 import joblib
+import numpy as np
 import pandas as pd
 
-from ml.common.data_access import DataLoader
+from ml.common.data_access import get_data_loader
+
+from .calibration import ScoreCalibration, load_calibration
+from .encoder import FeatureEncoder
 
 ARTIFACT_DIR = Path("ml/artifacts")
 MODEL_FILE = ARTIFACT_DIR / "isolation_forest_iso_v2.pkl"
@@ -17,6 +23,14 @@ FEATURE_COLUMNS_FILE = ARTIFACT_DIR / "feature_columns.json"
 MODEL_META_FILE = ARTIFACT_DIR / "model_meta.json"
 
 
+def load_model_version(meta_file: Path = MODEL_META_FILE) -> str:
+    """Read the active model_version from model_meta.json without loading the model."""
+    if not meta_file.exists():
+        return "unknown"
+    with meta_file.open() as f:
+        return json.load(f).get("model_version", "unknown")
+
+
 class MLScorer:
     """Load model artefak dan menghasilkan skor anomali klaim."""
 
@@ -64,6 +78,14 @@ class MLScorer:
             self.numeric_features = self.model_meta.get("numeric_features", self.numeric_features)
             self.categorical_features = self.model_meta.get("categorical_features", self.categorical_features)
 
+        self.calibration: ScoreCalibration | None = load_calibration(self.model_version)
+
+        self.encoder: FeatureEncoder | None = None
+        if self.feature_columns:
+            self.encoder = FeatureEncoder.from_artifacts(
+                self.feature_columns, self.numeric_features, self.categorical_features, self.scaler
+            )
+
     def _prepare_features(self, df: pd.DataFrame) -> pd.DataFrame:
         missing_numeric = [col for col in self.numeric_features if col not in df.columns]
         if missing_numeric:
@@ -94,12 +116,31 @@ class MLScorer:
 
         return X
 
+    def _feature_matrix(self, df: pd.DataFrame) -> np.ndarray | pd.DataFrame:
+        """Encode via the precompiled encoder, falling back to dummies without feature_columns."""
+        if self.encoder is None:
+            return self._prepare_features(df)
+        return self.encoder.transform(df)
+
     def score(self, limit: Optional[int] = None) -> pd.DataFrame:
-        loader = DataLoader()
+        loader = get_data_loader()
         df = loader.load_claims_normalized(limit=limit)
 
         return self.score_dataframe(df)
 
+    def score_raw(self, df: pd.DataFrame) -> np.ndarray:
+        """Return raw anomaly scores (higher = more anomalous) without batch normalisation."""
+        X = self._feature_matrix(df)
+        with warnings.catch_warnings():
+            # The encoder matrix follows feature_columns order, so skipping the name check is safe.
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            return -self.model.decision_function(X)
+
+    @property
+    def input_columns(self) -> list[str]:
+        """Columns of claims_normalized needed to score a claim."""
+        return ["claim_id", *self.numeric_features, *self.categorical_features]
+
     def score_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Score klaim menggunakan dataframe yang sudah dimuat di luar DataLoader.
@@ -113,8 +154,10 @@ class MLScorer:
         if df.empty:
             return pd.DataFrame(columns=["claim_id", "ml_score", "ml_score_normalized", "model_version"])
 
-        X = self._prepare_features(df)
-        scores = -self.model.decision_function(X)
+        return self.build_scores_frame(df, self.score_raw(df))
+
+    def build_scores_frame(self, df: pd.DataFrame, scores: np.ndarray) -> pd.DataFrame:
+        """Attach normalised scores; uses the stored calibration, else min-max over this batch."""
         df_scores = pd.DataFrame(
             {
                 "claim_id": df["claim_id"].values,
@@ -123,11 +166,17 @@ class MLScorer:
             index=df.index,
         )
 
-        min_score, max_score = df_scores["ml_score"].min(), df_scores["ml_score"].max()
-        df_scores["ml_score_normalized"] = (df_scores["ml_score"] - min_score) / (max_score - min_score + 1e-8)
+        if self.calibration is not None:
+            df_scores["ml_score_normalized"] = self.calibration.normalize(scores)
+        else:
+            min_score, max_score = df_scores["ml_score"].min(), df_scores["ml_score"].max()
+            df_scores["ml_score_normalized"] = (df_scores["ml_score"] - min_score) / (max_score - min_score + 1e-8)
         df_scores["model_version"] = self.model_version
         return df_scores
 
+    def reload_calibration(self) -> None:
+        self.calibration = load_calibration(self.model_version)
+
 
 if __name__ == "__main__":
     scorer = MLScorer()
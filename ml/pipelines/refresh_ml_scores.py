@@ -2,56 +2,301 @@
 CLI script untuk merefresh cache skor ML dan mencatat QC snapshot.
 
 Usage:
-    python -m ml.pipelines.refresh_ml_scores --top-k 50 --refresh
+    python -m ml.pipelines.refresh_ml_scores --top-k 50 --chunk-size 200000 --workers 4
+
+Secara default klaim dibaca per Arrow record batch (hanya kolom fitur model) lewat koneksi
+read-only, diskor per chunk (opsional paralel di process pool) dan ditulis bertahap ke file
+Parquet staging di samping file DuckDB, sehingga memori puncak mengikuti ukuran chunk, bukan
+ukuran tabel. Kunci tulis DuckDB baru diambil untuk memuat hasil staging dan menukar tabel,
+jadi API tetap melayani snapshot lama selama scoring. `--chunk-size 0` memakai mode lama
+(seluruh tabel dimuat ke pandas).
+
+Refresh bersifat inkremental bila `claims_ml_scores` sudah diskor dengan model_version
+yang sama: hanya klaim baru atau yang `feature_hash`-nya berubah yang diskor ulang lalu
+di-upsert (`INSERT OR REPLACE`), dan klaim yang hilang dari ETL dihapus. Gunakan `--full`
+untuk memaksa rescore seluruh tabel.
 """
 
 from __future__ import annotations
 
 import argparse
+import multiprocessing
+import os
+import shutil
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
 
 from ml.common import metadata
-from ml.common.data_access import DataLoader
+from ml.common.data_access import (
+    DataLoader,
+    get_data_loader,
+    read_connection,
+    shadow_table_name,
+    staging_path,
+    swap_in_shadow_tables,
+    write_connection,
+)
+from ml.inference.calibration import ScoreCalibration
 from ml.inference.scorer import MLScorer
 
 from app.services import risk_scoring
 
+DEFAULT_CHUNK_SIZE = int(os.getenv("REFRESH_CHUNK_SIZE", "200000"))
+DEFAULT_WORKERS = int(os.getenv("REFRESH_WORKERS", "1"))
+# Directory under the DuckDB staging path holding the raw scores of a run (one Parquet file per chunk).
+STAGING_NAME = risk_scoring.SCORES_CACHE_TABLE
+KEY_COLUMNS = ["claim_id", "feature_hash"]
+
+_WORKER_SCORER: MLScorer | None = None
+
+
+def _init_worker() -> None:
+    global _WORKER_SCORER
+    _WORKER_SCORER = MLScorer()
+
+
+def _score_chunk(chunk: pd.DataFrame) -> tuple[pd.DataFrame, np.ndarray]:
+    assert _WORKER_SCORER is not None, "worker not initialised"
+    return chunk[KEY_COLUMNS], _WORKER_SCORER.score_raw(chunk)
+
+
+def _iter_scored_chunks(
+    chunks: Iterator[pd.DataFrame], scorer: MLScorer, workers: int
+) -> Iterator[tuple[pd.DataFrame, np.ndarray]]:
+    """Yield (claim_id/feature_hash keys, raw_scores) per chunk in input order, keeping at most 2*workers in flight."""
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk[KEY_COLUMNS], scorer.score_raw(chunk)
+        return
+
+    # spawn, not fork: the parent holds an open DuckDB connection with its own threads.
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+        pending: deque[Future] = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_score_chunk, chunk))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _ensure_calibration(scorer: MLScorer, score_min: float, score_max: float, rows: int, recalibrate: bool) -> ScoreCalibration:
+    """Reuse the stored calibration for this model, fitting (and saving) it when missing or requested."""
+    if scorer.calibration is not None and not recalibrate:
+        return scorer.calibration
+    calibration = ScoreCalibration.fit(scorer.model_version, score_min, score_max, rows)
+    path = calibration.save()
+    scorer.calibration = calibration
+    print(f"Fitted score calibration for {scorer.model_version} ({calibration.score_min:.6f}..{calibration.score_max:.6f}) -> {path}")
+    return calibration
+
+
+def _feature_hash_sql(scorer: MLScorer, alias: str = "c") -> str:
+    """Row hash over the model inputs; a changed hash means the claim must be rescored."""
+    # Categoricals are hashed as text so the hash does not depend on VARCHAR vs ENUM storage.
+    columns = [
+        *(f"{alias}.{col}" for col in scorer.numeric_features),
+        *(f"CAST({alias}.{col} AS VARCHAR)" for col in scorer.categorical_features),
+    ]
+    return "hash(" + ", ".join(columns) + ")"
+
+
+def _can_refresh_incrementally(loader: DataLoader, scorer: MLScorer) -> bool:
+    """Incremental only when every cached score comes from this model and carries a feature_hash."""
+    if scorer.calibration is None or not loader.table_exists(risk_scoring.SCORES_CACHE_TABLE):
+        return False
+    columns = loader.query(f"DESCRIBE {risk_scoring.SCORES_CACHE_TABLE}")["column_name"].tolist()
+    if "feature_hash" not in columns:
+        return False
+    stale = loader.query(
+        f"""
+        SELECT COUNT(*) AS n
+        FROM {risk_scoring.SCORES_CACHE_TABLE}
+        WHERE model_version IS DISTINCT FROM ? OR feature_hash IS NULL
+        """,
+        [scorer.model_version],
+    )
+    return int(stale["n"].iloc[0]) == 0
+
+
+def _score_streaming(
+    loader: DataLoader,
+    scorer: MLScorer,
+    chunk_size: int,
+    workers: int,
+    recalibrate: bool = False,
+    incremental: bool = False,
+) -> tuple[int, int]:
+    """
+    Score claims_normalized chunk by chunk into claims_ml_scores; returns (rows scored, rows deleted).
+
+    Claims are read on a read-only connection and raw scores are staged as Parquet files
+    (see `staging_path`), so pooled readers keep being served while the model runs. The
+    write lock is only taken to load the staged scores: ml_score_normalized is computed
+    there in one DuckDB statement from the stored calibration (fitted on this run's min/max
+    when the model has none yet), with the same formula as `ScoreCalibration.normalize`. In
+    incremental mode only new or changed claims are read, scored and upserted.
+    """
+    scores_table = risk_scoring.SCORES_CACHE_TABLE
+    feature_hash = _feature_hash_sql(scorer)
+    # ENUM columns arrive as Arrow dictionaries with unsigned indices, which pandas rejects.
+    input_sql = ", ".join(
+        f"CAST(c.{col} AS VARCHAR) AS {col}" if col in scorer.categorical_features else f"c.{col}"
+        for col in scorer.input_columns
+    )
+    source_sql = f"SELECT {input_sql}, {feature_hash} AS feature_hash FROM {loader.table_name} c"
+    if incremental:
+        source_sql += (
+            f" LEFT JOIN {scores_table} s ON s.claim_id = c.claim_id"
+            f" WHERE s.claim_id IS NULL OR s.feature_hash IS DISTINCT FROM {feature_hash}"
+        )
+
+    staging_dir = staging_path(loader.duckdb_path, STAGING_NAME)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    staging_dir.mkdir(parents=True)
+    try:
+        rows = 0
+        score_min, score_max = np.inf, -np.inf
+        with read_connection(loader.duckdb_path) as con:
+            reader = con.execute(source_sql).fetch_record_batch(chunk_size)
+            chunks = (batch.to_pandas() for batch in reader)
+            for part, (keys, raw_scores) in enumerate(_iter_scored_chunks(chunks, scorer, workers)):
+                keys.assign(ml_score=raw_scores).to_parquet(staging_dir / f"part-{part:05d}.parquet", index=False)
+                rows += len(keys)
+                if len(raw_scores):
+                    score_min = min(score_min, float(raw_scores.min()))
+                    score_max = max(score_max, float(raw_scores.max()))
+                print(f"Scored {rows} rows...")
 
-def refresh_scores(top_k: int | None = None, config_path: Optional[Path] = None) -> None:
-    loader = DataLoader(config_path=config_path or Path("pipelines/claims_normalized/config.yaml"))
+        if incremental:
+            calibration = scorer.calibration
+        else:
+            calibration = _ensure_calibration(scorer, score_min, score_max, rows, recalibrate)
+        normalized_sql, params = calibration.sql_expression("ml_score")
+        staged = "read_parquet('" + str(staging_dir / "*.parquet").replace("'", "''") + "')"
+        select_sql = f"""
+            SELECT claim_id, ml_score, {normalized_sql} AS ml_score_normalized, ? AS model_version, feature_hash
+            FROM {staged}
+        """
+
+        deleted = 0
+        with write_connection(loader.duckdb_path) as con:
+            if incremental:
+                con.execute("BEGIN TRANSACTION")
+                deleted = con.execute(
+                    f"DELETE FROM {scores_table} WHERE claim_id NOT IN (SELECT claim_id FROM {loader.table_name})"
+                ).fetchone()[0]
+                if rows:
+                    con.execute(f"INSERT OR REPLACE INTO {scores_table} {select_sql}", [*params, scorer.model_version])
+                con.execute("COMMIT")
+            else:
+                shadow = shadow_table_name(scores_table)
+                con.execute(
+                    f"""
+                    CREATE OR REPLACE TABLE {shadow} (
+                        claim_id VARCHAR PRIMARY KEY,
+                        ml_score DOUBLE,
+                        ml_score_normalized DOUBLE,
+                        model_version VARCHAR,
+                        feature_hash UBIGINT
+                    )
+                    """
+                )
+                if rows:
+                    con.execute(f"INSERT INTO {shadow} {select_sql}", [*params, scorer.model_version])
+                swap_in_shadow_tables(con, {scores_table: shadow})
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    return rows, deleted
+
+
+def refresh_scores(
+    top_k: int | None = None,
+    config_path: Optional[Path] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int = DEFAULT_WORKERS,
+    recalibrate: bool = False,
+    full: bool = False,
+) -> None:
+    loader = get_data_loader(config_path=config_path or Path("pipelines/claims_normalized/config.yaml"))
     scorer = MLScorer()
+    parquet_path = loader.parquet_dir / risk_scoring.SCORES_CACHE_FILENAME
+
+    if chunk_size > 0:
+        incremental = not full and not recalibrate and _can_refresh_incrementally(loader, scorer)
+        rows_scored, rows_deleted = _score_streaming(
+            loader, scorer, chunk_size, workers, recalibrate=recalibrate, incremental=incremental
+        )
+        mode = "incremental" if incremental else "full"
+        loader.export_parquet(risk_scoring.SCORES_CACHE_TABLE, parquet_path)
+        ranked_rows = risk_scoring.build_risk_ranked_table(loader)
+        qc_payload = risk_scoring.log_qc_snapshot_from_ranked(loader, top_k=top_k)
+        _record_refresh(loader, scorer, rows_scored, ranked_rows, qc_payload, refresh_mode=mode)
+        print(
+            f"{mode.capitalize()} refresh scored {rows_scored} rows (removed {rows_deleted}); "
+            f"cached to {parquet_path} and DuckDB table '{risk_scoring.SCORES_CACHE_TABLE}'."
+        )
+        print(f"Materialised {ranked_rows} ranked rows to DuckDB table '{risk_scoring.RISK_RANKED_TABLE}'.")
+        return
 
     df_all = loader.load_claims_normalized()
-    scores = scorer.score_dataframe(df_all)
+    raw_scores = scorer.score_raw(df_all)
+    _ensure_calibration(scorer, raw_scores.min(), raw_scores.max(), len(raw_scores), recalibrate)
+    scores = scorer.build_scores_frame(df_all, raw_scores)
 
     loader.write_dataframe_to_duckdb(scores, risk_scoring.SCORES_CACHE_TABLE, mode="replace")
+    loader.export_parquet(risk_scoring.SCORES_CACHE_TABLE, parquet_path)
 
-    parquet_path = loader.parquet_dir / risk_scoring.SCORES_CACHE_FILENAME
-    parquet_path.parent.mkdir(parents=True, exist_ok=True)
-    scores.to_parquet(parquet_path, index=False)
+    ranked_rows = risk_scoring.build_risk_ranked_table(loader)
 
     qc_payload = risk_scoring._log_qc_snapshot(df_all, scores, top_k=top_k)
+    _record_refresh(loader, scorer, len(scores), ranked_rows, qc_payload, refresh_mode="full")
+
+    print(f"Cached {len(scores)} rows to {parquet_path} and DuckDB table '{risk_scoring.SCORES_CACHE_TABLE}'.")
+    print(f"Materialised {ranked_rows} ranked rows to DuckDB table '{risk_scoring.RISK_RANKED_TABLE}'.")
+
+
+def _record_refresh(
+    loader: DataLoader, scorer: MLScorer, rows_scored: int, ranked_rows: int, qc_payload, refresh_mode: str
+) -> None:
     summary = qc_payload.get("summary") if isinstance(qc_payload, dict) else None
     top_records = qc_payload.get("top_records") if isinstance(qc_payload, dict) else None
     metadata.record_ml_refresh(
         loader.duckdb_path,
         version=scorer.model_version,
-        rows_scored=len(scores),
+        rows_scored=rows_scored,
         summary=summary,
         top_records=top_records,
+        ruleset_version=risk_scoring._get_ruleset_version(),
+        ranked_rows=ranked_rows,
+        refresh_mode=refresh_mode,
     )
 
-    print(f"Cached {len(scores)} rows to {parquet_path} and DuckDB table '{risk_scoring.SCORES_CACHE_TABLE}'.")
-
 
 def main() -> None:
     parser = argparse.ArgumentParser(description="Refresh cached ML scores and log QC snapshot.")
     parser.add_argument("--config", type=Path, default=Path("pipelines/claims_normalized/config.yaml"), help="Path ke config ETL untuk DataLoader.")
     parser.add_argument("--top-k", type=int, default=None, help="Jumlah klaim teratas untuk disimpan di QC log.")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Jumlah baris per chunk scoring (0 = muat seluruh tabel sekaligus).")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Jumlah proses paralel untuk scoring chunk.")
+    parser.add_argument("--recalibrate", action="store_true", help="Fit ulang kalibrasi normalisasi skor dari data refresh ini.")
+    parser.add_argument("--full", action="store_true", help="Paksa rescore seluruh klaim (abaikan mode inkremental).")
     args = parser.parse_args()
 
-    refresh_scores(top_k=args.top_k, config_path=args.config)
+    refresh_scores(
+        top_k=args.top_k,
+        config_path=args.config,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        recalibrate=args.recalibrate,
+        full=args.full,
+    )
 
 
 if __name__ == "__main__":
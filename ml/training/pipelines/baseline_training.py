@@ -16,7 +16,7 @@ from pathlib import Path
 
 import pandas as pd
 
-from ml.common.data_access import DataLoader
+from ml.common.data_access import get_data_loader
 
 FEATURE_CONFIG_PATH = Path("ml/training/config/features.yaml")
 
@@ -38,7 +38,7 @@ def prepare_features(df: pd.DataFrame, feature_cfg: dict) -> pd.DataFrame:
 
 
 def main(sample_size: int = 1000) -> None:
-    loader = DataLoader()
+    loader = get_data_loader()
     feature_cfg = load_feature_config()
 
     df = loader.load_claims_normalized(limit=sample_size)
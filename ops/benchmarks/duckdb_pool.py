@@ -0,0 +1,73 @@
+"""
+Benchmark per-request DuckDB overhead with and without the pooled DataLoader connections.
+
+Each simulated request runs the same read pattern as /claims/high-risk (table lookup,
+snapshot metadata, one page of claims, one point lookup).
+
+Usage:
+    DUCKDB_PATH=instance/analytics.duckdb python -m ops.benchmarks.duckdb_pool --requests 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+from ml.common import data_access
+from ml.common.data_access import DataLoader, close_connection_pool, get_data_loader
+
+
+def _simulate_request(loader: DataLoader, claim_id: str | None) -> None:
+    loader.table_exists("claims_ml_scores")
+    if loader.table_exists("ml_model_versions"):
+        loader.query("SELECT run_id FROM ml_model_versions ORDER BY refreshed_at DESC LIMIT 1")
+    loader.query(
+        f"SELECT * FROM {loader.table_name} ORDER BY claim_id LIMIT 50",
+    )
+    if claim_id is not None:
+        loader.query(f"SELECT * FROM {loader.table_name} WHERE claim_id = ?", [claim_id])
+
+
+def _run(loader: DataLoader, requests: int, pooled: bool) -> list[float]:
+    data_access.POOL_ENABLED = pooled
+    close_connection_pool(loader.duckdb_path)
+    sample = loader.query(f"SELECT claim_id FROM {loader.table_name} LIMIT 1")
+    claim_id = sample["claim_id"].iloc[0] if not sample.empty else None
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        _simulate_request(loader, claim_id)
+        timings.append((time.perf_counter() - started) * 1000)
+    close_connection_pool(loader.duckdb_path)
+    return timings
+
+
+def _summary(label: str, timings: list[float]) -> str:
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    return f"{label:<10} mean={statistics.mean(timings):8.2f} ms  p50={statistics.median(timings):8.2f} ms  p95={p95:8.2f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs per-call DuckDB connections.")
+    parser.add_argument("--requests", type=int, default=200, help="Jumlah request simulasi per mode.")
+    args = parser.parse_args()
+
+    loader = get_data_loader()
+    original = data_access.POOL_ENABLED
+    try:
+        unpooled = _run(loader, args.requests, pooled=False)
+        pooled = _run(loader, args.requests, pooled=True)
+    finally:
+        data_access.POOL_ENABLED = original
+
+    print(f"DuckDB: {loader.duckdb_path} ({args.requests} request/mode)")
+    print(_summary("per-call", unpooled))
+    print(_summary("pooled", pooled))
+    saved = statistics.mean(unpooled) - statistics.mean(pooled)
+    print(f"Hemat rata-rata per request: {saved:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
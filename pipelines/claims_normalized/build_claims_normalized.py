@@ -1,6 +1,10 @@
 import sys
 import argparse
+import glob
+import hashlib
+import json
 import os
+import shutil
 from pathlib import Path
 
 import duckdb
@@ -11,10 +15,45 @@ if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
 from ml.common import metadata
+from ml.common.data_access import (
+    enum_select_sql,
+    export_parquet,
+    read_connection,
+    shadow_table_name,
+    staging_path,
+    swap_in_shadow_tables,
+    write_connection,
+)
 from ml.pipelines.refresh_ml_scores import refresh_scores
 
 DEFAULT_CONFIG = ROOT_DIR / "pipelines" / "claims_normalized" / "config.yaml"
 SQL_DIR = ROOT_DIR / "pipelines" / "claims_normalized" / "sql"
+ENUM_TYPES_SQL = SQL_DIR / "enum_types.sql"
+# Scratch database every stage runs in (under the staging path of the live database).
+BUILD_DATABASE_NAME = "build.duckdb"
+OUTPUT_TABLES = ("claims_normalized", "claims_scored", "claim_duplicate_pairs")
+# Point lookups (claim detail, patient history), created as part of the shadow swap.
+OUTPUT_INDEXES = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS claims_normalized_claim_id_idx ON claims_normalized (claim_id)",
+    "CREATE INDEX IF NOT EXISTS claims_normalized_patient_key_idx ON claims_normalized (patient_key)",
+)
+# Sources an incremental run can append new files of (config values may be globs).
+INCREMENTAL_SOURCES = ("fkrtl", "diagnosa_sekunder")
+# References read by transform.sql; any change to them requires a full rebuild.
+TRACKED_REFERENCES = ("hospital_master", "region_master")
+# Tables an incremental run merges into; all must exist from an earlier full run.
+INCREMENTAL_REQUIRED_TABLES = OUTPUT_TABLES
+STAGING_TABLES = {"fkrtl": "staging_fkrtl", "diagnosa_sekunder": "staging_diagnosa_sekunder"}
+DELTA_STAGING_TABLES = {"fkrtl": "staging_fkrtl__delta", "diagnosa_sekunder": "staging_diagnosa_sekunder__delta"}
+HASH_CHUNK_BYTES = 1 << 20
+# Tables the stage graph (`stages` in the config) is run for; swapped in afterwards.
+STAGE_TARGETS = tuple(shadow_table_name(table) for table in OUTPUT_TABLES)
+# Sources converted once to typed Parquet (schema in `raw_parquet.sources` of the config).
+RAW_PARQUET_SOURCES = ("fkrtl", "diagnosa_sekunder", "kepesertaan", "fktp_kapitasi", "non_kap")
+RAW_PARQUET_DIR = "instance/data/raw"
+RAW_MANIFEST_NAME = "_manifest.json"
+# Single pass: with every column read as text DuckDB only sniffs the dialect on a sample.
+RAW_CSV_OPTIONS = "HEADER=TRUE, ALL_VARCHAR=TRUE"
 
 
 def load_config(path: Path) -> dict:
@@ -35,42 +74,502 @@ def render_sql(template_path: Path, context: dict) -> str:
     return sql
 
 
+def source_paths(pattern: str) -> list[Path]:
+    """Files behind a configured source: the path itself, or every match of a glob."""
+    if glob.has_magic(pattern):
+        return sorted(Path(path) for path in glob.glob(pattern))
+    return [Path(pattern)]
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan_source_files(config: dict, manifest: dict[str, metadata.SourceFile]) -> list[metadata.SourceFile]:
+    """
+    Path, size, mtime and sha256 of every tracked input file.
+
+    Files whose size and mtime match the manifest keep the recorded hash instead of being
+    read again.
+    """
+    tracked = [("sources", name) for name in INCREMENTAL_SOURCES] + [("references", name) for name in TRACKED_REFERENCES]
+    files = []
+    for section, name in tracked:
+        pattern = config.get(section, {}).get(name)
+        if not pattern:
+            continue
+        for path in source_paths(str(pattern)):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Source file not found for {name}: {path}") from None
+            known = manifest.get(str(path))
+            if known is not None and (known.size_bytes, known.mtime_ns) == (st.st_size, st.st_mtime_ns):
+                sha256 = known.sha256
+            else:
+                sha256 = file_sha256(path)
+            files.append(metadata.SourceFile(name, str(path), st.st_size, st.st_mtime_ns, sha256))
+    return files
+
+
+def plan_incremental(
+    con: duckdb.DuckDBPyConnection,
+    config: dict,
+    files: list[metadata.SourceFile],
+    manifest: dict[str, metadata.SourceFile],
+) -> tuple[list[metadata.SourceFile] | None, str]:
+    """
+    Files an incremental run has to ingest, or None plus the reason a full rebuild is needed.
+
+    Only new FKRTL / secondary-diagnosis files can be appended; a changed or removed file,
+    a changed reference or a new ruleset version invalidates what was built before.
+    """
+    if not manifest:
+        return None, "no source manifest recorded yet"
+    existing = {row[0] for row in con.execute("SELECT table_name FROM duckdb_tables()").fetchall()}
+    missing = [table for table in INCREMENTAL_REQUIRED_TABLES if table not in existing]
+    if missing:
+        return None, f"missing tables: {', '.join(missing)}"
+    last_run = con.execute("SELECT ruleset_version FROM etl_runs ORDER BY executed_at DESC LIMIT 1").fetchone()
+    if last_run is None or last_run[0] != config.get("ruleset_version"):
+        return None, "ruleset_version changed"
+
+    current = {item.path: item for item in files}
+    removed = sorted(set(manifest) - set(current))
+    if removed:
+        return None, f"source files removed: {', '.join(removed)}"
+    new_files = []
+    for item in files:
+        known = manifest.get(item.path)
+        if known is not None and known.sha256 != item.sha256:
+            return None, f"source file changed: {item.path}"
+        if known is None:
+            if item.source not in INCREMENTAL_SOURCES:
+                return None, f"reference {item.source} changed: {item.path}"
+            new_files.append(item)
+    return new_files, ""
+
+
+def _sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _raw_source_config(config: dict, name: str) -> dict:
+    return (config.get("raw_parquet", {}).get("sources") or {}).get(name) or {}
+
+
+def raw_parquet_dir(config: dict) -> Path:
+    return Path(config.get("raw_parquet", {}).get("dir", RAW_PARQUET_DIR))
+
+
+def _raw_schema_digest(source_cfg: dict) -> str:
+    payload = json.dumps(
+        {"columns": source_cfg.get("columns") or {}, "partition_by": source_cfg.get("partition_by") or []},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _raw_file_tag(csv_path: str) -> str:
+    """Prefix of the Parquet files converted from ``csv_path`` (stable across runs)."""
+    return f"{Path(csv_path).stem}-{hashlib.sha256(csv_path.encode()).hexdigest()[:8]}"
+
+
+def _load_raw_manifest(path: Path) -> dict:
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return {"schema": None, "files": {}}
+
+
+def _write_raw_manifest(path: Path, manifest: dict) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(tmp_path, path)
+
+
+def _remove_raw_outputs(source_dir: Path, relative_paths: list[str]) -> None:
+    for relative in relative_paths:
+        try:
+            (source_dir / relative).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def convert_csv_to_parquet(
+    con: duckdb.DuckDBPyConnection,
+    name: str,
+    csv_path: str,
+    source_cfg: dict,
+    source_dir: Path,
+    tmp_dir: Path,
+) -> list[str]:
+    """
+    Convert one raw CSV to typed Parquet under ``source_dir``, hive-partitioned by
+    ``partition_by``. Returns the written files relative to ``source_dir``.
+
+    Columns declared in ``columns`` are cast to their type (empty strings become NULL);
+    other columns are kept as VARCHAR.
+    """
+    columns_cfg = source_cfg.get("columns") or {}
+    partition_by = source_cfg.get("partition_by") or []
+    undeclared = [column for column in partition_by if column not in columns_cfg]
+    if undeclared:
+        raise ValueError(f"raw_parquet.sources.{name}.partition_by must be declared in columns: {', '.join(undeclared)}")
+
+    reader = f"read_csv({_sql_literal(csv_path)}, {RAW_CSV_OPTIONS})"
+    csv_columns = [row[0] for row in con.execute(f"DESCRIBE SELECT * FROM {reader}").fetchall()]
+    missing = [column for column in columns_cfg if column not in csv_columns]
+    if missing:
+        raise ValueError(f"{csv_path} is missing columns declared for {name}: {', '.join(missing)}")
+
+    select = []
+    for column in csv_columns:
+        quoted = _quote_identifier(column)
+        column_type = str(columns_cfg.get(column, "VARCHAR")).upper()
+        if column_type == "VARCHAR":
+            select.append(quoted)
+        else:
+            select.append(f"CAST(NULLIF(TRIM({quoted}), '') AS {column_type}) AS {quoted}")
+
+    tag = _raw_file_tag(csv_path)
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    query = f"SELECT {', '.join(select)} FROM {reader}"
+    if partition_by:
+        partitions = ", ".join(_quote_identifier(column) for column in partition_by)
+        con.execute(
+            f"COPY ({query}) TO {_sql_literal(str(tmp_dir))} "
+            f"(FORMAT PARQUET, COMPRESSION ZSTD, PARTITION_BY ({partitions}), FILENAME_PATTERN '{tag}_{{i}}')"
+        )
+    else:
+        con.execute(f"COPY ({query}) TO {_sql_literal(str(tmp_dir / f'{tag}.parquet'))} (FORMAT PARQUET, COMPRESSION ZSTD)")
+
+    written = []
+    for path in sorted(tmp_dir.rglob("*.parquet")):
+        relative = path.relative_to(tmp_dir)
+        destination = source_dir / relative
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(path, destination)
+        written.append(relative.as_posix())
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    return written
+
+
+def ingest_raw_sources(
+    con: duckdb.DuckDBPyConnection,
+    config: dict,
+    names: tuple[str, ...] | list[str] = RAW_PARQUET_SOURCES,
+) -> dict[str, dict[str, list[str]]]:
+    """
+    Make sure every CSV of the raw sources ``names`` has a typed Parquet copy under
+    `raw_parquet_dir`.
+
+    A CSV is converted only when it is new, its size/mtime changed, or the declared schema
+    of its source changed; re-runs otherwise never parse CSV. Copies of CSVs no longer
+    configured are deleted. Returns ``{source: {csv_path: [parquet paths]}}``.
+    """
+    raw_dir = raw_parquet_dir(config)
+    ingested: dict[str, dict[str, list[str]]] = {}
+    for name in names:
+        pattern = config.get("sources", {}).get(name)
+        if not pattern:
+            continue
+        source_cfg = _raw_source_config(config, name)
+        source_dir = raw_dir / name
+        source_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = source_dir / RAW_MANIFEST_NAME
+        manifest = _load_raw_manifest(manifest_path)
+        schema = _raw_schema_digest(source_cfg)
+        if manifest.get("schema") != schema:
+            for entry in manifest["files"].values():
+                _remove_raw_outputs(source_dir, entry["parquet"])
+            manifest = {"schema": schema, "files": {}}
+            _write_raw_manifest(manifest_path, manifest)
+
+        csv_paths = [str(path) for path in source_paths(str(pattern))]
+        for stale in sorted(set(manifest["files"]) - set(csv_paths)):
+            _remove_raw_outputs(source_dir, manifest["files"].pop(stale)["parquet"])
+            _write_raw_manifest(manifest_path, manifest)
+
+        for csv_path in csv_paths:
+            try:
+                st = os.stat(csv_path)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Source file not found for {name}: {csv_path}") from None
+            entry = manifest["files"].get(csv_path)
+            if entry is not None and (entry["size_bytes"], entry["mtime_ns"]) == (st.st_size, st.st_mtime_ns):
+                continue
+            print(f"Converting {csv_path} to Parquet...")
+            tmp_dir = raw_dir / ".tmp" / name / _raw_file_tag(csv_path)
+            written = convert_csv_to_parquet(con, name, csv_path, source_cfg, source_dir, tmp_dir)
+            if entry is not None:
+                _remove_raw_outputs(source_dir, [path for path in entry["parquet"] if path not in written])
+            manifest["files"][csv_path] = {"size_bytes": st.st_size, "mtime_ns": st.st_mtime_ns, "parquet": written}
+            _write_raw_manifest(manifest_path, manifest)
+
+        ingested[name] = {
+            csv_path: [str(source_dir / relative) for relative in manifest["files"][csv_path]["parquet"]]
+            for csv_path in csv_paths
+        }
+    return ingested
+
+
+def raw_parquet_relation(config: dict, name: str, files: list[str] | None = None) -> str:
+    """`read_parquet` over the Parquet copy of source ``name`` (all files, or only ``files``)."""
+    if files is None:
+        target = _sql_literal(str(raw_parquet_dir(config) / name / "**" / "*.parquet"))
+    else:
+        target = "[" + ", ".join(_sql_literal(path) for path in files) + "]"
+    source_cfg = _raw_source_config(config, name)
+    hive_types = ", ".join(
+        f"{_sql_literal(column)}: {_sql_literal(str(source_cfg['columns'][column]))}"
+        for column in source_cfg.get("partition_by") or []
+    )
+    options = "hive_partitioning=true, union_by_name=true"
+    if hive_types:
+        options += f", hive_types={{{hive_types}}}"
+    return f"read_parquet({target}, {options})"
+
+
+def _stage_producers(stages: dict) -> dict[str, str]:
+    producers = {}
+    for name, stage in stages.items():
+        if not stage.get("sql") or not stage.get("outputs"):
+            raise ValueError(f"Stage {name} must declare sql and outputs.")
+        for table in stage["outputs"]:
+            if table in producers:
+                raise ValueError(f"Table {table} is produced by both {producers[table]} and {name}.")
+            producers[table] = name
+    return producers
+
+
+def plan_stages(stages: dict, targets: tuple[str, ...] | list[str]) -> list[str]:
+    """
+    Stages needed to build ``targets``, dependencies first.
+
+    Each stage declares the tables it reads (``inputs``) and creates (``outputs``); stages
+    no target depends on are left out, and a stage read by several others runs once.
+    """
+    producers = _stage_producers(stages)
+    order: list[str] = []
+    state: dict[str, str] = {}
+
+    def visit(table: str, needed_by: str) -> None:
+        if table not in producers:
+            raise ValueError(f"No stage produces {table} (needed by {needed_by}).")
+        name = producers[table]
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"Stage dependency cycle through {name}.")
+        state[name] = "visiting"
+        for input_table in stages[name].get("inputs") or []:
+            visit(input_table, name)
+        state[name] = "done"
+        order.append(name)
+
+    for target in targets:
+        visit(target, "targets")
+    return order
+
+
+def render_stage(config: dict, name: str, staging: dict[str, str] = STAGING_TABLES) -> str:
+    stage = config["stages"][name]
+    context = {
+        "output": stage["outputs"][0],
+        "input": (stage.get("inputs") or [""])[0],
+        "raw": raw_parquet_relation(config, stage["raw_source"]) if stage.get("raw_source") else "",
+    }
+    return render_sql(SQL_DIR / stage["sql"], {**config, "staging": staging, "stage": context})
+
+
+def run_stages(con: duckdb.DuckDBPyConnection, config: dict, order: list[str]) -> None:
+    for name in order:
+        print(f"Running stage {name}...")
+        con.execute(render_stage(config, name))
+
+
+def build_full(con: duckdb.DuckDBPyConnection, config: dict, order: list[str]) -> None:
+    run_stages(con, config, order)
+    swap_in_shadow_tables(con, {table: shadow_table_name(table) for table in OUTPUT_TABLES})
+
+
+def copy_live_outputs(con: duckdb.DuckDBPyConnection, duckdb_path: str) -> None:
+    """Copy the output tables of the live database into the build database (read-only attach)."""
+    con.execute(f"ATTACH {_sql_literal(duckdb_path)} AS live (READ_ONLY)")
+    try:
+        for table in OUTPUT_TABLES:
+            con.execute(f"CREATE OR REPLACE TABLE {table} AS {enum_select_sql(con, f'live.{table}')}")
+    finally:
+        con.execute("DETACH live")
+
+
+def publish_outputs(duckdb_path: str, build_path: Path) -> None:
+    """
+    Copy the output tables of the build database into shadows of the live database and swap
+    them in. This is the only step of the ETL that holds the live write lock.
+    """
+    with write_connection(duckdb_path) as con:
+        con.execute(ENUM_TYPES_SQL.read_text())
+        con.execute(f"ATTACH {_sql_literal(str(build_path))} AS build (READ_ONLY)")
+        try:
+            for table in OUTPUT_TABLES:
+                select_sql = enum_select_sql(con, f"build.{table}")
+                con.execute(f"CREATE OR REPLACE TABLE {shadow_table_name(table)} AS {select_sql}")
+        finally:
+            con.execute("DETACH build")
+        print("Swapping in claims_normalized / claims_scored / claim_duplicate_pairs...")
+        swap_in_shadow_tables(
+            con,
+            {table: shadow_table_name(table) for table in OUTPUT_TABLES},
+            indexes=OUTPUT_INDEXES,
+        )
+
+
+def _remove_database(path: Path) -> None:
+    for candidate in (path, Path(f"{path}.wal")):
+        candidate.unlink(missing_ok=True)
+
+
+def build_incremental(
+    con: duckdb.DuckDBPyConnection,
+    config: dict,
+    new_files: list[metadata.SourceFile],
+    raw_files: dict[str, dict[str, list[str]]],
+    transform_stage: str,
+) -> int:
+    """
+    Stage only ``new_files``, rebuild the claims they contain and merge them into the outputs.
+
+    ``raw_files`` maps each source CSV to its Parquet copy (see `ingest_raw_sources`);
+    ``transform_stage`` is the stage building claims_normalized__shadow, run on the delta.
+    Returns the number of claims rebuilt.
+    """
+    delta = {}
+    for name in INCREMENTAL_SOURCES:
+        files = [path for item in new_files if item.source == name for path in raw_files[name][item.path]]
+        delta[name] = raw_parquet_relation(config, name, files) if files else f"(SELECT * FROM {STAGING_TABLES[name]} LIMIT 0)"
+    staging_sql = render_sql(SQL_DIR / "staging_incremental.sql", {"delta": delta})
+    transform_sql = render_stage(config, transform_stage, staging=DELTA_STAGING_TABLES)
+    duplicates_sql = render_sql(
+        SQL_DIR / "duplicate_pairs.sql",
+        {"stage": {"input": "touched_episodes", "output": "touched_duplicate_pairs"}},
+    )
+    merge_sql = render_sql(SQL_DIR / "incremental_merge.sql", {"duplicate_pairs_sql": duplicates_sql})
+
+    con.execute("BEGIN TRANSACTION")
+    try:
+        print(f"Staging {len(new_files)} new source file(s)...")
+        con.execute(staging_sql)
+        redelivered = con.execute(
+            """
+            SELECT COUNT(*) FROM (
+                SELECT FKL02
+                FROM staging_fkrtl
+                WHERE FKL02 IN (SELECT FKL02 FROM staging_fkrtl__new)
+                GROUP BY 1
+                HAVING COUNT(*) > 1
+            )
+            """
+        ).fetchone()[0]
+        if redelivered:
+            raise ValueError(
+                f"{redelivered} claim(s) in the new FKRTL files are already staged; "
+                "fix the source files and run a full rebuild."
+            )
+        print("Executing transform queries for new claims...")
+        con.execute(transform_sql)
+        rows = con.execute("SELECT COUNT(*) FROM claims_normalized__shadow").fetchone()[0]
+        print(f"Merging {rows} claims into claims_normalized / claims_scored / claim_duplicate_pairs...")
+        con.execute(merge_sql)
+        for table in (*DELTA_STAGING_TABLES.values(), "staging_fkrtl__new", "staging_diagnosa_sekunder__new"):
+            con.execute(f"DROP TABLE IF EXISTS {table}")
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+    return rows
+
+
 def main(args: argparse.Namespace) -> None:
     config_path = args.config
     config = load_config(config_path)
     duckdb_path = config.get("duckdb_path", "instance/analytics.duckdb")
     os.makedirs(os.path.dirname(duckdb_path), exist_ok=True)
 
-    con = duckdb.connect(duckdb_path)
+    stages = config.get("stages")
+    if not stages:
+        raise ValueError(f"{config_path} declares no ETL stages (see pipelines/claims_normalized/config.yaml).")
+    order = plan_stages(stages, STAGE_TARGETS)
 
-    staging_sql = render_sql(SQL_DIR / "staging.sql", config)
-    transform_sql = render_sql(SQL_DIR / "transform.sql", config)
+    metadata.ensure_metadata_tables(duckdb_path)
+    manifest = metadata.load_source_manifest(duckdb_path)
+    source_files = scan_source_files(config, manifest)
 
-    print("Executing staging queries...")
-    con.execute(staging_sql)
+    # Every stage runs in a separate build database; the live file is only read (planning,
+    # incremental base tables) until publish_outputs copies the finished tables over.
+    build_path = staging_path(duckdb_path, BUILD_DATABASE_NAME)
+    build_path.parent.mkdir(parents=True, exist_ok=True)
+    _remove_database(build_path)
+    try:
+        with duckdb.connect(str(build_path)) as con:
+            raw_sources = [stages[name]["raw_source"] for name in order if stages[name].get("raw_source")]
+            raw_files = ingest_raw_sources(con, config, raw_sources)
+            con.execute(ENUM_TYPES_SQL.read_text())
 
-    print("Executing transform queries...")
-    con.execute(transform_sql)
+            mode = "full"
+            if args.incremental:
+                with duckdb.connect(duckdb_path, read_only=True) as live:
+                    new_files, reason = plan_incremental(live, config, source_files, manifest)
+                if new_files is None:
+                    print(f"Incremental run not possible ({reason}); rebuilding everything.")
+                elif not new_files:
+                    print("No new source files; claims_normalized is up to date.")
+                    return
+                else:
+                    mode = "incremental"
 
-    output_dir = Path(config["output"]["parquet_dir"])
-    output_dir.mkdir(parents=True, exist_ok=True)
+            if mode == "incremental":
+                copy_live_outputs(con, duckdb_path)
+                transform_stage = _stage_producers(stages)[shadow_table_name("claims_normalized")]
+                run_stages(con, config, plan_stages(stages, stages[transform_stage].get("inputs") or []))
+                rows_processed = build_incremental(con, config, new_files, raw_files, transform_stage)
+                recorded_files = new_files
+            else:
+                build_full(con, config, order)
+                rows_processed = con.execute("SELECT COUNT(*) FROM claims_normalized").fetchone()[0]
+                recorded_files = source_files
 
+        publish_outputs(duckdb_path, build_path)
+    finally:
+        _remove_database(build_path)
+
+    output_dir = Path(config["output"]["parquet_dir"])
     parquet_path = output_dir / f"{config['output']['table_name']}.parquet"
     print(f"Exporting claims_normalized to {parquet_path}")
-    con.execute(f"COPY (SELECT * FROM claims_normalized) TO '{parquet_path}' (FORMAT PARQUET);")
+    with read_connection(duckdb_path) as con:
+        export_parquet(con, "claims_normalized", parquet_path)
 
     print("Updating metadata tables...")
-    metadata.ensure_metadata_tables(duckdb_path)
-    rows_processed = con.execute("SELECT COUNT(*) FROM claims_normalized").fetchone()[0]
     metadata.record_ruleset_version(duckdb_path, config.get("ruleset_version"), config.get("ruleset_description"))
     metadata.record_etl_run(
         duckdb_path,
         ruleset_version=config.get("ruleset_version"),
         rows_processed=rows_processed,
         notes=f"parquet={parquet_path}",
+        mode=mode,
+        source_files=recorded_files,
     )
 
-    con.close()
     print("Pipeline completed successfully.")
 
     refresh_cfg = config.get("post_refresh_ml", {})
@@ -94,6 +593,11 @@ if __name__ == "__main__":
     parser.add_argument("--config", type=Path, default=DEFAULT_CONFIG, help="Path to ETL config YAML.")
     parser.add_argument("--refresh-ml", action="store_true", dest="refresh_ml", help="Set untuk menjalankan refresh skor ML setelah ETL.")
     parser.add_argument("--no-refresh-ml", action="store_false", dest="refresh_ml", help="Set untuk tidak menjalankan refresh ML meskipun config mengaktifkan.")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Hanya proses file FKRTL/diagnosa sekunder baru (fallback ke rebuild penuh bila sumber lama berubah).",
+    )
     parser.add_argument("--refresh-top-k", type=int, default=None, help="Jumlah top-K untuk QC saat refresh ML (override config).")
     parser.set_defaults(refresh_ml=None)
     args = parser.parse_args()
@@ -0,0 +1,54 @@
+-- Duplicate candidate pairs behind /reports/duplicates (claim_duplicate_pairs), built from
+-- `stage.input`: the new claims_normalized on a full run, the touched episodes on an
+-- incremental one. Pairs come from the same (patient, DX, procedure) partitions as
+-- duplicate_flag_stage in transform.sql: each claim is paired with the claims of its
+-- partition admitted 0-3 days after it, so the cost follows the number of pairs rather
+-- than each patient's history squared. Rows are clustered in report order.
+CREATE OR REPLACE TABLE {{ stage.output }} AS
+WITH episode_windows AS (
+    SELECT
+        claim_id,
+        admit_dt,
+        dx_primary_code,
+        procedure_code,
+        province_name,
+        facility_id,
+        LIST({
+            'claim_id': claim_id,
+            'admit_dt': admit_dt,
+            'province_name': province_name,
+            'facility_id': facility_id
+        }) OVER (
+            PARTITION BY patient_key, COALESCE(dx_primary_code, ''), COALESCE(procedure_code, '')
+            ORDER BY admit_dt
+            RANGE BETWEEN CURRENT ROW AND INTERVAL 3 DAY FOLLOWING
+        ) AS episode_claims
+    FROM {{ stage.input }}
+    WHERE patient_key IS NOT NULL
+      AND admit_dt IS NOT NULL
+),
+episode_pairs AS (
+    SELECT
+        claim_id,
+        admit_dt,
+        dx_primary_code,
+        procedure_code,
+        province_name,
+        facility_id,
+        UNNEST(episode_claims) AS other
+    FROM episode_windows
+)
+SELECT
+    LEAST(claim_id, other.claim_id) AS claim_id_a,
+    GREATEST(claim_id, other.claim_id) AS claim_id_b,
+    DATE_DIFF('day', admit_dt, other.admit_dt) AS gap_days,
+    dx_primary_code,
+    procedure_code,
+    CASE WHEN claim_id < other.claim_id THEN province_name ELSE other.province_name END AS province_name,
+    CASE WHEN claim_id < other.claim_id THEN facility_id ELSE other.facility_id END AS facility_id_a,
+    CASE WHEN claim_id < other.claim_id THEN other.facility_id ELSE facility_id END AS facility_id_b
+FROM episode_pairs
+-- Same-day claims see each other, so such a pair is kept once, from the lower claim_id.
+WHERE other.admit_dt > admit_dt
+   OR other.claim_id > claim_id
+ORDER BY gap_days, claim_id_a, claim_id_b;
@@ -0,0 +1,77 @@
+-- Filter columns are stored as ENUMs with one canonical spelling each, so API filters
+-- compare the stored column directly (no LOWER/UPPER/COALESCE) and keep zone-map pruning.
+-- The values are the ones transform.sql already emits (a missing province stays NULL).
+-- Values are listed in sort order so ORDER BY matches the former VARCHAR ordering.
+-- transform.sql maps a value missing here to the column's unknown value (NULL for
+-- province) rather than failing the cast, so a new province or class only needs to be
+-- added here (plus a migration of the live tables) to be kept.
+-- Run by build_claims_normalized.py on the build database and on the live database
+-- before the outputs are copied over, so both name the same types.
+CREATE TYPE IF NOT EXISTS province_enum AS ENUM (
+    'ACEH',
+    'BALI',
+    'BANTEN',
+    'BENGKULU',
+    'DI YOGYAKARTA',
+    'DKI JAKARTA',
+    'GORONTALO',
+    'JAMBI',
+    'JAWA BARAT',
+    'JAWA TENGAH',
+    'JAWA TIMUR',
+    'KALIMANTAN BARAT',
+    'KALIMANTAN SELATAN',
+    'KALIMANTAN TENGAH',
+    'KALIMANTAN TIMUR',
+    'KALIMANTAN UTARA',
+    'KEPULAUAN BANGKA BELITUNG',
+    'KEPULAUAN RIAU',
+    'LAMPUNG',
+    'MALUKU',
+    'MALUKU UTARA',
+    'NUSA TENGGARA BARAT',
+    'NUSA TENGGARA TIMUR',
+    'PAPUA',
+    'PAPUA BARAT',
+    'RIAU',
+    'SULAWESI BARAT',
+    'SULAWESI SELATAN',
+    'SULAWESI TENGAH',
+    'SULAWESI TENGGARA',
+    'SULAWESI UTARA',
+    'SUMATERA BARAT',
+    'SUMATERA SELATAN',
+    'SUMATERA UTARA'
+);
+CREATE TYPE IF NOT EXISTS severity_enum AS ENUM ('berat', 'fatal', 'ringan', 'sedang', 'unknown');
+CREATE TYPE IF NOT EXISTS service_type_enum AS ENUM ('RITL', 'RJTL', 'Unknown');
+CREATE TYPE IF NOT EXISTS facility_class_enum AS ENUM (
+    'Klinik Non Rawat Inap',
+    'RS Kelas A',
+    'RS Kelas B',
+    'RS Kelas C',
+    'RS Kelas D',
+    'RS Khusus Bedah',
+    'RS Khusus Gigi dan Mulut',
+    'RS Khusus Hemodialisa',
+    'RS Khusus Ibu dan Anak',
+    'RS Khusus Jantung',
+    'RS Khusus Jiwa',
+    'RS Khusus Kanker Onkologi',
+    'RS Khusus Kusta',
+    'RS Khusus Lain',
+    'RS Khusus Mata',
+    'RS Khusus Paru',
+    'RS Khusus Stroke',
+    'RS Khusus Tulang',
+    'RS Non Provider Gawat Darurat',
+    'RS Swasta Setara Type A',
+    'RS Swasta Setara Type B',
+    'RS Swasta Setara Type C',
+    'RS Swasta Setara Type D',
+    'RS TNI Polri Kelas I',
+    'RS TNI Polri Kelas II',
+    'RS TNI Polri Kelas III',
+    'RS TNI Polri Kelas IV',
+    'Tidak diketahui'
+);
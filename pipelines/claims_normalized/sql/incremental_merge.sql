@@ -0,0 +1,112 @@
+-- Incremental merge, run in one transaction after transform.sql has built
+-- claims_normalized__shadow from the delta staging tables only. Per-claim columns of those
+-- rows are final; peer stats and duplicate flags only saw the delta, so they are recomputed
+-- here for the peer groups and (patient, DX, procedure) episodes the delta touches, on the
+-- live tables. Nothing else is rewritten.
+
+CREATE OR REPLACE TEMP TABLE delta_claims AS
+SELECT *
+FROM claims_normalized__shadow;
+
+-- Peer groups and episodes of the new claim versions and of the versions they replace.
+CREATE OR REPLACE TEMP TABLE touched_keys AS
+SELECT
+    peer_key,
+    patient_key,
+    COALESCE(dx_primary_code, '') AS dx_key,
+    COALESCE(procedure_code, '') AS procedure_key
+FROM delta_claims
+UNION
+SELECT
+    peer_key,
+    patient_key,
+    COALESCE(dx_primary_code, '') AS dx_key,
+    COALESCE(procedure_code, '') AS procedure_key
+FROM claims_normalized
+WHERE claim_id IN (SELECT claim_id FROM delta_claims);
+
+DELETE FROM claims_normalized
+WHERE claim_id IN (SELECT claim_id FROM delta_claims);
+
+INSERT INTO claims_normalized BY NAME
+SELECT *
+FROM delta_claims;
+
+-- Same aggregates as peer_stats_stage, over every claim of the touched peer groups.
+CREATE OR REPLACE TEMP TABLE touched_peer_stats AS
+SELECT
+    peer_key,
+    AVG(amount_claimed) AS peer_mean,
+    APPROX_QUANTILE(amount_claimed, 0.9) AS peer_p90,
+    STDDEV_POP(amount_claimed) AS peer_std
+FROM claims_normalized
+WHERE peer_key IN (SELECT peer_key FROM touched_keys)
+GROUP BY 1;
+
+UPDATE claims_normalized
+SET
+    peer_mean = ps.peer_mean,
+    peer_p90 = ps.peer_p90,
+    peer_std = ps.peer_std,
+    cost_zscore = CASE
+        WHEN ps.peer_std IS NULL OR ps.peer_std = 0 THEN NULL
+        ELSE (claims_normalized.amount_claimed - ps.peer_mean) / ps.peer_std
+    END
+FROM touched_peer_stats ps
+WHERE claims_normalized.peer_key = ps.peer_key;
+
+-- Every claim of the touched episodes; duplicate_pairs.sql rebuilds their pairs.
+CREATE OR REPLACE TEMP TABLE touched_episodes AS
+SELECT cn.*
+FROM claims_normalized cn
+JOIN (
+    SELECT DISTINCT patient_key, dx_key, procedure_key
+    FROM touched_keys
+    WHERE patient_key IS NOT NULL
+) tk
+  ON cn.patient_key = tk.patient_key
+ AND COALESCE(cn.dx_primary_code, '') = tk.dx_key
+ AND COALESCE(cn.procedure_code, '') = tk.procedure_key;
+
+{{ duplicate_pairs_sql }}
+
+DELETE FROM claim_duplicate_pairs
+WHERE claim_id_a IN (SELECT claim_id FROM touched_episodes)
+   OR claim_id_b IN (SELECT claim_id FROM touched_episodes);
+
+INSERT INTO claim_duplicate_pairs BY NAME
+SELECT *
+FROM touched_duplicate_pairs;
+
+-- A claim is a duplicate candidate exactly when it belongs to a pair.
+UPDATE claims_normalized
+SET duplicate_pattern = claim_id IN (
+    SELECT claim_id_a FROM touched_duplicate_pairs
+    UNION
+    SELECT claim_id_b FROM touched_duplicate_pairs
+)
+WHERE claim_id IN (SELECT claim_id FROM touched_episodes);
+
+-- claims_scored rows depending on any value changed above, with the claims_scored__shadow
+-- flag expressions of transform.sql.
+CREATE OR REPLACE TEMP TABLE touched_claims AS
+SELECT claim_id FROM delta_claims
+UNION
+SELECT claim_id FROM touched_episodes
+UNION
+SELECT claim_id FROM claims_normalized WHERE peer_key IN (SELECT peer_key FROM touched_peer_stats);
+
+DELETE FROM claims_scored
+WHERE claim_id IN (SELECT claim_id FROM touched_claims);
+
+INSERT INTO claims_scored BY NAME
+SELECT
+    *,
+    (los <= 1 AND amount_claimed > peer_p90) AS short_stay_high_cost,
+    (bpjs_payment_ratio >= 0.95 AND cost_zscore > 2) AS high_cost_full_paid
+FROM claims_normalized
+WHERE claim_id IN (SELECT claim_id FROM touched_claims);
+
+DROP TABLE touched_duplicate_pairs;
+DROP TABLE claims_normalized__shadow;
+DROP TABLE claims_scored__shadow;
@@ -0,0 +1,4 @@
+-- Hospital master, read once per run and shared by every stage that joins facilities.
+CREATE OR REPLACE TABLE staging_hospital_master AS
+SELECT *
+FROM read_csv_auto('{{ references.hospital_master }}', HEADER=TRUE, SAMPLE_SIZE=-1, ALL_VARCHAR=TRUE, DELIM=';');
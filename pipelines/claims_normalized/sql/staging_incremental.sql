@@ -0,0 +1,27 @@
+-- Incremental staging: only the FKRTL / secondary-diagnosis files not ingested yet are read.
+-- `delta.*` are read_parquet() calls over the Parquet copies of the new files (or empty
+-- relations). The staging views already include those copies.
+CREATE OR REPLACE TABLE staging_fkrtl__new AS
+SELECT *
+FROM {{ delta.fkrtl }};
+
+CREATE OR REPLACE TABLE staging_diagnosa_sekunder__new AS
+SELECT *
+FROM {{ delta.diagnosa_sekunder }};
+
+-- Claims to rebuild: every claim of the new FKRTL rows, plus already staged claims that
+-- received new secondary diagnoses. New files must not re-deliver staged claims (checked
+-- by the build script before committing).
+CREATE OR REPLACE TABLE staging_fkrtl__delta AS
+SELECT *
+FROM staging_fkrtl__new
+UNION ALL BY NAME
+SELECT *
+FROM staging_fkrtl
+WHERE FKL02 IN (SELECT FKL02 FROM staging_diagnosa_sekunder__new)
+  AND FKL02 NOT IN (SELECT FKL02 FROM staging_fkrtl__new);
+
+CREATE OR REPLACE TABLE staging_diagnosa_sekunder__delta AS
+SELECT *
+FROM staging_diagnosa_sekunder
+WHERE FKL02 IN (SELECT FKL02 FROM staging_fkrtl__delta);
@@ -0,0 +1,4 @@
+-- Region (province / district) master.
+CREATE OR REPLACE TABLE staging_region_master AS
+SELECT *
+FROM read_csv_auto('{{ references.region_master }}', HEADER=TRUE, SAMPLE_SIZE=-1, ALL_VARCHAR=TRUE);
@@ -1,4 +1,8 @@
 -- Transform staged data into standardized claims view.
+-- Raw source columns arrive typed from the Parquet copies (raw_parquet.sources in config).
+-- `staging.*` name the staged FKRTL/secondary-diagnosis tables: the full tables, or only the
+-- claims being rebuilt in an incremental run (see incremental_merge.sql). The region and
+-- hospital masters come from their own stages (see `stages` in config.yaml).
 
 DROP TABLE IF EXISTS fkrtl_stage;
 CREATE TABLE fkrtl_stage AS
@@ -8,30 +12,30 @@ SELECT
     CAST(FKL03 AS DATE) AS admit_dt,
     CAST(FKL04 AS DATE) AS discharge_dt,
     GREATEST(DATE_DIFF('day', CAST(FKL03 AS DATE), CAST(FKL04 AS DATE)), 0) AS los,
-    CAST(COALESCE(NULLIF(FKL05, ''), '0') AS INTEGER) AS province_code,
-    CAST(COALESCE(NULLIF(FKL06, ''), '0') AS INTEGER) AS district_code,
-    CAST(COALESCE(NULLIF(FKL07, ''), '0') AS INTEGER) AS facility_ownership_code,
-    CAST(COALESCE(NULLIF(FKL08, ''), '0') AS INTEGER) AS facility_type_code,
-    CAST(COALESCE(NULLIF(FKL09, ''), '0') AS INTEGER) AS facility_class_code,
-    CAST(COALESCE(NULLIF(FKL10, ''), '0') AS INTEGER) AS service_level_code,
-    CAST(COALESCE(NULLIF(FKL11, ''), '0') AS INTEGER) AS poli_type_code,
-    CAST(COALESCE(NULLIF(FKL12, ''), '0') AS INTEGER) AS participant_segment_code,
-    CAST(COALESCE(NULLIF(FKL23, ''), '0') AS INTEGER) AS severity_code,
+    COALESCE(CAST(FKL05 AS INTEGER), 0) AS province_code,
+    COALESCE(CAST(FKL06 AS INTEGER), 0) AS district_code,
+    COALESCE(CAST(FKL07 AS INTEGER), 0) AS facility_ownership_code,
+    COALESCE(CAST(FKL08 AS INTEGER), 0) AS facility_type_code,
+    COALESCE(CAST(FKL09 AS INTEGER), 0) AS facility_class_code,
+    COALESCE(CAST(FKL10 AS INTEGER), 0) AS service_level_code,
+    COALESCE(CAST(FKL11 AS INTEGER), 0) AS poli_type_code,
+    COALESCE(CAST(FKL12 AS INTEGER), 0) AS participant_segment_code,
+    COALESCE(CAST(FKL23 AS INTEGER), 0) AS severity_code,
     FKL17A AS dx_primary_code,
     FKL18A AS dx_primary_label,
     FKL19A AS dx_primary_group,
     FKL18A AS procedure_code,
     FKL18 AS procedure_label,
-    CAST(COALESCE(NULLIF(FKL47, ''), '0') AS DOUBLE) AS amount_claimed,
-    CAST(COALESCE(NULLIF(FKL48, ''), '0') AS DOUBLE) AS amount_paid,
-    CAST(COALESCE(NULLIF(FKL47, ''), '0') AS DOUBLE) - CAST(COALESCE(NULLIF(FKL48, ''), '0') AS DOUBLE) AS amount_gap,
+    COALESCE(CAST(FKL47 AS DOUBLE), 0) AS amount_claimed,
+    COALESCE(CAST(FKL48 AS DOUBLE), 0) AS amount_paid,
+    COALESCE(CAST(FKL47 AS DOUBLE), 0) - COALESCE(CAST(FKL48 AS DOUBLE), 0) AS amount_gap,
     PSTV01 AS patient_id_hash,
     PSTV02 AS family_id_hash,
-    sha256(CONCAT('{{ hashing.patient_salt }}', COALESCE(CAST(PSTV01 AS VARCHAR), ''))) AS patient_key,
-    sha256(CONCAT('{{ hashing.family_salt }}', COALESCE(CAST(PSTV02 AS VARCHAR), ''))) AS family_key,
+    sha256(CONCAT('{{ hashing.patient_salt }}', COALESCE(PSTV01, ''))) AS patient_key,
+    sha256(CONCAT('{{ hashing.family_salt }}', COALESCE(PSTV02, ''))) AS family_key,
     PSTV15 AS claim_weight,
     CURRENT_TIMESTAMP AS generated_at
-FROM staging_fkrtl;
+FROM {{ staging.fkrtl }};
 
 DROP TABLE IF EXISTS dx_secondary_stage;
 CREATE TABLE dx_secondary_stage AS
@@ -40,7 +44,7 @@ SELECT
     LIST(DISTINCT FKL24) AS dx_secondary_codes,
     LIST(DISTINCT FKL24B) FILTER (WHERE COALESCE(FKL24B, '') <> '') AS dx_secondary_labels,
     COUNT(*) AS comorbidity_count
-FROM staging_diagnosa_sekunder
+FROM {{ staging.diagnosa_sekunder }}
 GROUP BY 1;
 
 DROP TABLE IF EXISTS province_lookup_stage;
@@ -91,11 +95,6 @@ FROM staging_region_master
 WHERE "kode_kabupaten/kota" IS NOT NULL
 GROUP BY "kode_kabupaten/kota";
 
-DROP TABLE IF EXISTS hospital_raw_stage;
-CREATE TABLE hospital_raw_stage AS
-SELECT *
-FROM read_csv_auto('{{ references.hospital_master }}', HEADER=TRUE, SAMPLE_SIZE=-1, ALL_VARCHAR=TRUE, DELIM=';');
-
 DROP TABLE IF EXISTS hospital_lookup_stage;
 CREATE TABLE hospital_lookup_stage AS
 WITH raw AS (
@@ -107,7 +106,7 @@ WITH raw AS (
         UPPER(TRIM(kepemilikan)) AS ownership_raw,
         UPPER(TRIM(jenis)) AS type_raw,
         UPPER(TRIM(kelas)) AS class_raw
-    FROM hospital_raw_stage
+    FROM staging_hospital_master
     WHERE COALESCE(TRIM(id), '') <> ''
 )
 SELECT
@@ -324,7 +323,6 @@ FROM with_labels_stage wl
 JOIN peer_group_stage pg USING (claim_id)
 GROUP BY 1;
 
-DROP TABLE IF EXISTS claims_normalized;
 DROP TABLE IF EXISTS claims_base_stage;
 CREATE TABLE claims_base_stage AS
 SELECT
@@ -344,34 +342,53 @@ JOIN peer_group_stage pg USING (claim_id)
 LEFT JOIN peer_stats_stage ps USING (peer_key);
 
 DROP TABLE IF EXISTS duplicate_flag_stage;
+-- A claim is a duplicate candidate when another claim of the same patient with the same
+-- DX/procedure was admitted within 3 days. Within each (patient, dx, procedure) sorted by
+-- admit_dt the closest such claim is always the previous or next row, so a single sorted
+-- window pass replaces the per-claim lookup over the patient's history.
 CREATE TABLE duplicate_flag_stage AS
+WITH episode_neighbours AS (
+    SELECT
+        claim_id,
+        admit_dt,
+        LAG(admit_dt) OVER episode AS prev_admit_dt,
+        LEAD(admit_dt) OVER episode AS next_admit_dt
+    FROM claims_base_stage
+    WHERE patient_key IS NOT NULL
+      AND admit_dt IS NOT NULL
+    WINDOW episode AS (
+        PARTITION BY patient_key, COALESCE(dx_primary_code, ''), COALESCE(procedure_code, '')
+        ORDER BY admit_dt, claim_id
+    )
+)
 SELECT
-    cb.claim_id,
-    EXISTS (
-        SELECT 1
-        FROM claims_base_stage other
-        WHERE other.claim_id <> cb.claim_id
-          AND other.patient_key = cb.patient_key
-          AND other.patient_key IS NOT NULL
-          AND COALESCE(other.dx_primary_code, '') = COALESCE(cb.dx_primary_code, '')
-          AND COALESCE(other.procedure_code, '') = COALESCE(cb.procedure_code, '')
-          AND other.admit_dt IS NOT NULL
-          AND cb.admit_dt IS NOT NULL
-          AND ABS(DATE_DIFF('day', other.admit_dt, cb.admit_dt)) <= 3
-    ) AS duplicate_pattern
-FROM claims_base_stage cb;
+    claim_id,
+    COALESCE(DATE_DIFF('day', prev_admit_dt, admit_dt) <= 3, FALSE)
+        OR COALESCE(DATE_DIFF('day', admit_dt, next_admit_dt) <= 3, FALSE) AS duplicate_pattern
+FROM episode_neighbours;
 
-CREATE TABLE claims_normalized AS
+-- Output tables are built as shadows; build_claims_normalized.py swaps them in atomically.
+-- Rows are clustered by (province_name, admit_dt) so province/date filters skip row groups.
+-- Values outside an ENUM domain (e.g. a new province in the lookup) fall back to the
+-- column's unknown value instead of aborting the build, see enum_types.sql.
+CREATE OR REPLACE TABLE claims_normalized__shadow AS
 SELECT
-    cb.*,
+    cb.* REPLACE (
+        TRY_CAST(cb.province_name AS province_enum) AS province_name,
+        COALESCE(TRY_CAST(cb.severity_group AS severity_enum), 'unknown'::severity_enum) AS severity_group,
+        COALESCE(TRY_CAST(cb.service_type AS service_type_enum), 'Unknown'::service_type_enum) AS service_type,
+        COALESCE(
+            TRY_CAST(cb.facility_class AS facility_class_enum), 'Tidak diketahui'::facility_class_enum
+        ) AS facility_class
+    ),
     COALESCE(df.duplicate_pattern, FALSE) AS duplicate_pattern
 FROM claims_base_stage cb
-LEFT JOIN duplicate_flag_stage df USING (claim_id);
+LEFT JOIN duplicate_flag_stage df USING (claim_id)
+ORDER BY province_name, admit_dt, claim_id;
 
-DROP TABLE IF EXISTS claims_scored;
-CREATE TABLE claims_scored AS
+CREATE OR REPLACE TABLE claims_scored__shadow AS
 SELECT
     *,
     (los <= 1 AND amount_claimed > peer_p90) AS short_stay_high_cost,
     (bpjs_payment_ratio >= 0.95 AND cost_zscore > 2) AS high_cost_full_paid
-FROM claims_normalized;
+FROM claims_normalized__shadow;
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def make_claims_frame(rows: int = 400, seed: int = 7) -> pd.DataFrame:
+    """Synthetic claims_normalized sample covering every rule flag branch."""
+    rng = np.random.default_rng(seed)
+    admit = [date(2022, 1, 1) + timedelta(days=int(offset)) for offset in rng.integers(0, 120, rows)]
+    los = rng.choice([0, 1, 2, 4, 7], rows)
+    amount_claimed = rng.lognormal(14, 1, rows)
+    peer_p90 = rng.lognormal(14, 0.5, rows)
+    peer_p90[rng.random(rows) < 0.05] = np.nan
+    return pd.DataFrame(
+        {
+            "claim_id": [f"C{i:06d}" for i in range(rows)],
+            "patient_key": [f"P{i:04d}" for i in rng.integers(0, rows // 4, rows)],
+            "admit_dt": pd.to_datetime(admit),
+            "discharge_dt": pd.to_datetime(admit) + pd.to_timedelta(los, unit="D"),
+            "los": los,
+            "province_name": rng.choice(["DKI JAKARTA", "JAWA BARAT", "BALI"], rows),
+            "dx_primary_code": rng.choice(["A09", "I10", "E11"], rows),
+            "procedure_code": rng.choice(["A09", "I10", "E11"], rows),
+            "severity_group": rng.choice(["ringan", "sedang", "berat"], rows),
+            "service_type": rng.choice(["RITL", "RJTL"], rows),
+            "facility_class": rng.choice(["RS Kelas B", "RS Kelas C"], rows),
+            "amount_claimed": amount_claimed,
+            "amount_paid": amount_claimed * rng.uniform(0.6, 1.0, rows),
+            "amount_gap": amount_claimed * 0.1,
+            "comorbidity_count": rng.integers(0, 3, rows),
+            "bpjs_payment_ratio": rng.uniform(0.6, 1.0, rows),
+            "peer_mean": peer_p90 * 0.7,
+            "peer_p90": peer_p90,
+            "cost_zscore": rng.normal(0, 1.5, rows),
+            "duplicate_pattern": rng.random(rows) < 0.1,
+        }
+    )
+
+
+def make_scores_frame(claims: pd.DataFrame, seed: int = 11) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    raw = rng.normal(0, 0.1, len(claims))
+    return pd.DataFrame(
+        {
+            "claim_id": claims["claim_id"],
+            "ml_score": raw,
+            "ml_score_normalized": (raw - raw.min()) / (raw.max() - raw.min()),
+            "model_version": "iso_test",
+        }
+    )
+
+
+@pytest.fixture(autouse=True)
+def calibration_dir(tmp_path, monkeypatch):
+    """Keep score calibrations fitted by tests out of ml/artifacts."""
+    directory = tmp_path / "calibration"
+    monkeypatch.setattr("ml.inference.calibration.CALIBRATION_DIR", directory)
+    return directory
+
+
+@pytest.fixture
+def claims_frame():
+    return make_claims_frame()
+
+
+@pytest.fixture
+def analytics_db(tmp_path):
+    """DuckDB file with synthetic claims_normalized + claims_ml_scores tables."""
+    path = tmp_path / "analytics.duckdb"
+    claims = make_claims_frame()
+    scores = make_scores_frame(claims)
+    with duckdb.connect(str(path)) as con:
+        con.register("claims_df", claims)
+        con.register("scores_df", scores)
+        con.execute("CREATE TABLE claims_normalized AS SELECT * FROM claims_df")
+        con.execute("CREATE TABLE claims_ml_scores AS SELECT * FROM scores_df")
+    return path
@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+from app import create_app
+from app.services import audit_copilot, chat_agent, risk_scoring
+from app.services.cache import TTLCache
+from ml.common.data_access import DataLoader
+
+
+def test_claim_row_is_fetched_once_per_request(analytics_db, monkeypatch):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    lookups = []
+    get_claim = loader.get_claim
+
+    def counting_get_claim(claim_id, *args, **kwargs):
+        lookups.append(claim_id)
+        return get_claim(claim_id, *args, **kwargs)
+
+    monkeypatch.setattr(loader, "get_claim", counting_get_claim)
+    monkeypatch.setattr(audit_copilot, "get_data_loader", lambda: loader)
+
+    app = create_app("default")
+    for _ in range(2):
+        with app.test_request_context():
+            audit_copilot._ensure_claim_exists("C000007")
+            assert audit_copilot.get_claim_row("C000007")["claim_id"].iloc[0] == "C000007"
+            with pytest.raises(audit_copilot.ClaimNotFound):
+                audit_copilot._ensure_claim_exists("missing")
+            assert audit_copilot.get_claim_row("missing").empty
+
+    assert lookups == ["C000007", "missing"] * 2
+
+
+def test_claim_context_is_cached_until_scores_snapshot_changes(analytics_db, monkeypatch):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    builds = []
+    snapshot_lookups = []
+    build = audit_copilot._build_claim_context
+
+    def counting_build(*args):
+        builds.append(args[1])
+        return build(*args)
+
+    def counting_snapshot(*args):
+        snapshot_lookups.append(snapshot[0].run_id)
+        return snapshot[0]
+
+    snapshot = [risk_scoring.RankedSnapshot(run_id="run-1", is_current=False)]
+    monkeypatch.setattr(audit_copilot, "get_data_loader", lambda: loader)
+    monkeypatch.setattr(audit_copilot, "_build_claim_context", counting_build)
+    monkeypatch.setattr(audit_copilot, "_CONTEXT_CACHE", TTLCache(max_entries=8, ttl=60))
+    monkeypatch.setattr(risk_scoring, "_ranked_snapshot", counting_snapshot)
+
+    app = create_app("default")
+    with app.test_request_context():
+        first = audit_copilot._load_claim_context("C000007")
+        assert audit_copilot._load_claim_context("C000007") is first
+        assert first.data["risk_score"] >= first.data["rule_score"]
+
+    snapshot[0] = risk_scoring.RankedSnapshot(run_id="run-2", is_current=False)
+    with app.test_request_context():
+        assert audit_copilot._load_claim_context("C000007") is not first
+        audit_copilot._load_claim_context("C000007")
+
+    assert builds == ["C000007", "C000007"]
+    assert snapshot_lookups == ["run-1", "run-2"]
+    stats = audit_copilot.claim_context_cache_stats()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+
+
+def test_flag_explainer_without_ranked_table(analytics_db, monkeypatch):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    row = pd.Series({"flags": ["short_stay_high_cost"]})
+    monkeypatch.setattr(chat_agent, "get_data_loader", lambda: loader)
+    monkeypatch.setattr(chat_agent, "_claim_data", lambda claim_id: row)
+
+    reply = chat_agent.flag_explainer_tool.invoke({"claim_id": "C000007"})
+    assert reply.startswith("short_stay_high_cost: ")
+    assert "belum tersedia" in reply
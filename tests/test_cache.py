@@ -0,0 +1,103 @@
+import os
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.cache import CacheBackend, FileCache, TTLCache, cache_key
+
+
+def test_ttl_cache_evicts_least_recently_used_and_expires(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr("app.services.cache.time.monotonic", lambda: clock[0])
+    cache = TTLCache(max_entries=2, ttl=10)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    clock[0] += 11
+    assert cache.get("a") is None
+    assert cache.get_or_set("a", lambda: 4) == 4
+    assert cache.get_or_set("a", lambda: 5) == 4
+
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expirations"]) == (4, 3, 1, 1)
+
+
+def test_ttl_cache_scopes_keys_to_generation():
+    cache = TTLCache(max_entries=10, ttl=60)
+    cache.set_generation("run-1")
+    cache.set("a", 1)
+    cache.set_generation("run-1")
+    assert cache.get("a") == 1
+
+    cache.set_generation("run-2")
+    assert cache.get("a") is None
+    assert cache.stats()["invalidations"] == 1
+    cache.set_generation("run-1")
+    assert cache.get("a") == 1
+    with pytest.raises(TypeError):
+        CacheBackend(max_entries=1, ttl=1)
+
+
+def test_file_cache_is_shared_between_instances_and_expires(tmp_path, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("app.services.cache.time.time", lambda: clock[0])
+    writer = FileCache(tmp_path / "reports", max_entries=2, ttl=10)
+    reader = FileCache(tmp_path / "reports", max_entries=2, ttl=10)
+
+    key = cache_key("tariff_insight", {"province": "BALI", "limit": 5})
+    assert key == cache_key("tariff_insight", {"limit": 5, "province": "BALI"})
+    writer.set(key, [{"facility_id": "F1", "total_gap": 1.5}])
+    assert reader.get(key) == [{"facility_id": "F1", "total_gap": 1.5}]
+    assert [path.suffix for path in (tmp_path / "reports").iterdir()] == [".json"]
+
+    writer.set("b", 2)
+    writer.set("c", 3)
+    os.utime(writer._path(key), (0, 0))
+    writer.prune()
+    assert len(reader) == 2 and reader.get(key) is None
+
+    clock[0] += 11
+    assert reader.get_or_set("c", lambda: 4) == 4
+    stats = reader.stats()
+    assert stats["backend"] == "file"
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 2, 1)
+
+    writer.clear()
+    assert len(reader) == 0
+
+
+@dataclass
+class _Page:
+    items: list
+    total: int
+
+
+def test_file_cache_stores_json_and_keeps_other_generations(tmp_path):
+    directory = tmp_path / "pages"
+    worker_a = FileCache(directory, max_entries=10, ttl=60, encode=asdict, decode=lambda data: _Page(**data))
+    worker_b = FileCache(directory, max_entries=10, ttl=60, encode=asdict, decode=lambda data: _Page(**data))
+    worker_a.set_generation("run-1")
+    worker_b.set_generation("run-1")
+
+    page = _Page(items=[{"claim_id": "C1", "score": np.float64(0.5), "admit": pd.Timestamp("2023-01-02"), "gap": np.nan}], total=1)
+    worker_a.set("page", page)
+    assert worker_b.get("page") == _Page(items=[{"claim_id": "C1", "score": 0.5, "admit": "2023-01-02T00:00:00", "gap": None}], total=1)
+
+    worker_b.set_generation("run-2")
+    assert worker_b.get("page") is None
+    assert worker_a.get("page") is not None
+    assert len(worker_a) == 1
+
+    # Files are parsed as JSON only; anything else is dropped as a miss.
+    path = worker_a._path(worker_a._scoped("page"))
+    path.write_bytes(b"\x80\x04\x95 not json")
+    assert worker_a.get("page") is None
+    assert not path.exists()
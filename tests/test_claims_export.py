@@ -0,0 +1,66 @@
+import io
+import json
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from app.services import claims_export, risk_scoring
+from ml.common.data_access import DataLoader, get_connection_pool
+
+
+@pytest.fixture
+def export_env(analytics_db, monkeypatch):
+    monkeypatch.setenv("DUCKDB_PATH", str(analytics_db))
+    monkeypatch.setattr(claims_export, "EXPORT_BATCH_ROWS", 64)
+    return DataLoader(duckdb_path=str(analytics_db))
+
+
+def test_export_streams_all_filtered_rows_in_ranking_order(export_env):
+    filters = {"province": "BALI"}
+    expected, total = risk_scoring._fetch_filtered_claims(
+        export_env, risk_scoring.SCORES_CACHE_TABLE, filters, page=1, page_size=1000
+    )
+
+    ndjson = claims_export.export_high_risk_claims(filters, "ndjson")
+    chunks = list(ndjson.chunks)
+    rows = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    parquet = pq.read_table(io.BytesIO(b"".join(claims_export.export_high_risk_claims(filters, "parquet").chunks)))
+    csv = pd.read_csv(io.BytesIO(b"".join(claims_export.export_high_risk_claims(filters, "CSV").chunks)))
+
+    assert len(chunks) > 1
+    assert ndjson.mimetype == "application/x-ndjson"
+    assert [row["claim_id"] for row in rows] == expected["claim_id"].tolist()
+    assert parquet.column("claim_id").to_pylist() == expected["claim_id"].tolist()
+    assert csv["claim_id"].tolist() == expected["claim_id"].tolist()
+    assert len(rows) == total
+    assert rows[0]["flags"] == list(expected["flags"].iloc[0])
+    assert csv["flags"].fillna("").iloc[0] == "|".join(expected["flags"].iloc[0])
+
+
+def test_export_of_empty_result_is_still_a_valid_file(export_env):
+    filters = {"province": "TIDAK ADA"}
+
+    parquet = pq.read_table(io.BytesIO(b"".join(claims_export.export_high_risk_claims(filters, "parquet").chunks)))
+    csv = b"".join(claims_export.export_high_risk_claims(filters, "csv").chunks)
+
+    assert parquet.num_rows == 0
+    assert parquet.column_names == claims_export.EXPORT_COLUMNS
+    assert csv.decode().strip().split(",") == [f'"{column}"' for column in claims_export.EXPORT_COLUMNS]
+    with pytest.raises(claims_export.InvalidExportFormat):
+        claims_export.export_high_risk_claims(filters, "xlsx")
+
+
+def test_slow_export_download_does_not_hold_off_writers(export_env, monkeypatch):
+    monkeypatch.setattr(get_connection_pool(export_env.duckdb_path), "timeout", 2.0)
+    expected, _ = risk_scoring._fetch_filtered_claims(
+        export_env, risk_scoring.SCORES_CACHE_TABLE, {}, page=1, page_size=1000
+    )
+
+    chunks = claims_export.export_high_risk_claims({}, "ndjson").chunks
+    first = next(chunks)
+    export_env.execute("DELETE FROM claims_normalized")
+    rows = [json.loads(line) for line in (first + b"".join(chunks)).splitlines()]
+
+    assert [row["claim_id"] for row in rows] == expected["claim_id"].tolist()
+    assert export_env.query("SELECT COUNT(*) AS n FROM claims_normalized")["n"].iloc[0] == 0
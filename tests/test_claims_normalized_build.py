@@ -0,0 +1,319 @@
+import argparse
+import hashlib
+import importlib.util
+from datetime import date, timedelta
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+
+from ml.common import metadata
+from ml.common.data_access import staging_path, writer_waiting
+
+BUILD_SCRIPT = Path(__file__).resolve().parents[1] / "pipelines" / "claims_normalized" / "build_claims_normalized.py"
+
+
+def load_build_module():
+    spec = importlib.util.spec_from_file_location("build_claims_normalized", BUILD_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def write_claim_batch(raw: Path, batch: int, rows: int = 200) -> None:
+    """One FKRTL + secondary diagnosis file pair over few patients and codes, so episodes collide."""
+    rng = np.random.default_rng(batch)
+    province = rng.choice([11, 12], rows)
+    claimed = np.round(rng.uniform(1e5, 5e6, rows), 2)
+    admit = [date(2023, 1, 1) + timedelta(days=int(offset)) for offset in rng.integers(0, 30, rows)]
+    dx = rng.choice(["I10", "E11", "J18"], rows)
+    fkrtl = pd.DataFrame(
+        {
+            "PSTV01": [f"{n:08d}" for n in rng.integers(1000, 1030, rows)],
+            "PSTV02": [f"{n:08d}" for n in rng.integers(500, 515, rows)],
+            "PSTV15": rng.choice(["1", "0.5", "12.250", "40"], rows),
+            "FKP02": "X",
+            "FKL02": [f"C{batch}{i:05d}" for i in range(rows)],
+            "FKL03": admit,
+            "FKL04": [day + timedelta(days=int(los)) for day, los in zip(admit, rng.integers(0, 6, rows))],
+            "FKL05": province,
+            "FKL06": [f"{code:05d}" for code in province * 100 + rng.integers(1, 3, rows)],
+            "FKL07": rng.integers(1, 4, rows),
+            "FKL08": rng.integers(1, 3, rows),
+            "FKL09": rng.integers(1, 5, rows),
+            "FKL10": rng.integers(1, 3, rows),
+            "FKL11": rng.integers(1, 3, rows),
+            "FKL12": rng.integers(1, 4, rows),
+            "FKL17A": dx,
+            "FKL18": "",
+            "FKL18A": dx,
+            "FKL19A": [code[0] for code in dx],
+            "FKL23": rng.integers(1, 4, rows),
+            "FKL47": claimed,
+            "FKL48": np.round(claimed * rng.uniform(0.5, 1.0, rows), 2),
+        }
+    )
+    fkrtl.to_csv(raw / f"fkrtl_{batch}.csv", index=False)
+    secondary = fkrtl.sample(frac=0.5, random_state=batch)
+    codes = rng.choice(["E78", "N18"], len(secondary))
+    pd.DataFrame({"FKL02": secondary["FKL02"], "FKL24": codes, "FKL24A": codes, "FKL24B": "label"}).to_csv(
+        raw / f"dxsec_{batch}.csv", index=False
+    )
+
+
+def write_icd_references(root: Path) -> None:
+    """transform.sql reads the ICD-10 label lists relative to the working directory."""
+    icd_dir = root / "resource" / "private_bpjs_data" / "raw_cleaned"
+    icd_dir.mkdir(parents=True)
+    for kind in ("primer", "masuk"):
+        (icd_dir / f"2022_kode_icd10_untuk_diagnosis_fkrtl_diagnosis_{kind}.csv").write_text(
+            "ICD10_Code,ICD10_Text\nI10,I10 Hipertensi\nE11,E11 Diabetes\n"
+        )
+
+
+def write_etl_config(tmp_path: Path, name: str, raw: Path) -> Path:
+    """Copy of the pipeline config pointed at the synthetic sources under ``raw``."""
+    config = yaml.safe_load(BUILD_SCRIPT.with_name("config.yaml").read_text())
+    out = tmp_path / name
+    (raw / "hospital.csv").write_text("id;nama;propinsi;kab;kepemilikan;jenis;kelas\nH1101;RS 1101;ACEH;KAB 1101;SWASTA;RUMAH SAKIT;B\n")
+    (raw / "region.csv").write_text("kode_prov,kode_kabupaten/kota,nama_kabupaten/kota\n11,1101,KAB 1101\n11,1102,KAB 1102\n12,1201,KAB 1201\n")
+    config.update(
+        duckdb_path=str(out / "analytics.duckdb"),
+        sources={"fkrtl": str(raw / "fkrtl_*.csv"), "diagnosa_sekunder": str(raw / "dxsec_*.csv")},
+        references={"hospital_master": str(raw / "hospital.csv"), "region_master": str(raw / "region.csv")},
+        output={"parquet_dir": str(out / "data"), "table_name": "claims_normalized"},
+    )
+    config["raw_parquet"]["dir"] = str(out / "raw")
+    fkrtl_schema = config["raw_parquet"]["sources"]["fkrtl"]
+    header = (raw / "fkrtl_1.csv").read_text().split("\n", 1)[0].split(",")
+    fkrtl_schema["columns"] = {column: kind for column, kind in fkrtl_schema["columns"].items() if column in header}
+    path = tmp_path / f"{name}.yaml"
+    path.write_text(yaml.safe_dump(config))
+    return path
+
+
+def run_etl(build, config_path: Path, incremental: bool = False) -> None:
+    build.main(argparse.Namespace(config=config_path, incremental=incremental, refresh_ml=False, refresh_top_k=None))
+
+
+def read_outputs(config_path: Path) -> dict[str, pd.DataFrame]:
+    duckdb_path = yaml.safe_load(config_path.read_text())["duckdb_path"]
+    with duckdb.connect(duckdb_path, read_only=True) as con:
+        claims = con.execute("SELECT * EXCLUDE (generated_at) FROM claims_normalized ORDER BY claim_id").fetchdf()
+        pairs = con.execute("SELECT * FROM claim_duplicate_pairs ORDER BY claim_id_a, claim_id_b").fetchdf()
+    claims["dx_secondary_codes"] = [sorted(codes) if isinstance(codes, (list, np.ndarray)) else None for codes in claims["dx_secondary_codes"]]
+    return {"claims_normalized": claims, "claim_duplicate_pairs": pairs}
+
+
+def test_incremental_append_matches_full_rebuild(tmp_path, monkeypatch):
+    build = load_build_module()
+    monkeypatch.chdir(tmp_path)
+    write_icd_references(tmp_path)
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    for batch in (1, 2):
+        write_claim_batch(raw, batch)
+    incremental = write_etl_config(tmp_path, "incremental", raw)
+    run_etl(build, incremental)
+
+    write_claim_batch(raw, 3)
+    run_etl(build, incremental, incremental=True)
+    full = write_etl_config(tmp_path, "full", raw)
+    run_etl(build, full)
+
+    with duckdb.connect(yaml.safe_load(incremental.read_text())["duckdb_path"], read_only=True) as con:
+        assert [row[0] for row in con.execute("SELECT mode FROM etl_runs ORDER BY executed_at").fetchall()] == ["full", "incremental"]
+    actual, expected = read_outputs(incremental), read_outputs(full)
+    assert len(actual["claims_normalized"]) == 600
+    assert actual["claims_normalized"]["duplicate_pattern"].any()
+    pairs = actual["claim_duplicate_pairs"]
+    assert (pairs["claim_id_a"].str.startswith("C1") & pairs["claim_id_b"].str.startswith("C3")).any()
+    for table, frame in expected.items():
+        pd.testing.assert_frame_equal(actual[table], frame, check_exact=False, rtol=1e-9)
+
+
+def test_build_keeps_csv_text_of_ids_and_codes(tmp_path, monkeypatch):
+    build = load_build_module()
+    monkeypatch.chdir(tmp_path)
+    write_icd_references(tmp_path)
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    write_claim_batch(raw, 1)
+    config_path = write_etl_config(tmp_path, "full", raw)
+    config = yaml.safe_load(config_path.read_text())
+    run_etl(build, config_path)
+
+    source = pd.read_csv(raw / "fkrtl_1.csv", dtype=str, keep_default_na=False).sort_values("FKL02")
+    claims = read_outputs(config_path)["claims_normalized"]
+    assert claims["facility_code"].tolist() == source["FKL06"].tolist()
+    assert claims["patient_id_hash"].tolist() == source["PSTV01"].tolist()
+    assert claims["family_id_hash"].tolist() == source["PSTV02"].tolist()
+    assert claims["claim_weight"].tolist() == source["PSTV15"].tolist()
+    salt = config["hashing"]["patient_salt"]
+    assert claims["patient_key"].tolist() == [hashlib.sha256(f"{salt}{value}".encode()).hexdigest() for value in source["PSTV01"]]
+    assert set(claims["district_code"]) == {1101, 1102, 1201, 1202}
+
+
+def test_stages_run_outside_the_live_write_lock(tmp_path, monkeypatch):
+    build = load_build_module()
+    monkeypatch.chdir(tmp_path)
+    write_icd_references(tmp_path)
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    write_claim_batch(raw, 1)
+    config_path = write_etl_config(tmp_path, "full", raw)
+    duckdb_path = yaml.safe_load(config_path.read_text())["duckdb_path"]
+    run_etl(build, config_path)
+
+    seen = []
+    run_stages = build.run_stages
+
+    def checked_run_stages(con, config, order):
+        seen.append(writer_waiting(duckdb_path))
+        with duckdb.connect(duckdb_path, read_only=True) as live:
+            seen.append(live.execute("SELECT COUNT(*) FROM claims_normalized").fetchone()[0])
+        run_stages(con, config, order)
+
+    monkeypatch.setattr(build, "run_stages", checked_run_stages)
+    write_claim_batch(raw, 2)
+    run_etl(build, config_path)
+
+    assert seen == [False, 200]
+    assert len(read_outputs(config_path)["claims_normalized"]) == 400
+    assert not staging_path(duckdb_path, build.BUILD_DATABASE_NAME).exists()
+
+
+def test_values_outside_the_enum_domains_fall_back_instead_of_failing(tmp_path, monkeypatch):
+    build = load_build_module()
+    monkeypatch.chdir(tmp_path)
+    write_icd_references(tmp_path)
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    write_claim_batch(raw, 1)
+    source = pd.read_csv(raw / "fkrtl_1.csv", dtype=str, keep_default_na=False)
+    source.loc[:9, "FKL10"] = "3"
+    source.to_csv(raw / "fkrtl_1.csv", index=False)
+    # Domains that lack ACEH and RS Kelas C, as if the lookup gained values first.
+    enum_sql = build.ENUM_TYPES_SQL.read_text().replace("    'ACEH',\n", "").replace("    'RS Kelas C',\n", "")
+    narrowed = tmp_path / "enum_types.sql"
+    narrowed.write_text(enum_sql)
+    monkeypatch.setattr(build, "ENUM_TYPES_SQL", narrowed)
+    config_path = write_etl_config(tmp_path, "full", raw)
+    run_etl(build, config_path)
+
+    claims = read_outputs(config_path)["claims_normalized"].set_index("claim_id")
+    source = source.set_index("FKL02").loc[claims.index]
+    assert claims["province_name"].isna().tolist() == (source["FKL05"] == "11").tolist()
+    assert set(claims["province_name"].dropna()) == {"SUMATERA UTARA"}
+    assert set(claims.loc[source["FKL09"] == "3", "facility_class"]) == {"Tidak diketahui"}
+    assert set(claims.loc[source["FKL09"] == "2", "facility_class"]) == {"RS Kelas B"}
+    assert claims["service_type"].tolist() == source["FKL10"].map({"1": "RJTL", "2": "RITL", "3": "Unknown"}).tolist()
+
+
+def test_plan_incremental_picks_new_files_and_falls_back_on_changes(tmp_path):
+    build = load_build_module()
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    (raw / "fkrtl_2023_01.csv").write_text("FKL02\nC1\n")
+    (raw / "dxsec_2023_01.csv").write_text("FKL02,FKL24\nC1,I10\n")
+    (raw / "hospital.csv").write_text("id\n1\n")
+    duckdb_path = str(tmp_path / "analytics.duckdb")
+    config = {
+        "ruleset_version": "RULESET_v1",
+        "sources": {"fkrtl": str(raw / "fkrtl_*.csv"), "diagnosa_sekunder": str(raw / "dxsec_*.csv")},
+        "references": {"hospital_master": str(raw / "hospital.csv")},
+    }
+
+    metadata.ensure_metadata_tables(duckdb_path)
+    with duckdb.connect(duckdb_path) as con:
+        for table in build.INCREMENTAL_REQUIRED_TABLES:
+            con.execute(f"CREATE TABLE {table} (claim_id TEXT)")
+        assert build.plan_incremental(con, config, build.scan_source_files(config, {}), {}) == (
+            None,
+            "no source manifest recorded yet",
+        )
+
+    metadata.record_etl_run(duckdb_path, "RULESET_v1", 1, source_files=build.scan_source_files(config, {}))
+    manifest = metadata.load_source_manifest(duckdb_path)
+    assert sorted(item.source for item in manifest.values()) == ["diagnosa_sekunder", "fkrtl", "hospital_master"]
+
+    (raw / "fkrtl_2023_02.csv").write_text("FKL02\nC2\n")
+    with duckdb.connect(duckdb_path) as con:
+        new_files, _ = build.plan_incremental(con, config, build.scan_source_files(config, manifest), manifest)
+        assert [item.path for item in new_files] == [str(raw / "fkrtl_2023_02.csv")]
+
+        (raw / "hospital.csv").write_text("id\n2\n")
+        plan = build.plan_incremental(con, config, build.scan_source_files(config, manifest), manifest)
+        assert plan == (None, f"source file changed: {raw / 'hospital.csv'}")
+
+        plan = build.plan_incremental(con, {**config, "ruleset_version": "RULESET_v2"}, [], manifest)
+        assert plan == (None, "ruleset_version changed")
+
+
+def test_ingest_raw_sources_converts_each_csv_once(tmp_path, capsys):
+    build = load_build_module()
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    csv_path = raw / "fkrtl_2023_01.csv"
+    csv_path.write_text("FKL02,FKL03,FKL05,FKL47,FKL18\nC1,2023-01-02,31,1000.5,A\nC2,2023-01-03,51,,B\nC3,2023-01-04,,7,C\n")
+    config = {
+        "sources": {"fkrtl": str(raw / "fkrtl_*.csv")},
+        "raw_parquet": {
+            "dir": str(tmp_path / "parquet"),
+            "sources": {
+                "fkrtl": {
+                    "partition_by": ["FKL05"],
+                    "columns": {"FKL02": "VARCHAR", "FKL03": "DATE", "FKL05": "SMALLINT", "FKL47": "DOUBLE"},
+                }
+            },
+        },
+    }
+
+    with duckdb.connect() as con:
+        ingested = build.ingest_raw_sources(con, config)
+        assert len(ingested["fkrtl"][str(csv_path)]) == 3
+        rows = con.execute(
+            f"""
+            SELECT FKL02, FKL03, FKL05, FKL47, FKL18, typeof(FKL03), typeof(FKL05), typeof(FKL47)
+            FROM {build.raw_parquet_relation(config, "fkrtl")}
+            ORDER BY FKL02
+            """
+        ).fetchall()
+        assert [row[:5] for row in rows] == [
+            ("C1", date(2023, 1, 2), 31, 1000.5, "A"),
+            ("C2", date(2023, 1, 3), 51, None, "B"),
+            ("C3", date(2023, 1, 4), None, 7.0, "C"),
+        ]
+        assert rows[0][5:] == ("DATE", "SMALLINT", "DOUBLE")
+
+        capsys.readouterr()
+        assert build.ingest_raw_sources(con, config) == ingested
+        assert "Converting" not in capsys.readouterr().out
+
+        config["raw_parquet"]["sources"]["fkrtl"]["partition_by"] = []
+        ingested = build.ingest_raw_sources(con, config)
+        assert [Path(path).name for path in ingested["fkrtl"][str(csv_path)]] == [f"{build._raw_file_tag(str(csv_path))}.parquet"]
+        assert len(list((tmp_path / "parquet" / "fkrtl").rglob("*.parquet"))) == 1
+
+
+def test_plan_stages_runs_only_what_targets_need():
+    build = load_build_module()
+    config = yaml.safe_load(BUILD_SCRIPT.with_name("config.yaml").read_text())
+
+    order = build.plan_stages(config["stages"], build.STAGE_TARGETS)
+
+    assert order.index("staging_hospital_master") < order.index("transform") < order.index("duplicate_pairs")
+    assert order.count("staging_hospital_master") == 1
+    assert not {"staging_kepesertaan", "staging_fktp_kapitasi", "staging_non_kap"} & set(order)
+
+    stages = {
+        "a": {"sql": "a.sql", "inputs": ["b_out"], "outputs": ["a_out"]},
+        "b": {"sql": "b.sql", "inputs": ["a_out"], "outputs": ["b_out"]},
+    }
+    with pytest.raises(ValueError, match="cycle"):
+        build.plan_stages(stages, ["a_out"])
+    with pytest.raises(ValueError, match="No stage produces missing"):
+        build.plan_stages({"a": {"sql": "a.sql", "inputs": ["missing"], "outputs": ["a_out"]}}, ["a_out"])
@@ -0,0 +1,132 @@
+from datetime import date, timedelta
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+SQL_DIR = Path(__file__).resolve().parents[1] / "pipelines" / "claims_normalized" / "sql"
+TRANSFORM_SQL = SQL_DIR / "transform.sql"
+
+# Per-request self-join /reports/duplicates ran before claim_duplicate_pairs existed.
+LEGACY_DUPLICATE_PAIRS_SQL = """
+    SELECT
+        LEAST(a.claim_id, b.claim_id) AS claim_id_a,
+        GREATEST(a.claim_id, b.claim_id) AS claim_id_b,
+        ABS(DATE_DIFF('day', a.admit_dt, b.admit_dt)) AS gap_days,
+        a.dx_primary_code,
+        a.procedure_code
+    FROM claims_normalized__shadow a
+    JOIN claims_normalized__shadow b
+      ON a.patient_key = b.patient_key
+     AND a.claim_id < b.claim_id
+     AND COALESCE(a.dx_primary_code, '') = COALESCE(b.dx_primary_code, '')
+     AND COALESCE(a.procedure_code, '') = COALESCE(b.procedure_code, '')
+     AND a.patient_key IS NOT NULL
+     AND ABS(DATE_DIFF('day', a.admit_dt, b.admit_dt)) <= 3
+"""
+
+# Correlated per-claim lookup the windowed pass replaced; kept as the reference result.
+LEGACY_DUPLICATE_FLAG_SQL = """
+    SELECT
+        cb.claim_id,
+        EXISTS (
+            SELECT 1
+            FROM claims_base_stage other
+            WHERE other.claim_id <> cb.claim_id
+              AND other.patient_key = cb.patient_key
+              AND other.patient_key IS NOT NULL
+              AND COALESCE(other.dx_primary_code, '') = COALESCE(cb.dx_primary_code, '')
+              AND COALESCE(other.procedure_code, '') = COALESCE(cb.procedure_code, '')
+              AND other.admit_dt IS NOT NULL
+              AND cb.admit_dt IS NOT NULL
+              AND ABS(DATE_DIFF('day', other.admit_dt, cb.admit_dt)) <= 3
+        ) AS duplicate_pattern
+    FROM claims_base_stage cb
+"""
+
+
+def transform_statement(table_name: str) -> str:
+    """The `CREATE [OR REPLACE] TABLE <table_name> AS ...` statement of transform.sql."""
+    sql = TRANSFORM_SQL.read_text()
+    start = sql.rindex("CREATE", 0, sql.index(f" TABLE {table_name} AS"))
+    return sql[start : sql.index(";", start)]
+
+
+def make_base_stage(rows: int = 3000, seed: int = 5) -> pd.DataFrame:
+    """Few patients and codes over a short period, so episodes collide often."""
+    rng = np.random.default_rng(seed)
+    admit = pd.Series([date(2023, 1, 1) + timedelta(days=int(offset)) for offset in rng.integers(0, 90, rows)])
+    admit[rng.random(rows) < 0.03] = None
+    patient_key = pd.Series([f"P{i:03d}" for i in rng.integers(0, 150, rows)])
+    patient_key[rng.random(rows) < 0.03] = None
+    dx = pd.Series(rng.choice(["A09", "I10", "E11"], rows))
+    dx[rng.random(rows) < 0.1] = None
+    procedure = pd.Series(rng.choice(["89.03", "99.04"], rows))
+    procedure[rng.random(rows) < 0.1] = None
+    return pd.DataFrame(
+        {
+            "claim_id": [f"C{i:06d}" for i in rng.permutation(rows)],
+            "patient_key": patient_key,
+            "dx_primary_code": dx,
+            "procedure_code": procedure,
+            "admit_dt": pd.to_datetime(admit).dt.date,
+            "province_name": rng.choice(["BALI", "JAWA BARAT"], rows),
+            "facility_id": rng.choice(["F1", "F2", "F3"], rows),
+        }
+    )
+
+
+def test_windowed_duplicate_flags_match_correlated_lookup():
+    base = make_base_stage()
+    with duckdb.connect() as con:
+        con.register("base_df", base)
+        con.execute(
+            """
+            CREATE TABLE claims_base_stage AS
+            SELECT claim_id, patient_key, dx_primary_code, procedure_code, CAST(admit_dt AS DATE) AS admit_dt
+            FROM base_df
+            """
+        )
+        expected = con.execute(f"{LEGACY_DUPLICATE_FLAG_SQL} ORDER BY claim_id").fetchdf()
+        con.execute(transform_statement("duplicate_flag_stage"))
+        actual = con.execute(
+            """
+            SELECT cb.claim_id, COALESCE(df.duplicate_pattern, FALSE) AS duplicate_pattern
+            FROM claims_base_stage cb
+            LEFT JOIN duplicate_flag_stage df USING (claim_id)
+            ORDER BY cb.claim_id
+            """
+        ).fetchdf()
+
+    assert 0 < expected["duplicate_pattern"].sum() < len(expected)
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_windowed_duplicate_pairs_match_self_join():
+    base = make_base_stage()
+    with duckdb.connect() as con:
+        con.register("base_df", base)
+        con.execute(
+            "CREATE TABLE claims_normalized__shadow AS SELECT * REPLACE (CAST(admit_dt AS DATE) AS admit_dt) FROM base_df"
+        )
+        expected = con.execute(f"{LEGACY_DUPLICATE_PAIRS_SQL} ORDER BY gap_days, claim_id_a, claim_id_b").fetchdf()
+        con.execute(
+            (SQL_DIR / "duplicate_pairs.sql")
+            .read_text()
+            .replace("{{ stage.input }}", "claims_normalized__shadow")
+            .replace("{{ stage.output }}", "claim_duplicate_pairs__shadow")
+        )
+        actual = con.execute(
+            """
+            SELECT p.*, n.province_name AS claim_province, n.facility_id AS claim_facility
+            FROM claim_duplicate_pairs__shadow p
+            JOIN claims_normalized__shadow n ON n.claim_id = p.claim_id_a
+            ORDER BY p.gap_days, p.claim_id_a, p.claim_id_b
+            """
+        ).fetchdf()
+
+    assert len(expected) > 100
+    pd.testing.assert_frame_equal(actual[expected.columns], expected)
+    assert (actual["province_name"] == actual["claim_province"]).all()
+    assert (actual["facility_id_a"] == actual["claim_facility"]).all()
@@ -0,0 +1,188 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import duckdb
+import pytest
+
+from ml.common.data_access import (
+    DataLoader,
+    DuckDBConnectionPool,
+    get_connection_pool,
+    get_data_loader,
+    swap_in_shadow_tables,
+    write_connection,
+)
+
+
+def test_pooled_reads_see_writes_from_this_and_other_connections(analytics_db):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    pool = get_connection_pool(str(analytics_db))
+
+    before = loader.query("SELECT COUNT(*) AS n FROM claims_normalized")["n"].iloc[0]
+    loader.execute("DELETE FROM claims_normalized WHERE claim_id IN (SELECT claim_id FROM claims_normalized LIMIT 10)")
+    assert loader.query("SELECT COUNT(*) AS n FROM claims_normalized")["n"].iloc[0] == before - 10
+
+    pool.close()
+    with duckdb.connect(str(analytics_db)) as con:
+        con.execute("CREATE TABLE external_marker AS SELECT 1 AS x")
+    assert loader.table_exists("external_marker")
+    assert pool.stats["opens"] >= 3
+
+
+def test_pool_bounds_concurrent_cursors_and_releases_when_idle(analytics_db):
+    pool = DuckDBConnectionPool(str(analytics_db), size=2, idle_seconds=0.5)
+    results = []
+
+    def worker():
+        with pool.connection() as con:
+            results.append(con.execute("SELECT COUNT(*) FROM claims_normalized").fetchone()[0])
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(results)) == 1 and len(results) == 8
+    assert len(pool._idle) <= 2
+    assert pool.stats["opens"] == 1
+
+    pool._reaper.join(timeout=5)
+    assert pool._base is None
+
+
+def test_other_process_takes_write_lock_while_pool_serves_reads(analytics_db):
+    pool = DuckDBConnectionPool(str(analytics_db), idle_seconds=60)
+    stop = threading.Event()
+    reads = []
+
+    def reader():
+        while not stop.is_set():
+            with pool.connection() as con:
+                reads.append(con.execute("SELECT COUNT(*) FROM claims_normalized").fetchone()[0])
+            time.sleep(0.01)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    try:
+        while not reads:
+            time.sleep(0.01)
+        script = (
+            "import sys; from ml.common.data_access import write_connection\n"
+            "with write_connection(sys.argv[1]) as con:\n"
+            "    con.execute('CREATE TABLE writer_marker AS SELECT 1 AS x')\n"
+        )
+        env = {**os.environ, "DUCKDB_WRITE_LOCK_TIMEOUT": "20"}
+        result = subprocess.run(
+            [sys.executable, "-c", script, str(analytics_db)], env=env, capture_output=True, text=True, timeout=60
+        )
+        assert result.returncode == 0, result.stderr
+        served = len(reads)
+        while len(reads) == served:
+            time.sleep(0.01)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert pool.stats["opens"] >= 2
+    with pool.connection() as con:
+        assert con.execute("SELECT x FROM writer_marker").fetchone() == (1,)
+    assert not list(analytics_db.parent.glob("*.write-intent.*"))
+    pool.close()
+
+
+def test_loader_factory_reuses_instance_until_config_or_env_changes(tmp_path, monkeypatch):
+    config = tmp_path / "config.yaml"
+    config.write_text("duckdb_path: a.duckdb\noutput:\n  parquet_dir: data\n")
+    monkeypatch.delenv("DUCKDB_PATH", raising=False)
+
+    loader = get_data_loader(config_path=config)
+    assert get_data_loader(config_path=config) is loader
+    assert loader.duckdb_path == "a.duckdb"
+
+    monkeypatch.setenv("DUCKDB_PATH", "env.duckdb")
+    assert get_data_loader(config_path=config).duckdb_path == "env.duckdb"
+    monkeypatch.delenv("DUCKDB_PATH")
+
+    config.write_text("duckdb_path: b.duckdb\noutput:\n  parquet_dir: data\n")
+    os.utime(config, ns=(0, config.stat().st_mtime_ns + 1_000_000_000))
+    reloaded = get_data_loader(config_path=config)
+    assert reloaded is not loader
+    assert reloaded.duckdb_path == "b.duckdb"
+
+
+def test_replace_table_swaps_shadow_and_keeps_live_table_on_failure(analytics_db):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+
+    loader.replace_table("claims_ml_scores", "SELECT * FROM claims_ml_scores WHERE ml_score > 0")
+    kept = loader.query("SELECT COUNT(*) AS n FROM claims_ml_scores")["n"].iloc[0]
+    assert 0 < kept < 400
+    assert not loader.table_exists("claims_ml_scores__shadow")
+
+    with write_connection(str(analytics_db)) as con:
+        with pytest.raises(duckdb.CatalogException):
+            swap_in_shadow_tables(con, {"claims_ml_scores": "missing_shadow"})
+    assert loader.query("SELECT COUNT(*) AS n FROM claims_ml_scores")["n"].iloc[0] == kept
+
+
+def test_get_claim_point_lookup_and_indexed_replace(analytics_db):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+
+    row = loader.get_claim("C000042")
+    assert len(row) == 1 and row["claim_id"].iloc[0] == "C000042"
+    assert loader.get_claim("C000042", columns=["claim_id", "los"]).columns.tolist() == ["claim_id", "los"]
+    assert loader.get_claim("missing").empty
+    with pytest.raises(ValueError):
+        loader.get_claim("C000042", columns=["los; DROP TABLE claims_normalized"])
+
+    index_sql = "CREATE UNIQUE INDEX IF NOT EXISTS claims_copy_claim_id_idx ON claims_copy (claim_id)"
+    for _ in range(2):
+        loader.replace_table("claims_copy", "SELECT * FROM claims_normalized", indexes=[index_sql])
+    indexes = loader.query("SELECT index_name, is_unique FROM duckdb_indexes() WHERE table_name = 'claims_copy'")
+    assert indexes.to_dict("records") == [{"index_name": "claims_copy_claim_id_idx", "is_unique": True}]
+    assert loader.get_claim("C000042", table_name="claims_copy")["los"].iloc[0] == row["los"].iloc[0]
+
+
+def test_data_version_changes_with_every_write(tmp_path):
+    path = tmp_path / "analytics.duckdb"
+    with duckdb.connect(str(path)) as con:
+        con.execute("CREATE TABLE t AS SELECT 1 AS x")
+    loader = DataLoader(duckdb_path=str(path))
+    version = loader.data_version()
+    assert loader.data_version() == version
+
+    with duckdb.connect(str(path)) as con:
+        con.execute("INSERT INTO t VALUES (2)")
+    assert loader.data_version() != version
+
+
+def test_missing_enum_types_are_rechecked_only_after_a_write(analytics_db, monkeypatch):
+    from ml.common import data_access
+
+    checks = []
+    read_connection = data_access.read_connection
+
+    def counting_read_connection(path):
+        checks.append(path)
+        return read_connection(path)
+
+    monkeypatch.setattr(data_access, "read_connection", counting_read_connection)
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    for _ in range(3):
+        assert loader.equals_sql("province_name") == "province_name = ?"
+    assert len(checks) == 1
+
+    loader.execute(
+        """
+        CREATE TYPE province_enum AS ENUM ('BALI');
+        CREATE TYPE severity_enum AS ENUM ('sedang');
+        CREATE TYPE service_type_enum AS ENUM ('RITL');
+        CREATE TYPE facility_class_enum AS ENUM ('RS Kelas B');
+        """
+    )
+    assert loader.equals_sql("province_name") == "province_name = TRY_CAST(? AS province_enum)"
+    assert loader.equals_sql("service_type") == "service_type = TRY_CAST(? AS service_type_enum)"
+    assert len(checks) == 2
@@ -9,3 +9,14 @@ def test_health_ping():
 
     assert response.status_code == 200
     assert response.get_json() == {"status": "ok"}
+
+
+def test_health_model_reports_registry_timings():
+    app = create_app("development")
+    client = app.test_client()
+
+    response = client.get("/health/model")
+
+    assert response.status_code == 200
+    payload = response.get_json()
+    assert {"model_version", "loads", "load_ms", "requests", "acquire_ms_avg"} <= payload.keys()
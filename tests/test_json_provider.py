@@ -0,0 +1,14 @@
+from datetime import datetime
+
+import numpy as np
+
+from app import create_app
+
+
+def test_orjson_provider_matches_default_output_and_nulls_nan():
+    app = create_app("default")
+    with app.app_context():
+        response = app.json.response({"b": np.float64("nan"), "a": [np.int64(3), 1.5], "at": datetime(2022, 1, 2)})
+
+    assert response.mimetype == "application/json"
+    assert response.get_data() == b'{"a":[3,1.5],"at":"Sun, 02 Jan 2022 00:00:00 GMT","b":null}\n'
@@ -0,0 +1,49 @@
+import json
+import threading
+
+from ml.inference import registry as registry_module
+from ml.inference.calibration import ScoreCalibration
+from ml.inference.registry import ModelRegistry
+
+
+def _write_meta(path, version):
+    meta = json.loads(registry_module.MODEL_META_FILE.read_text())
+    meta["model_version"] = version
+    path.write_text(json.dumps(meta))
+
+
+def test_registry_shares_one_scorer_and_swaps_on_version_change(tmp_path, monkeypatch):
+    meta_path = tmp_path / "model_meta.json"
+    _write_meta(meta_path, "iso_a")
+    monkeypatch.setattr("ml.inference.scorer.MODEL_META_FILE", meta_path)
+    registry = ModelRegistry(meta_path=meta_path, check_interval=0)
+
+    scorers = []
+    threads = [threading.Thread(target=lambda: scorers.append(registry.get_scorer())) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(scorer) for scorer in scorers}) == 1
+    assert registry.stats()["loads"] == 1
+    first = scorers[0]
+    assert first.model_version == "iso_a"
+
+    meta_path.write_text(meta_path.read_text())
+    assert registry.get_scorer() is first
+
+    _write_meta(meta_path, "iso_b")
+    swapped = registry.get_scorer()
+    assert swapped is not first
+    assert swapped.model_version == "iso_b"
+    stats = registry.stats()
+    assert stats["loads"] == 2
+    assert stats["model_version"] == "iso_b"
+    assert stats["requests"] == 8
+    assert swapped.calibration is None
+
+    ScoreCalibration.fit("iso_b", -0.2, 0.3, 100).save()
+    assert registry.get_scorer() is swapped
+    assert swapped.calibration.score_max == 0.3
+    assert registry.stats()["calibrated"] is True
@@ -0,0 +1,159 @@
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+from app.services import risk_scoring
+from app.services.refresh_jobs import REFRESH_MODULE, RefreshJobNotFound, RefreshJobQueue
+from ml.common.data_access import DataLoader, get_connection_pool
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+class _ScriptQueue(RefreshJobQueue):
+    """Queue running a short script instead of the refresh CLI."""
+
+    def __init__(self, job_dir, script):
+        super().__init__(job_dir=job_dir, timeout=30)
+        self.script = script
+
+    def _command(self, loader, job):
+        return [sys.executable, "-c", self.script]
+
+
+class _WorkdirQueue(RefreshJobQueue):
+    """Queue running the real refresh CLI from a scratch directory (artefacts, QC logs)."""
+
+    def __init__(self, job_dir, workdir, prelude="", extra_args=()):
+        super().__init__(job_dir=job_dir, timeout=300)
+        self.workdir = workdir
+        self.prelude = prelude
+        self.extra_args = list(extra_args)
+
+    def _command(self, loader, job):
+        bootstrap = (
+            f"import os, runpy, sys; os.chdir(sys.argv.pop(1)); {self.prelude}"
+            f"runpy.run_module({REFRESH_MODULE!r}, run_name='__main__', alter_sys=True)"
+        )
+        return [sys.executable, "-c", bootstrap, str(self.workdir), *super()._command(loader, job)[3:], *self.extra_args]
+
+    @staticmethod
+    def _environment(loader):
+        env = RefreshJobQueue._environment(loader)
+        env["PYTHONPATH"] = str(REPO_ROOT)
+        return env
+
+
+def _wait(queue):
+    queue._executor.shutdown(wait=True)
+
+
+def test_refresh_job_reports_success_and_reuses_active_job(analytics_db, tmp_path):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    queue = _ScriptQueue(tmp_path / "jobs", "import os, time; time.sleep(0.5); print(os.environ['DUCKDB_PATH'])")
+
+    job = queue.submit(loader)
+    assert queue.submit(loader).id == job.id
+    _wait(queue)
+
+    status = queue.get(job.id)
+    assert status.status == "succeeded"
+    assert status.returncode == 0
+    assert status.log_tail == [str(analytics_db)]
+    assert status.started_at and status.finished_at
+
+
+def test_refresh_job_records_failure(analytics_db, tmp_path):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    queue = _ScriptQueue(tmp_path / "jobs", "raise SystemExit('Could not set lock on file')")
+
+    job = queue.submit(loader, full=True)
+    _wait(queue)
+
+    status = queue.get(job.id)
+    assert status.status == "failed"
+    assert status.full is True
+    assert status.error == "Could not set lock on file"
+    with pytest.raises(RefreshJobNotFound):
+        queue.get("../../etc/passwd")
+
+
+def _workdir_loader(analytics_db, tmp_path):
+    workdir = tmp_path / "work"
+    shutil.copytree(REPO_ROOT / "ml" / "artifacts", workdir / "ml" / "artifacts")
+    config = tmp_path / "config.yaml"
+    config.write_text(f"duckdb_path: {analytics_db}\noutput:\n  parquet_dir: {tmp_path / 'data'}\n")
+    return workdir, DataLoader(duckdb_path=str(analytics_db), config_path=config)
+
+
+def test_refresh_job_takes_write_lock_while_pooled_reader_is_active(analytics_db, tmp_path):
+    workdir, loader = _workdir_loader(analytics_db, tmp_path)
+    pool = get_connection_pool(str(analytics_db))
+    stop = threading.Event()
+    reads = []
+
+    def reader():
+        while not stop.is_set():
+            with pool.connection() as con:
+                reads.append(con.execute("SELECT COUNT(*) FROM claims_normalized").fetchone()[0])
+            time.sleep(0.01)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    try:
+        while not reads:
+            time.sleep(0.01)
+        queue = _WorkdirQueue(tmp_path / "jobs", workdir)
+        job = queue.submit(loader, full=True)
+        _wait(queue)
+    finally:
+        stop.set()
+        thread.join()
+
+    status = queue.get(job.id)
+    assert status.status == "succeeded", status.log_tail
+    assert loader.table_exists(risk_scoring.RISK_RANKED_TABLE)
+    assert len(set(reads)) == 1
+    pool.close()
+
+
+def test_pooled_reads_stay_fast_while_refresh_job_scores(analytics_db, tmp_path):
+    # 400 claims in chunks of 50, each chunk scored at least 0.5s later: 4s of scoring.
+    slow_scoring = (
+        "import time; from ml.inference.scorer import MLScorer; score_raw = MLScorer.score_raw; "
+        "MLScorer.score_raw = lambda self, df: (time.sleep(0.5), score_raw(self, df))[1]; "
+    )
+    workdir, loader = _workdir_loader(analytics_db, tmp_path)
+    pool = get_connection_pool(str(analytics_db))
+    stop = threading.Event()
+    latencies = []
+
+    def reader():
+        while not stop.is_set():
+            started = time.monotonic()
+            with pool.connection() as con:
+                con.execute("SELECT COUNT(*) FROM claims_normalized").fetchone()
+            latencies.append(time.monotonic() - started)
+            time.sleep(0.01)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    try:
+        queue = _WorkdirQueue(tmp_path / "jobs", workdir, prelude=slow_scoring, extra_args=["--chunk-size", "50"])
+        job = queue.submit(loader, full=True)
+        _wait(queue)
+    finally:
+        stop.set()
+        thread.join()
+
+    status = queue.get(job.id)
+    assert status.status == "succeeded", status.log_tail
+    elapsed = datetime.fromisoformat(status.finished_at) - datetime.fromisoformat(status.started_at)
+    assert elapsed.total_seconds() >= 4
+    assert len(latencies) > 100
+    assert max(latencies) < 1.5
+    pool.close()
@@ -0,0 +1,53 @@
+import duckdb
+import numpy as np
+
+from ml.common.data_access import DataLoader, staging_path
+from ml.inference.scorer import MLScorer
+from ml.pipelines import refresh_ml_scores
+
+
+def test_streaming_scores_match_single_batch(analytics_db):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    scorer = MLScorer()
+    expected = scorer.score_dataframe(loader.load_claims_normalized()).sort_values("claim_id")
+
+    rows, deleted = refresh_ml_scores._score_streaming(loader, scorer, chunk_size=64, workers=1)
+
+    with duckdb.connect(str(analytics_db), read_only=True) as con:
+        streamed = con.execute("SELECT * FROM claims_ml_scores ORDER BY claim_id").fetchdf()
+
+    assert rows == len(expected) == len(streamed)
+    assert deleted == 0
+    assert not staging_path(str(analytics_db), refresh_ml_scores.STAGING_NAME).exists()
+    assert streamed["claim_id"].tolist() == expected["claim_id"].tolist()
+    assert np.array_equal(streamed["ml_score"].to_numpy(), expected["ml_score"].to_numpy())
+    assert np.array_equal(streamed["ml_score_normalized"].to_numpy(), expected["ml_score_normalized"].to_numpy())
+    assert set(streamed["model_version"]) == {scorer.model_version}
+
+
+def test_incremental_refresh_scores_only_changed_claims(analytics_db):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    scorer = MLScorer()
+    assert not refresh_ml_scores._can_refresh_incrementally(loader, scorer)
+    refresh_ml_scores._score_streaming(loader, scorer, chunk_size=100, workers=1)
+    assert refresh_ml_scores._can_refresh_incrementally(loader, scorer)
+    before_province = loader.query("SELECT province_name FROM claims_normalized WHERE claim_id = 'C000014'").iloc[0, 0]
+
+    loader.execute("UPDATE claims_normalized SET amount_claimed = amount_claimed * 3 WHERE claim_id = 'C000010'")
+    loader.execute("UPDATE claims_normalized SET dx_primary_code = 'Z00' WHERE claim_id = 'C000011'")
+    loader.execute("UPDATE claims_normalized SET province_name = 'BALI' WHERE claim_id = 'C000014'")
+    loader.execute("DELETE FROM claims_normalized WHERE claim_id = 'C000012'")
+    loader.execute(
+        "INSERT INTO claims_normalized SELECT * REPLACE ('C999999' AS claim_id) "
+        "FROM claims_normalized WHERE claim_id = 'C000013'"
+    )
+
+    rows, deleted = refresh_ml_scores._score_streaming(loader, scorer, chunk_size=100, workers=1, incremental=True)
+    assert deleted == 1
+    assert rows == (2 if before_province == "BALI" else 3)
+
+    incremental = loader.query("SELECT * FROM claims_ml_scores ORDER BY claim_id")
+    expected = scorer.score_dataframe(loader.load_claims_normalized()).sort_values("claim_id")
+    assert incremental["claim_id"].tolist() == expected["claim_id"].tolist()
+    assert np.array_equal(incremental["ml_score"].to_numpy(), expected["ml_score"].to_numpy())
+    assert np.array_equal(incremental["ml_score_normalized"].to_numpy(), expected["ml_score_normalized"].to_numpy())
@@ -0,0 +1,80 @@
+import duckdb
+import pytest
+
+from app.services import reports
+from app.services.cache import TTLCache
+from app.services.risk_scoring import InvalidCursor, StaleCursor
+from ml.common.data_access import DataLoader
+
+
+@pytest.fixture
+def pairs_loader(tmp_path, monkeypatch):
+    path = tmp_path / "analytics.duckdb"
+    with duckdb.connect(str(path)) as con:
+        con.execute(
+            """
+            CREATE TABLE claim_duplicate_pairs AS
+            SELECT
+                'C' || LPAD(CAST(i AS VARCHAR), 4, '0') AS claim_id_a,
+                'C' || LPAD(CAST(i + 1000 AS VARCHAR), 4, '0') AS claim_id_b,
+                i % 4 AS gap_days,
+                'A09' AS dx_primary_code,
+                '89.03' AS procedure_code,
+                CASE WHEN i % 3 = 0 THEN 'BALI' ELSE 'JAWA BARAT' END AS province_name,
+                'F' || CAST(i % 5 AS VARCHAR) AS facility_id_a,
+                'F' || CAST(i % 7 AS VARCHAR) AS facility_id_b
+            FROM range(60) t(i)
+            """
+        )
+    loader = DataLoader(duckdb_path=str(path))
+    monkeypatch.setattr(reports, "get_data_loader", lambda: loader)
+    monkeypatch.setattr(reports, "_REPORT_CACHE", TTLCache(max_entries=16, ttl=60))
+    return loader
+
+
+def test_duplicate_pairs_keyset_pages_cover_filtered_pairs_in_order(pairs_loader):
+    full = pairs_loader.query(
+        """
+        SELECT claim_id_a, claim_id_b FROM claim_duplicate_pairs
+        WHERE province_name = 'BALI' AND (facility_id_a = 'F1' OR facility_id_b = 'F1')
+        ORDER BY gap_days, claim_id_a, claim_id_b
+        """
+    )
+    pages, cursor = [], None
+    while True:
+        result = reports.get_duplicate_claims(limit=2, cursor=cursor, province=" bali", facility_id="F1")
+        pages.append(result["data"])
+        cursor = result["next_cursor"]
+        if cursor is None:
+            break
+
+    rows = [row for page in pages for row in page]
+    assert [(row["claim_id"], row["matched_claim_id"]) for row in rows] == list(full.itertuples(index=False, name=None))
+    assert all(len(page) == 2 for page in pages[:-1])
+
+    with pytest.raises(InvalidCursor):
+        reports.get_duplicate_claims(cursor="not-a-cursor")
+
+
+def test_unknown_province_filter_selects_pairs_without_province(pairs_loader):
+    pairs_loader.execute("UPDATE claim_duplicate_pairs SET province_name = NULL WHERE gap_days = 1")
+    rows = reports.get_duplicate_claims(limit=100, province="unknown")["data"]
+    assert len(rows) == 15 and all(row["episode_gap_days"] == 1 for row in rows)
+
+
+def test_duplicate_report_requires_pairs_table(analytics_db, monkeypatch):
+    monkeypatch.setattr(reports, "get_data_loader", lambda: DataLoader(duckdb_path=str(analytics_db)))
+    with pytest.raises(reports.DuplicatePairsUnavailable):
+        reports.get_duplicate_claims()
+
+
+def test_duplicate_pairs_cursor_is_stale_after_new_etl_run(pairs_loader):
+    pairs_loader.execute("CREATE TABLE etl_runs (run_id TEXT, executed_at TIMESTAMP)")
+    pairs_loader.execute("INSERT INTO etl_runs VALUES ('run-1', TIMESTAMP '2024-01-01 00:00:00')")
+    cursor = reports.get_duplicate_claims(limit=5)["next_cursor"]
+    assert len(reports.get_duplicate_claims(limit=5, cursor=cursor)["data"]) == 5
+
+    pairs_loader.execute("INSERT INTO etl_runs VALUES ('run-2', TIMESTAMP '2024-01-02 00:00:00')")
+    with pytest.raises(StaleCursor):
+        reports.get_duplicate_claims(limit=5, cursor=cursor)
+    assert reports.get_duplicate_claims(limit=5)["next_cursor"] != cursor
@@ -0,0 +1,281 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import risk_scoring
+from ml.common.data_access import DataLoader
+
+
+def _pandas_ranking(loader: DataLoader) -> pd.DataFrame:
+    claims = loader.load_claims_normalized()
+    scores = loader.query(f"SELECT * FROM {risk_scoring.SCORES_CACHE_TABLE}")
+    df = risk_scoring._compute_rule_enrichment(claims.merge(scores, on="claim_id", how="left"))
+    df["risk_score"] = df[["rule_score", "ml_score_normalized"]].max(axis=1).fillna(0)
+    df["flag_count"] = df["flags"].apply(len)
+    df["has_flags"] = df["flag_count"] > 0
+    return df.sort_values(
+        by=["has_flags", "flag_count", "risk_score", "claim_id"],
+        ascending=[False, False, False, True],
+    )
+
+
+def test_sql_ranking_matches_pandas_enrichment(analytics_db):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    expected = _pandas_ranking(loader)
+
+    page, total = risk_scoring._fetch_filtered_claims(
+        loader, risk_scoring.SCORES_CACHE_TABLE, {}, page=1, page_size=len(expected)
+    )
+
+    assert total == len(expected)
+    assert page["claim_id"].tolist() == expected["claim_id"].tolist()
+    np.testing.assert_allclose(page["risk_score"], expected["risk_score"])
+    np.testing.assert_allclose(page["rule_score"], expected["rule_score"])
+    assert [list(flags) for flags in page["flags"]] == expected["flags"].tolist()
+
+
+def test_score_filters_apply_to_total_and_page(analytics_db):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    expected = _pandas_ranking(loader)
+    expected = expected[(expected["risk_score"] >= 0.6) & (expected["province_name"] == "BALI")]
+
+    page, total = risk_scoring._fetch_filtered_claims(
+        loader,
+        risk_scoring.SCORES_CACHE_TABLE,
+        {"min_risk_score": "0.6", "province": "bali"},
+        page=2,
+        page_size=5,
+    )
+
+    assert total == len(expected)
+    assert page["claim_id"].tolist() == expected["claim_id"].iloc[5:10].tolist()
+
+
+def test_ranked_table_serves_same_pages_as_live_ranking(analytics_db, tmp_path):
+    from ml.common import metadata
+
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    loader.parquet_dir = tmp_path / "data"
+
+    assert not risk_scoring._ranked_snapshot(loader, "iso_test", "RULESET_v1").is_current
+
+    ranked_rows = risk_scoring.build_risk_ranked_table(loader)
+    metadata.record_ml_refresh(
+        str(analytics_db),
+        version="iso_test",
+        rows_scored=ranked_rows,
+        summary=None,
+        ruleset_version="RULESET_v1",
+        ranked_rows=ranked_rows,
+    )
+
+    assert (loader.parquet_dir / risk_scoring.RISK_RANKED_FILENAME).exists()
+    assert risk_scoring._ranked_snapshot(loader, "iso_test", "RULESET_v1").is_current
+    assert not risk_scoring._ranked_snapshot(loader, "iso_other", "RULESET_v1").is_current
+
+    filters = {"severity": "ringan", "min_ml_score": "0.3"}
+    live, live_total = risk_scoring._fetch_filtered_claims(
+        loader, risk_scoring.SCORES_CACHE_TABLE, filters, page=2, page_size=7
+    )
+    ranked, ranked_total = risk_scoring._fetch_filtered_claims(
+        loader, risk_scoring.SCORES_CACHE_TABLE, filters, page=2, page_size=7, use_ranked_table=True
+    )
+
+    assert ranked_total == live_total
+    assert ranked["claim_id"].tolist() == live["claim_id"].tolist()
+
+
+def test_cursor_pages_match_offset_pages(analytics_db):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    filters = {"service_type": "ritl"}
+
+    offset_pages = [
+        risk_scoring._fetch_filtered_claims(loader, risk_scoring.SCORES_CACHE_TABLE, filters, page=page, page_size=9)[0]
+        for page in (1, 2, 3)
+    ]
+
+    after_key = None
+    for expected in offset_pages:
+        page_df, _ = risk_scoring._fetch_filtered_claims(
+            loader, risk_scoring.SCORES_CACHE_TABLE, filters, page=1, page_size=9, after_key=after_key
+        )
+        assert page_df["claim_id"].tolist() == expected["claim_id"].tolist()
+        cursor = risk_scoring._encode_cursor(page_df.iloc[-1], "run-1")
+        after_key = risk_scoring._decode_cursor(cursor, "run-1")
+
+
+def test_cursor_rejects_other_snapshot_and_garbage():
+    row = {"has_flags": True, "flag_count": 2, "risk_score": 0.8, "claim_id": "C1"}
+    cursor = risk_scoring._encode_cursor(row, "run-1")
+
+    with pytest.raises(risk_scoring.StaleCursor):
+        risk_scoring._decode_cursor(cursor, "run-2")
+    with pytest.raises(risk_scoring.InvalidCursor):
+        risk_scoring._decode_cursor("not-a-cursor", "run-1")
+
+
+def test_total_survives_page_past_end_and_known_total_skips_count(analytics_db):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    filters = {"province": "BALI", "max_risk_score": "0.7"}
+
+    _, total = risk_scoring._fetch_filtered_claims(loader, risk_scoring.SCORES_CACHE_TABLE, filters, page=1, page_size=5)
+    empty, past_end_total = risk_scoring._fetch_filtered_claims(
+        loader, risk_scoring.SCORES_CACHE_TABLE, filters, page=1000, page_size=5
+    )
+    assert empty.empty
+    assert past_end_total == total
+
+    page, estimated = risk_scoring._fetch_filtered_claims(
+        loader, risk_scoring.SCORES_CACHE_TABLE, filters, page=1, page_size=5, known_total=12345
+    )
+    assert estimated == 12345
+    assert len(page) == 5
+    assert "total_count" not in page.columns
+
+
+def test_missing_scores_cache_is_never_computed_in_request(analytics_db, tmp_path):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    loader.parquet_dir = tmp_path / "parquet"
+    loader.execute(f"DROP TABLE {risk_scoring.SCORES_CACHE_TABLE}")
+    mtime = analytics_db.stat().st_mtime_ns
+
+    relation = risk_scoring._resolve_scores_relation(loader)
+    page, total = risk_scoring._fetch_filtered_claims(loader, relation, {}, page=1, page_size=10)
+
+    assert relation == risk_scoring.EMPTY_SCORES_RELATION
+    assert total == 400
+    assert page["ml_score"].isna().all()
+    assert not loader.table_exists(risk_scoring.SCORES_CACHE_TABLE)
+    assert analytics_db.stat().st_mtime_ns == mtime
+
+
+def test_pages_without_cached_scores_match_their_cursor(analytics_db, tmp_path):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    loader.parquet_dir = tmp_path / "parquet"
+    loader.execute(f"DROP TABLE {risk_scoring.SCORES_CACHE_TABLE}")
+    relation = risk_scoring._resolve_scores_relation(loader)
+    snapshot = risk_scoring.RankedSnapshot(run_id=None, is_current=False)
+    expected, _ = risk_scoring._fetch_filtered_claims(loader, relation, {}, page=1, page_size=30)
+
+    served = []
+    after_key = None
+    for _ in range(3):
+        page = risk_scoring._load_high_risk_page(
+            loader,
+            relation,
+            {},
+            page=None,
+            page_size=10,
+            ruleset_version="RULESET_test",
+            snapshot=snapshot,
+            after_key=after_key,
+            count_key=f"no-scores-{analytics_db}",
+            count_mode="exact",
+        )
+        assert all(item["ml_score"] is None for item in page.items)
+        after_key = risk_scoring._decode_cursor(page.next_cursor, None)
+        assert after_key[2:] == (page.items[-1]["risk_score"], page.items[-1]["claim_id"])
+        served.extend(page.items)
+
+    assert [item["claim_id"] for item in served] == expected["claim_id"].tolist()
+    assert [item["risk_score"] for item in served] == expected["risk_score"].tolist()
+
+
+def test_high_risk_claims_without_scores_cache_serve_rule_scores(analytics_db, tmp_path, monkeypatch):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    loader.parquet_dir = tmp_path / "parquet"
+    loader.execute(f"DROP TABLE {risk_scoring.SCORES_CACHE_TABLE}")
+    monkeypatch.setattr(risk_scoring, "get_data_loader", lambda: loader)
+    monkeypatch.setattr(risk_scoring, "_fetch_latest_feedback_map", lambda claim_ids: {})
+
+    response = risk_scoring.get_high_risk_claims({"page_size": "25"})
+
+    items = response["items"]
+    assert response["total"] == 400 and response["snapshot"] is None and len(items) == 25
+    assert all(item["ml_score"] is None and item["ml_score_normalized"] is None for item in items)
+    assert all(item["risk_score"] == item["rule_score"] for item in items)
+    expected, _ = risk_scoring._fetch_filtered_claims(loader, risk_scoring.EMPTY_SCORES_RELATION, {}, page=1, page_size=25)
+    assert [item["claim_id"] for item in items] == expected["claim_id"].tolist()
+    assert risk_scoring._decode_cursor(response["next_cursor"], None)[3] == items[-1]["claim_id"]
+
+
+def test_columnar_page_serializer_converts_nulls_text_and_dates(analytics_db):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    page, _ = risk_scoring._fetch_filtered_claims(loader, risk_scoring.SCORES_CACHE_TABLE, {}, page=1, page_size=4)
+    page["facility_name"] = ["  rs  sehat ", None, "rsud kota", "   "]
+    page["los"] = [3, None, 0, 7]
+    page["admit_dt"] = pd.to_datetime(["2023-01-05", None, "2023-02-01 08:30:15.5", "2023-03-01"], format="ISO8601")
+    page["ml_score_normalized"] = [0.25, np.nan, None, 1.0]
+    page["peer_mean"] = [100.0, np.nan, 50.5, 0.0]
+    page["peer_p90"] = [150.0, 80.0, None, 0.0]
+    page["flags"] = [np.array(["severity_mismatch", "duplicate_pattern"]), None, [], ["short_stay_high_cost", None]]
+
+    items = risk_scoring._serialize_claims_page(page, "RULESET_test", {page["claim_id"].iloc[0]: {"decision": "ok"}})
+
+    assert [item["claim_id"] for item in items] == page["claim_id"].tolist()
+    assert [item["facility_name"] for item in items] == ["Rs  Sehat", None, "Rsud Kota", None]
+    assert [item["los"] for item in items] == [3, None, 0, 7]
+    assert [item["admit_dt"] for item in items] == [
+        "2023-01-05T00:00:00",
+        None,
+        "2023-02-01T08:30:15.500000",
+        "2023-03-01T00:00:00",
+    ]
+    assert [item["ml_score_normalized"] for item in items] == [0.25, None, None, 1.0]
+    assert [item["peer"] for item in items] == [
+        {"mean": 100.0, "p90": 150.0},
+        {"mean": None, "p90": 80.0},
+        {"mean": 50.5, "p90": None},
+        {"mean": 0.0, "p90": 0.0},
+    ]
+    assert [item["flags"] for item in items] == [
+        ["severity_mismatch", "duplicate_pattern"],
+        [],
+        [],
+        ["short_stay_high_cost"],
+    ]
+    assert {item["ruleset_version"] for item in items} == {"RULESET_test"}
+    assert [item["latest_feedback"] for item in items] == [{"decision": "ok"}, None, None, None]
+
+
+def test_enum_filter_columns_match_varchar_results(analytics_db):
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    filters = {"province": " bali ", "severity": "SEDANG", "service_type": "ritl", "facility_class": "RS Kelas B"}
+    expected, expected_total = risk_scoring._fetch_filtered_claims(
+        loader, risk_scoring.SCORES_CACHE_TABLE, filters, page=1, page_size=50
+    )
+    assert expected_total > 0
+
+    loader.execute(
+        """
+        CREATE TYPE province_enum AS ENUM ('BALI', 'DKI JAKARTA', 'JAWA BARAT');
+        CREATE TYPE severity_enum AS ENUM ('berat', 'ringan', 'sedang', 'unknown');
+        CREATE TYPE service_type_enum AS ENUM ('RITL', 'RJTL', 'Unknown');
+        CREATE TYPE facility_class_enum AS ENUM ('RS Kelas B', 'RS Kelas C', 'Tidak diketahui');
+        CREATE OR REPLACE TABLE claims_normalized AS
+        SELECT * REPLACE (
+            CAST(province_name AS province_enum) AS province_name,
+            CAST(severity_group AS severity_enum) AS severity_group,
+            CAST(service_type AS service_type_enum) AS service_type,
+            CAST(facility_class AS facility_class_enum) AS facility_class
+        )
+        FROM claims_normalized
+        ORDER BY province_name, admit_dt
+        """
+    )
+    loader = DataLoader(duckdb_path=str(analytics_db))
+    assert loader.equals_sql("province_name") == "province_name = TRY_CAST(? AS province_enum)"
+    assert loader.equals_sql("dx_primary_code") == "dx_primary_code = ?"
+    assert risk_scoring._build_filter_clauses(loader, {"service_type": " unknown "})[1] == ["Unknown"]
+
+    page, total = risk_scoring._fetch_filtered_claims(
+        loader, risk_scoring.SCORES_CACHE_TABLE, filters, page=1, page_size=50
+    )
+    assert total == expected_total
+    assert page["claim_id"].tolist() == expected["claim_id"].tolist()
+    assert page["province_name"].dtype == object and set(page["province_name"]) == {"BALI"}
+
+    _, unknown_total = risk_scoring._fetch_filtered_claims(
+        loader, risk_scoring.SCORES_CACHE_TABLE, {"province": "narnia"}, page=1, page_size=10
+    )
+    assert unknown_total == 0
@@ -0,0 +1,46 @@
+import warnings
+
+import numpy as np
+
+from ml.inference.scorer import MLScorer
+
+
+def test_encoder_matches_dummies_path_bit_for_bit(claims_frame):
+    scorer = MLScorer()
+    claims = claims_frame.copy()
+    claims.loc[::7, "province_name"] = None
+    claims.loc[::11, "facility_class"] = "RS Belum Dikenal"
+    claims.loc[::13, "los"] = np.nan
+
+    legacy = scorer._prepare_features(claims)
+    encoded = scorer.encoder.transform(claims)
+
+    assert encoded.dtype == np.float32 and encoded.flags["F_CONTIGUOUS"]
+    assert np.array_equal(legacy.to_numpy(dtype=np.float32), encoded)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        expected = -scorer.model.decision_function(legacy)
+    scores = scorer.score_dataframe(claims)
+    assert np.array_equal(scores["ml_score"].to_numpy(), expected)
+
+
+def test_calibrated_scores_do_not_depend_on_the_batch(claims_frame):
+    from ml.inference.calibration import ScoreCalibration, load_calibration
+
+    scorer = MLScorer()
+    raw = scorer.score_raw(claims_frame)
+    ScoreCalibration.fit(scorer.model_version, raw.min(), raw.max(), len(raw)).save()
+    scorer.reload_calibration()
+    assert load_calibration(scorer.model_version) == scorer.calibration
+
+    full = scorer.score_dataframe(claims_frame).set_index("claim_id")["ml_score_normalized"]
+    single = scorer.score_dataframe(claims_frame.iloc[[5]])
+    page = scorer.score_dataframe(claims_frame.iloc[40:60]).set_index("claim_id")["ml_score_normalized"]
+
+    assert single["ml_score_normalized"].iloc[0] == full.iloc[5]
+    assert page.equals(full.iloc[40:60])
+    assert full.min() == 0.0 and full.max() <= 1.0
+
+    shifted = scorer.calibration.normalize(np.array([raw.min() - 1, raw.max() + 1]))
+    assert shifted.tolist() == [0.0, 1.0]